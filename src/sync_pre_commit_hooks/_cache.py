@@ -0,0 +1,244 @@
+"""On-disk caches shared by the hooks."""
+
+from __future__ import annotations
+
+import json
+import os
+import sys
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Generic, TypeVar, cast
+
+from ._logging import get_logger
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+_T = TypeVar("_T")
+
+logger = get_logger("cache")
+
+CACHE_DIR_ENV = "SYNC_PRE_COMMIT_HOOKS_CACHE_DIR"
+DISK_CACHE_ENV = "SYNC_PRE_COMMIT_HOOKS_DISK_CACHE"
+_CACHE_VERSION = 1
+
+
+def get_cache_dir() -> Path:
+    """
+    Directory for on-disk caches.
+
+    Uses, in order, ``$SYNC_PRE_COMMIT_HOOKS_CACHE_DIR``,
+    ``$XDG_CACHE_HOME/sync-pre-commit-hooks``, ``%LOCALAPPDATA%`` on Windows,
+    and ``~/.cache/sync-pre-commit-hooks``. The directory is not created.
+    """
+    if cache_dir := os.environ.get(CACHE_DIR_ENV):
+        return Path(cache_dir)
+
+    base = os.environ.get("XDG_CACHE_HOME")
+    if not base and sys.platform == "win32":
+        base = os.environ.get("LOCALAPPDATA")
+    root = Path(base) if base else Path.home() / ".cache"
+    return root / "sync-pre-commit-hooks"
+
+
+class JsonLRUCache:
+    """
+    Small JSON backed key/value cache with least recently used eviction.
+
+    Entries are stored as ``{key: [last_used, value]}``. Changes are kept in
+    memory until :meth:`save`, which merges them with the entries on disk
+    (so concurrent processes don't drop each other's entries), evicts the
+    least recently used entries beyond ``max_size``, and writes the file
+    atomically.
+
+    Parameters
+    ----------
+    path : Path
+        Cache file. Parent directories are created on :meth:`save`.
+    max_size : int
+        Maximum number of entries kept.
+    """
+
+    def __init__(self, path: Path, max_size: int = 10_000) -> None:
+        self.path = path
+        self.max_size = max_size
+        self._entries = self._read()
+        self._changed: dict[str, list[Any]] = {}
+
+    def _read(self) -> dict[str, list[Any]]:
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return {}
+        if not isinstance(data, dict) or data.get("version") != _CACHE_VERSION:
+            return {}
+        entries = data.get("entries")
+        return entries if isinstance(entries, dict) else {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._entries
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Get value for ``key`` (marking it as recently used)."""
+        if (entry := self._entries.get(key)) is None:
+            return default
+        entry = self._changed[key] = [time.time(), entry[1]]
+        self._entries[key] = entry
+        return entry[1]
+
+    def last_used(self, key: str) -> float | None:
+        """Time ``key`` was last set or read, or ``None`` if missing."""
+        if (entry := self._entries.get(key)) is None:
+            return None
+        return float(entry[0])
+
+    def set(self, key: str, value: Any = None) -> None:
+        """Set ``key`` to (JSON serializable) ``value``."""
+        self._entries[key] = self._changed[key] = [time.time(), value]
+
+    def save(self) -> bool:
+        """Merge changes into cache file. Returns ``True`` if file was written."""
+        if not self._changed:
+            return False
+
+        from ._utils import file_lock, write_if_changed
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with file_lock(self.path):
+            entries = self._read()
+            for key, entry in self._changed.items():
+                if key not in entries or entries[key][0] <= entry[0]:
+                    entries[key] = entry
+            if len(entries) > self.max_size:
+                keep = sorted(entries, key=lambda k: entries[k][0], reverse=True)
+                entries = {k: entries[k] for k in keep[: max(self.max_size, 0)]}
+            written = write_if_changed(
+                self.path,
+                json.dumps({"version": _CACHE_VERSION, "entries": entries}),
+            )
+
+        self._entries = entries
+        self._changed = {}
+        return written
+
+    def try_save(self) -> bool:
+        """Like :meth:`save`, but a cache that cannot be written is skipped."""
+        try:
+            return self.save()
+        except (OSError, ValueError) as e:
+            logger.debug("Could not write cache %s: %s", self.path, e)
+            return False
+
+
+# Stat data is only trusted for files last modified at least this long before
+# they were cached, so a rewrite within the file system's timestamp resolution
+# cannot go unnoticed.
+_RACY_NS = 2_000_000_000
+
+
+class ParsedFileCache(Generic[_T]):
+    """
+    Values parsed from files, cached in memory and on disk.
+
+    Entries are keyed by resolved path, and store the file's size, mtime (ns),
+    and SHA-256 digest. A file is not read if its size and mtime match an entry
+    (and it was not modified just before the entry was made), and is not
+    parsed if its digest matches. So unchanged files are never re-parsed, and
+    changed files are never served stale in a long running process.
+
+    The on-disk layer is opt-in. It is used if ``disk`` is ``True``, or if
+    ``disk`` is ``None`` and ``$SYNC_PRE_COMMIT_HOOKS_DISK_CACHE`` is set (to
+    a non-empty value). It is loaded once per process (per cache file), and a
+    cache directory which cannot be written falls back to the in-memory cache.
+
+    Parameters
+    ----------
+    name : str
+        On-disk cache is ``get_cache_dir() / f"{name}.json"``.
+    parse : callable
+        Returns (JSON serializable) value from file contents.
+    cacheable : callable, optional
+        If passed and returns ``False`` for file contents, the value is not
+        cached (for example, if it depends on other files).
+    max_size : int
+        Maximum number of files kept in on-disk cache.
+    disk : bool, optional
+        Whether to use the on-disk cache. Default is to use it only if
+        ``$SYNC_PRE_COMMIT_HOOKS_DISK_CACHE`` is set.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        parse: Callable[[bytes], _T],
+        cacheable: Callable[[bytes], bool] | None = None,
+        max_size: int = 256,
+        disk: bool | None = None,
+    ) -> None:
+        self.name = name
+        self.parse = parse
+        self.cacheable = cacheable
+        self.max_size = max_size
+        self.disk = disk
+        self._memory: dict[str, dict[str, Any]] = {}
+        self._disk_cache: JsonLRUCache | None = None
+
+    def clear(self) -> None:
+        """Clear in memory cache."""
+        self._memory.clear()
+
+    def _disk(self) -> JsonLRUCache | None:
+        if not (os.environ.get(DISK_CACHE_ENV) if self.disk is None else self.disk):
+            return None
+        path = get_cache_dir() / f"{self.name}.json"
+        if self._disk_cache is None or self._disk_cache.path != path:
+            self._disk_cache = JsonLRUCache(path, self.max_size)
+        return self._disk_cache
+
+    def get(self, path: Path) -> _T:
+        """Value parsed from ``path``."""
+        now = time.time_ns()
+        key = str(path.resolve())
+        st = path.stat()
+        stat = {"size": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+        disk: JsonLRUCache | None = None
+        if (entry := self._memory.get(key)) is None and (
+            disk := self._disk()
+        ) is not None:
+            entry = disk.get(key)
+        if entry is not None and _stat_matches(entry, stat):
+            self._memory[key] = entry
+            return cast("_T", entry["value"])
+
+        import hashlib
+
+        data = path.read_bytes()
+        digest = hashlib.sha256(data).hexdigest()
+        if entry is not None and entry["sha256"] == digest:
+            value = cast("_T", entry["value"])
+        else:
+            value = self.parse(data)
+            if self.cacheable is not None and not self.cacheable(data):
+                _ = self._memory.pop(key, None)
+                return value
+
+        entry = {**stat, "sha256": digest, "cached_ns": now, "value": value}
+        self._memory[key] = entry
+        if disk is None:
+            disk = self._disk()
+        if disk is not None:
+            disk.set(key, entry)
+            _ = disk.try_save()
+        return value
+
+
+def _stat_matches(entry: dict[str, Any], stat: dict[str, int]) -> bool:
+    return bool(
+        entry["size"] == stat["size"]
+        and entry["mtime_ns"] == stat["mtime_ns"]
+        and entry["mtime_ns"] + _RACY_NS < entry["cached_ns"]
+    )
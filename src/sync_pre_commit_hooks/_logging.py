@@ -1,9 +1,11 @@
 from __future__ import annotations
 
 import logging
+from contextlib import contextmanager
 from typing import TYPE_CHECKING
 
 if TYPE_CHECKING:
+    from collections.abc import Generator, Iterable
     from logging import Logger
 
 FORMAT = "[%(name)s - %(levelname)s] %(message)s"
@@ -12,3 +14,65 @@ logging.basicConfig(level=logging.INFO, format=FORMAT)
 
 def get_logger(name: str) -> Logger:
     return logging.getLogger(name)
+
+
+class _CaptureFilter(logging.Filter):
+    """Hold back records emitted by ``thread``."""
+
+    def __init__(self, thread: int) -> None:
+        super().__init__()
+        self.thread = thread
+        self.records: dict[int, logging.LogRecord] = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.thread != self.thread:
+            return True
+        _ = self.records.setdefault(id(record), record)
+        return False
+
+
+@contextmanager
+def capture_logging() -> Generator[list[logging.LogRecord]]:
+    """
+    Capture records logged by the current thread, instead of emitting them.
+
+    Records from other threads are emitted as usual.
+
+    Yields
+    ------
+    list of LogRecord
+        Filled with the captured records on exit. These can be emitted later
+        with :func:`replay_logging`.
+    """
+    import threading
+
+    capture = _CaptureFilter(threading.get_ident())
+    handlers = {
+        handler
+        for logger in [
+            logging.root,
+            *(
+                x
+                for x in logging.root.manager.loggerDict.values()
+                if isinstance(x, logging.Logger)
+            ),
+        ]
+        for handler in logger.handlers
+    }
+    records: list[logging.LogRecord] = []
+    for handler in handlers:
+        handler.addFilter(capture)
+    try:
+        yield records
+    finally:
+        for handler in handlers:
+            handler.removeFilter(capture)
+        records.extend(capture.records.values())
+
+
+def replay_logging(records: Iterable[logging.LogRecord]) -> None:
+    """Emit ``records`` held back by :func:`capture_logging`."""
+    for record in records:
+        logger = logging.getLogger(record.name)
+        if logger.isEnabledFor(record.levelno):
+            logger.handle(record)
@@ -0,0 +1,208 @@
+"""
+Evaluate environment markers against target environments.
+
+A target environment only fixes some marker variables (the python version,
+and optionally the platform). Markers are evaluated with three valued logic:
+a comparison on a variable the target does not fix is unknown (``None``), so
+a requirement is only dropped if its marker is false whatever the value of
+the unknown variables.
+"""
+
+from __future__ import annotations
+
+import re
+from functools import lru_cache
+from itertools import product, starmap
+from typing import TYPE_CHECKING, NamedTuple
+
+from ._logging import get_logger
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Mapping, Sequence
+    from typing import Any
+
+    from packaging.markers import Marker
+
+    from ._requirements import NormalizedRequirement
+
+
+logger = get_logger("markers")
+
+#: Marker variables fixed by each supported platform.
+PLATFORMS: dict[str, dict[str, str]] = {
+    "linux": {"sys_platform": "linux", "os_name": "posix", "platform_system": "Linux"},
+    "darwin": {
+        "sys_platform": "darwin",
+        "os_name": "posix",
+        "platform_system": "Darwin",
+    },
+    "win32": {"sys_platform": "win32", "os_name": "nt", "platform_system": "Windows"},
+}
+
+_PYTHON_VERSION_RE = re.compile(r"^(?:python)?(?P<version>\d+\.\d+(?:\.\d+)?)$")
+
+# Patch versions used to bound ``python_full_version`` if only ``X.Y`` is known.
+_PATCH_BOUNDS = (0, 999)
+
+
+class TargetEnvironment(NamedTuple):
+    """Environment to evaluate markers against. ``None`` values are unknown."""
+
+    python_version: str | None = None
+    platform: str | None = None
+
+
+def parse_python_version(version: str) -> str | None:
+    """
+    Python version from ``language_version`` or ``.python-version`` value.
+
+    Accepts ``X.Y``, ``X.Y.Z``, and ``pythonX.Y`` forms. Returns ``None`` for
+    anything else (for example, ``default`` or ``system``).
+    """
+    if match := _PYTHON_VERSION_RE.match(version.strip()):
+        return match.group("version")
+    return None
+
+
+def get_targets(
+    python_versions: Sequence[str | None], platforms: Sequence[str | None]
+) -> list[TargetEnvironment]:
+    """Every combination of ``python_versions`` and ``platforms`` (unknown if empty)."""
+    return list(
+        starmap(
+            TargetEnvironment,
+            product(
+                dict.fromkeys(python_versions or [None]),
+                dict.fromkeys(platforms or [None]),
+            ),
+        )
+    )
+
+
+@lru_cache
+def get_environment(target: TargetEnvironment) -> Mapping[str, str]:
+    """Marker variables fixed by ``target``. Cached, so do not modify."""
+    environment: dict[str, str] = {}
+    if (version := target.python_version) is not None:
+        environment["python_version"] = ".".join(version.split(".")[:2])
+        if version.count(".") > 1:
+            environment["python_full_version"] = version
+    if target.platform is not None:
+        environment.update(PLATFORMS[target.platform])
+    return environment
+
+
+def _all(values: Iterable[bool | None]) -> bool | None:
+    values = list(values)
+    if False in values:
+        return False
+    return None if None in values else True
+
+
+def _any(values: Iterable[bool | None]) -> bool | None:
+    values = list(values)
+    if True in values:
+        return True
+    return None if None in values else False
+
+
+def _parse_marker(marker: Marker) -> tuple[list[Any], type[Any]] | None:
+    """
+    Parsed ``marker`` and the class of its variable nodes.
+
+    These are ``packaging`` internals, so return ``None`` (unknown) if they
+    are not as expected.
+    """
+    try:
+        from packaging._parser import Variable  # ruff:ignore[import-private-name]
+
+        markers: object = marker._markers  # ruff:ignore[private-member-access]
+    except (ImportError, AttributeError):
+        return None
+    if not isinstance(markers, list):
+        return None
+    return markers, Variable
+
+
+def _evaluate_item(
+    item: tuple[Any, Any, Any], environment: Mapping[str, str], variable: type[Any]
+) -> bool | None:
+    from packaging.markers import Marker
+
+    lhs, op, rhs = item
+    names = {node.value for node in (lhs, rhs) if isinstance(node, variable)}
+    marker = Marker(" ".join(node.serialize() for node in item))
+
+    if (
+        names == {"python_full_version"}
+        and "python_full_version" not in environment
+        and "python_version" in environment
+        and op.value in {"<", "<=", ">", ">="}
+    ):
+        # Ordering against any patch release is decided by the extremes.
+        results = {
+            marker.evaluate({
+                **environment,
+                "python_full_version": f"{environment['python_version']}.{patch}",
+            })
+            for patch in _PATCH_BOUNDS
+        }
+        return results.pop() if len(results) == 1 else None
+
+    if not names.issubset(environment):
+        return None
+    return marker.evaluate(dict(environment))
+
+
+def _evaluate_markers(
+    markers: list[Any], environment: Mapping[str, str], variable: type[Any]
+) -> bool | None:
+    # Same structure as ``packaging.markers._evaluate_markers``: ``or``
+    # separates groups of items which must all be true.
+    groups: list[list[bool | None]] = [[]]
+    for item in markers:
+        if isinstance(item, list):
+            groups[-1].append(_evaluate_markers(item, environment, variable))
+        elif isinstance(item, tuple):
+            groups[-1].append(_evaluate_item(item, environment, variable))
+        elif item == "or":
+            groups.append([])
+    return _any(map(_all, groups))
+
+
+@lru_cache(maxsize=4096)
+def evaluate_marker(marker: Marker, target: TargetEnvironment) -> bool | None:
+    """
+    Evaluate ``marker`` against ``target``.
+
+    Returns
+    -------
+    bool or None
+        ``True`` or ``False`` if the marker is always or never true for
+        ``target``, or ``None`` if it depends on variables ``target`` does not
+        fix. Also ``None`` if the marker cannot be inspected.
+    """
+    if (parsed := _parse_marker(marker)) is None:
+        logger.debug("Cannot inspect marker %s", marker)
+        return None
+    markers, variable = parsed
+    try:
+        return _evaluate_markers(markers, get_environment(target), variable)
+    except (AttributeError, TypeError, ValueError):
+        logger.debug("Cannot evaluate marker %s", marker)
+        return None
+
+
+def prune_requirements(
+    deps: Iterable[NormalizedRequirement], targets: Sequence[TargetEnvironment]
+) -> list[NormalizedRequirement]:
+    """Requirements from ``deps`` whose marker may be true for some of ``targets``."""
+    out: list[NormalizedRequirement] = []
+    for dep in deps:
+        if dep.marker is None or any(
+            evaluate_marker(dep.marker, target) is not False for target in targets
+        ):
+            out.append(dep)
+        else:
+            logger.info("Dropping %s, which applies to no target environment", dep)
+    return out
@@ -0,0 +1,117 @@
+"""Normalized, interned requirements."""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+from weakref import WeakValueDictionary
+
+if TYPE_CHECKING:
+    from packaging.markers import Marker
+    from packaging.requirements import Requirement
+    from packaging.specifiers import SpecifierSet
+    from packaging.utils import NormalizedName
+
+
+# Weak values, so requirements are dropped once no longer referenced.
+_INTERNED: WeakValueDictionary[str, NormalizedRequirement] = WeakValueDictionary()
+
+
+class NormalizedRequirement:
+    """
+    Immutable requirement with normalized name and extras.
+
+    Create with :meth:`from_string` or :meth:`from_requirement`. Instances are
+    interned by requirement string while referenced, so each distinct string
+    in use is parsed and normalized once, and equal requirements are usually
+    the same object. Equality and hashing use the normalized string.
+    """
+
+    __slots__ = (
+        "__weakref__",
+        "_hash",
+        "_str",
+        "extras",
+        "marker",
+        "name",
+        "specifier",
+        "url",
+    )
+
+    name: NormalizedName
+    extras: frozenset[NormalizedName]
+    specifier: SpecifierSet
+    marker: Marker | None
+    url: str | None
+    _str: str
+    _hash: int
+
+    def __init__(self, requirement: Requirement) -> None:
+        from packaging.utils import canonicalize_name
+
+        name = canonicalize_name(requirement.name)
+        extras = frozenset(canonicalize_name(e) for e in requirement.extras)
+        setattr_ = object.__setattr__
+        setattr_(self, "name", name)
+        setattr_(self, "extras", extras)
+        setattr_(self, "specifier", requirement.specifier)
+        setattr_(self, "marker", requirement.marker)
+        setattr_(self, "url", requirement.url)
+
+        # same format as ``str(Requirement)``
+        parts: list[str] = [name]
+        if extras:
+            parts.append(f"[{','.join(sorted(extras))}]")
+        if specifier := str(requirement.specifier):
+            parts.append(specifier)
+        if requirement.url:
+            parts.append(f" @ {requirement.url}")
+            if requirement.marker:
+                parts.append(" ")
+        if requirement.marker:
+            parts.append(f"; {requirement.marker}")
+        setattr_(self, "_str", "".join(parts))
+        setattr_(self, "_hash", hash(self._str))
+
+    @classmethod
+    def from_string(cls, requirement_string: str) -> NormalizedRequirement:
+        """
+        Interned requirement parsed from ``requirement_string``.
+
+        Raises ``packaging.requirements.InvalidRequirement`` if invalid.
+        """
+        if (out := _INTERNED.get(requirement_string)) is None:
+            from packaging.requirements import Requirement
+
+            out = cls.from_requirement(Requirement(requirement_string))
+            _INTERNED[requirement_string] = out
+        return out
+
+    @classmethod
+    def from_requirement(cls, requirement: Requirement) -> NormalizedRequirement:
+        """Interned normalized version of ``requirement``."""
+        out = cls(requirement)
+        return _INTERNED.setdefault(out._str, out)
+
+    def __setattr__(self, name: str, value: object) -> None:
+        msg = f"{type(self).__name__} is immutable"
+        raise AttributeError(msg)
+
+    def __delattr__(self, name: str) -> None:
+        msg = f"{type(self).__name__} is immutable"
+        raise AttributeError(msg)
+
+    def __str__(self) -> str:
+        return self._str
+
+    def __repr__(self) -> str:
+        return f"<{type(self).__name__}({self._str!r})>"
+
+    def __hash__(self) -> int:
+        return self._hash
+
+    def __eq__(self, other: object) -> bool:
+        if self is other:
+            return True
+        if not isinstance(other, NormalizedRequirement):
+            return NotImplemented
+        return self._hash == other._hash and self._str == other._str
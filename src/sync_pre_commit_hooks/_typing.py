@@ -1,13 +1,20 @@
 # pylint: disable=missing-class-docstring
 from __future__ import annotations
 
-from typing import TYPE_CHECKING, NewType, TypedDict
+from typing import TYPE_CHECKING, TypedDict
 
-if TYPE_CHECKING:
-    from packaging.requirements import Requirement
+from ._requirements import NormalizedRequirement
 
+if TYPE_CHECKING:
     from ._typing_compat import Required
 
+__all__ = [
+    "NormalizedRequirement",
+    "PreCommitConfigType",
+    "PreCommitHooksType",
+    "PreCommitRepoType",
+]
+
 
 class PreCommitHooksType(TypedDict, total=False):
     id: Required[str]
@@ -31,6 +38,3 @@ class PreCommitConfigType(
     TypedDict,
 ):
     repos: list[PreCommitRepoType]
-
-
-NormalizedRequirement = NewType("NormalizedRequirement", "Requirement")
@@ -1,25 +1,36 @@
 from __future__ import annotations
 
-from functools import lru_cache
+import os
+import re
+import sys
+from contextlib import contextmanager, nullcontext, suppress
+from functools import cached_property, lru_cache
 from pathlib import Path
-from typing import TYPE_CHECKING, cast
+from typing import TYPE_CHECKING, NamedTuple, ParamSpec, cast
 
 if TYPE_CHECKING:
     from argparse import ArgumentParser
     from collections.abc import (
         Callable,
         Container,
+        Generator,
         Iterable,
         Iterator,
         Mapping,
         Sequence,
     )
-    from logging import Logger
-    from typing import Any
+    from contextlib import AbstractContextManager
+    from logging import Logger, LogRecord
+    from typing import IO, Any, Concatenate
 
+    from packaging.utils import NormalizedName
     from ruamel.yaml import YAML
 
     from ._typing import PreCommitConfigType, PreCommitHooksType, PreCommitRepoType
+    from ._typing_compat import Self
+
+
+P = ParamSpec("P")
 
 
 def get_in(
@@ -49,6 +60,178 @@ def get_in(
         return default
 
 
+#: Set (to a non-empty value) to have hooks hold :func:`file_lock` on the
+#: files they update.
+LOCK_ENV = "SYNC_PRE_COMMIT_HOOKS_LOCK"
+
+
+def _lock_path(path: Path) -> Path:
+    path = Path(os.path.realpath(path))
+    return path.with_name(f".{path.name}.lock")
+
+
+def _acquire(f: IO[bytes]) -> None:
+    if sys.platform == "win32":  # pragma: no cover
+        import msvcrt
+
+        msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+    else:
+        import fcntl
+
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+
+
+def _is_current(f: IO[bytes], lock_path: Path) -> bool:
+    """Whether ``f`` is still the file at ``lock_path`` (not removed by a holder)."""
+    try:
+        return os.path.samestat(os.fstat(f.fileno()), lock_path.stat())
+    except FileNotFoundError:
+        return False
+
+
+@contextmanager
+def file_lock(path: Path) -> Generator[None]:
+    """
+    Advisory, exclusive, inter-process lock on ``path``.
+
+    The lock is taken on a sibling ``.<name>.lock`` file, which is removed on
+    release, so no lock files are left behind.
+    """
+    lock_path = _lock_path(path)
+    while True:
+        f = lock_path.open("a+b")
+        _acquire(f)
+        if _is_current(f, lock_path):
+            break
+        # removed by the previous holder, so lock the new file instead
+        f.close()
+
+    try:
+        yield
+    finally:
+        if sys.platform == "win32":  # pragma: no cover
+            import msvcrt
+
+            _ = f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+            f.close()
+            with suppress(OSError):
+                lock_path.unlink()
+        else:
+            # remove while still locked, then release by closing
+            lock_path.unlink(missing_ok=True)
+            f.close()
+
+
+def hook_file_lock(path: Path) -> AbstractContextManager[None]:
+    """
+    :func:`file_lock` on ``path`` if ``$SYNC_PRE_COMMIT_HOOKS_LOCK`` is set.
+
+    Otherwise, a no-op. pre-commit never passes the same file to two hook
+    processes, so locking is only needed if other tools may write concurrently.
+    """
+    if os.environ.get(LOCK_ENV):
+        return file_lock(path)
+    return nullcontext()
+
+
+def _new_file_mode() -> int:
+    umask = os.umask(0)
+    _ = os.umask(umask)
+    return 0o666 & ~umask
+
+
+def write_if_changed(
+    path: Path,
+    contents: str | bytes,
+    *,
+    encoding: str = "utf-8",
+    newline: str | None = None,
+) -> bool:
+    """
+    Atomically write ``contents`` to ``path`` unless identical to what is on disk.
+
+    The serialized bytes are compared with the current contents of ``path``.
+    If they are identical, nothing is written (so the modification time is
+    untouched). Otherwise, the bytes are written to a temporary file in the
+    same directory, which is then renamed over ``path``.
+
+    To guard a read-modify-write cycle against concurrent writers, callers
+    should hold :func:`file_lock` (or :func:`hook_file_lock`) on ``path`` from
+    reading through writing.
+
+    Parameters
+    ----------
+    path : Path
+        Target file. Symlinks are resolved so the link itself is preserved.
+    contents : str or bytes
+        Contents to write.
+    encoding : str
+        Encoding used if ``contents`` is a string.
+    newline : str, optional
+        As for :func:`open`. If ``None`` (the default), newlines in string
+        ``contents`` are translated to :data:`os.linesep`.
+
+    Returns
+    -------
+    bool
+        ``True`` if file was written.
+    """
+    import tempfile
+
+    if isinstance(contents, str):
+        if (linesep := os.linesep if newline is None else newline) not in {"", "\n"}:
+            contents = contents.replace("\n", linesep)
+        contents = contents.encode(encoding)
+
+    path = Path(os.path.realpath(path))
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        mode = _new_file_mode()
+    else:
+        if stat.st_size == len(contents) and path.read_bytes() == contents:
+            return False
+        mode = stat.st_mode & 0o7777
+
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            _ = f.write(contents)
+        tmp_path = Path(tmp)
+        tmp_path.chmod(mode)
+        _ = tmp_path.replace(path)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+    return True
+
+
+def toml_load(path: Path) -> tuple[Any, str]:
+    """
+    Round-trip (:mod:`tomlkit`) load of ``path``.
+
+    Returns the document and the newline to pass to :func:`write_if_changed`
+    to preserve the line endings of ``path`` (as done by
+    :class:`tomlkit.toml_file.TOMLFile`).
+    """
+    import tomlkit
+
+    with path.open(encoding="utf-8", newline="") as f:
+        content = f.read()
+
+    newline = ""
+    if (num_newline := content.count("\n")) > 0:
+        num_win_eol = content.count("\r\n")
+        if num_win_eol == num_newline:
+            newline = "\r\n"
+            content = content.replace("\r\n", "\n")
+        elif num_win_eol == 0:
+            newline = "\n"
+
+    return tomlkit.loads(content), newline
+
+
 _ARGUMENT_HELP_TEMPLATE = (
     "The `{}` argument to the YAML dumper. "
     "See https://yaml.readthedocs.io/en/latest/detail/"
@@ -103,6 +286,40 @@ def add_pyproject_argument(parser: ArgumentParser) -> ArgumentParser:
     return parser
 
 
+def add_lastversion_arguments(parser: ArgumentParser) -> ArgumentParser:
+    from ._versions import DEFAULT_LASTVERSION_TTL
+
+    _ = parser.add_argument(
+        "--offline",
+        action="store_true",
+        help="""
+        Only use cached `lastversion` lookups. Dependencies without a cached
+        version are skipped.
+        """,
+    )
+    _ = parser.add_argument(
+        "--lastversion-ttl",
+        type=float,
+        default=DEFAULT_LASTVERSION_TTL,
+        help=f"""
+        Seconds to cache `lastversion` lookups for. Use ``0`` to always look
+        up. (Default: {DEFAULT_LASTVERSION_TTL})
+        """,
+    )
+    _ = parser.add_argument(
+        "--index",
+        dest="version_index",
+        metavar="PATH_OR_URL",
+        default=None,
+        help="""
+        Get latest versions from a local PEP 503/691 simple index (a directory
+        or ``file://`` URL) or a directory of wheels and sdists instead of
+        `lastversion`.
+        """,
+    )
+    return parser
+
+
 def get_language_version(
     version: str | None,
     version_file: str | None,
@@ -126,45 +343,559 @@ def get_language_version(
     return version
 
 
+def _round_trip_yaml(mapping: int = 2, sequence: int = 4, offset: int = 2) -> YAML:
+    from ruamel.yaml import YAML
+
+    yaml = YAML()
+    yaml.preserve_quotes = True
+    yaml.indent(mapping, sequence, offset)
+    return yaml
+
+
 def pre_commit_config_load(
     path: Path,
     mapping: int = 2,
     sequence: int = 4,
     offset: int = 2,
 ) -> tuple[PreCommitConfigType, YAML]:
+    yaml = _round_trip_yaml(mapping, sequence, offset)
+    return cast("PreCommitConfigType", yaml.load(path)), yaml  # pyright: ignore[reportUnknownMemberType]
+
+
+def pre_commit_config_load_safe(path_or_string: Path | str) -> PreCommitConfigType:
+    """
+    Read-only load of config.
+
+    This uses the safe loader (C accelerated if available), so it is much
+    cheaper than :func:`pre_commit_config_load`, but comments, quotes, and
+    formatting are lost. Use it to inspect the config, never to dump it.
+    """
     from ruamel.yaml import YAML
 
-    yaml = YAML()
-    yaml.preserve_quotes = True
-    yaml.indent(mapping, sequence, offset)
+    return cast("PreCommitConfigType", YAML(typ="safe").load(path_or_string))  # pyright: ignore[reportUnknownMemberType]
 
-    return cast("PreCommitConfigType", yaml.load(path)), yaml  # pyright: ignore[reportUnknownMemberType]
+
+class _Splice(NamedTuple):
+    start: int
+    end: int
+    text: str
 
 
-def pre_commit_config_repo_hook_iter(
-    config: PreCommitConfigType,
-    include_hook_ids: str | Container[str] | None = None,
-    exclude_repos: str | Container[str] | None = None,
-) -> Iterator[tuple[PreCommitRepoType, PreCommitHooksType]]:
-    def _str_to_set(x: str | Container[str]) -> Container[str]:
-        if isinstance(x, str):
-            return {x}
-        return x
-
-    repo_iter: Iterable[PreCommitRepoType] = iter(config["repos"])
-    if exclude_repos:
-        repo_iter = (
-            repo for repo in repo_iter if repo["repo"] not in _str_to_set(exclude_repos)
+class _Container(NamedTuple):
+    node: Any
+    keys: list[Any]
+    values: list[Any]
+    # (line, column) of values. None if unknown or value is an alias.
+    positions: list[tuple[int, int] | None]
+
+
+_PROPERTY_REGEX = re.compile(r"[&!]\S*\s+")
+_PLAIN_BLOCK_REGEX = re.compile(r"[^#\n]*?(?=\s+#|\s*$)")
+_PLAIN_FLOW_REGEX = re.compile(r"[^#,\[\]{}\n]*?(?=\s+#|\s*[,\]}]|\s*$)")
+_SEQUENCE_PREFIX_REGEX = re.compile(r"[ ]*-[ ]+")
+
+
+class _SpanEditor:
+    """
+    Splice changed scalars into the original text of a round-trip loaded config.
+
+    On creation, the containers of ``config`` are snapshotted. After the config
+    has been modified in place, :meth:`edit` compares it against the snapshot
+    and uses the line/column marks recorded by ruamel at load time to replace
+    only the changed scalars (or single line block sequences of scalars) in
+    ``text``. If anything else changed (keys added/removed, containers
+    replaced, scalars that can't be located), :meth:`edit` returns ``None``
+    and the caller should fall back to a full dump.
+    """
+
+    def __init__(self, text: str, config: Any) -> None:
+        from ruamel.yaml import YAML
+
+        self.text = text
+        self._lines = text.splitlines(keepends=True)
+        self._offsets = [0]
+        for line in self._lines:
+            self._offsets.append(self._offsets[-1] + len(line))
+        self._yaml_safe = YAML(typ="safe")
+
+        self._snapshot: list[_Container] = []
+        stack: list[tuple[Any, tuple[int, int]]] = [(config, (0, 0))]
+        while stack:
+            node, start = stack.pop()
+            if isinstance(node, (dict, list)):
+                container = self._get_container(node, start)
+                self._snapshot.append(container)
+                stack.extend(
+                    (value, position)
+                    for value, position in zip(
+                        container.values, container.positions, strict=True
+                    )
+                    if position is not None
+                )
+
+    @staticmethod
+    def _get_container(node: Any, start: tuple[int, int]) -> _Container:
+        keys: list[Any]
+        positions: list[tuple[int, int] | None] = []
+        data = node.lc.data
+        if isinstance(node, dict):
+            keys = list(node)  # pyright: ignore[reportUnknownArgumentType]
+            for key in keys:
+                mark = data.get(key)
+                # Alias values point back at the anchor, which is before the key.
+                positions.append(
+                    None
+                    if mark is None
+                    or len(mark) < 4  # ruff:ignore[magic-value-comparison]
+                    or (mark[2], mark[3]) < (mark[0], mark[1])
+                    else (mark[2], mark[3])
+                )
+        else:
+            keys = list(range(len(node)))  # pyright: ignore[reportUnknownArgumentType]
+            previous = start
+            for key in keys:
+                mark = data.get(key)
+                # Alias items point back at the anchor, which is before previous item.
+                if mark is None or (mark[0], mark[1]) <= previous:
+                    positions.append(None)
+                else:
+                    previous = (mark[0], mark[1])
+                    positions.append(previous)
+        return _Container(node, keys, [node[k] for k in keys], positions)
+
+    @staticmethod
+    def _is_container(x: Any) -> bool:
+        return isinstance(x, (dict, list))
+
+    @staticmethod
+    def _changed(old: Any, new: Any) -> bool:
+        return new is not old and (new != old or type(new) is not type(old))
+
+    def _load_scalar(self, token: str) -> Any:
+        # NOTE: C loader requires exact ``str`` (not ScalarString)
+        return self._yaml_safe.load(str(token))  # pyright: ignore[reportUnknownMemberType]
+
+    def _find_token(
+        self, line_number: int, column: int, flow: bool
+    ) -> tuple[int, int, str] | None:
+        """Find (start, end, style) of scalar token starting at ``line_number, column``."""
+        if line_number >= len(self._lines):
+            return None
+        line = self._lines[line_number]
+
+        # skip anchor and tag
+        while match := _PROPERTY_REGEX.match(line, column):
+            column = match.end()
+
+        if column >= len(line) or line[column] in "*|>":
+            # alias or block scalar
+            return None
+
+        style = line[column]
+        if style in {"'", '"'}:
+            end = column + 1
+            while (end := line.find(style, end)) >= 0:
+                if style == "'" and line.startswith("''", end):
+                    end += 2
+                elif style == '"' and line[end - 1] == "\\":
+                    end += 1
+                else:
+                    return column, end + 1, style
+            return None
+
+        regex = _PLAIN_FLOW_REGEX if flow else _PLAIN_BLOCK_REGEX
+        if (match := regex.match(line, column)) is None or match.end() == column:
+            return None
+        return column, match.end(), ""
+
+    def _check_token(
+        self, line_number: int, token: tuple[int, int, str], value: Any
+    ) -> bool:
+        """Check that ``token`` loads to ``value``"""
+        try:
+            return bool(
+                self._load_scalar(self._lines[line_number][token[0] : token[1]])
+                == value
+            )
+        except Exception:  # ruff:ignore[blind-except]  # pylint: disable=broad-exception-caught
+            return False
+
+    @staticmethod
+    def _quote(value: str, style: str, flow: bool) -> str | None:
+        if style == "'":
+            return "'" + value.replace("'", "''") + "'"
+        if style == '"':
+            return None if '"' in value or "\\" in value else f'"{value}"'
+        if flow and any(c in value for c in ",[]{}"):
+            return None
+        return str(value)
+
+    def _format_scalar(self, value: Any, style: str, flow: bool) -> str | None:
+        """Format ``value`` preferring quoting ``style``."""
+        from ruamel.yaml.scalarstring import (
+            DoubleQuotedScalarString,
+            PlainScalarString,
+            SingleQuotedScalarString,
         )
 
-    repo_hook_iter = ((repo, hook) for repo in repo_iter for hook in repo["hooks"])
-    if include_hook_ids:
+        if not isinstance(value, str) or "\n" in value:
+            return None
+
+        if isinstance(value, DoubleQuotedScalarString):
+            style = '"'
+        elif isinstance(value, SingleQuotedScalarString):
+            style = "'"
+        elif isinstance(value, PlainScalarString):
+            style = ""
+
+        for s in dict.fromkeys((style, "'", '"')):
+            if (token := self._quote(value, s, flow)) is None:
+                continue
+            try:
+                if self._load_scalar(token) == value:
+                    return token
+            except Exception:  # ruff:ignore[blind-except, try-except-continue]  # pylint: disable=broad-exception-caught
+                continue
+        return None
+
+    def _scalar_splice(
+        self,
+        position: tuple[int, int] | None,
+        old: Any,
+        new: Any,
+        flow: bool,
+    ) -> _Splice | None:
+        if (
+            position is None
+            or (token := self._find_token(*position, flow=flow)) is None
+            or not self._check_token(position[0], token, old)
+            or (text := self._format_scalar(new, token[2], flow)) is None
+        ):
+            return None
+
+        offset = self._offsets[position[0]]
+        return _Splice(offset + token[0], offset + token[1], text)
+
+    def _is_simple_item(
+        self,
+        position: tuple[int, int] | None,
+        line_number: int,
+        prefix: str,
+        value: Any,
+    ) -> bool:
+        """Whether item is a lone, single line scalar on ``line_number`` after ``prefix``"""
+        if position is None or position != (line_number, len(prefix)):
+            return False
+        line = self._lines[line_number]
         return (
-            (repo, hook)
-            for repo, hook in repo_hook_iter
-            if hook["id"] in _str_to_set(include_hook_ids)
+            line.startswith(prefix)
+            and (token := self._find_token(*position, flow=False)) is not None
+            and token[0] == position[1]
+            and not line[token[1] :].strip()
+            and self._check_token(line_number, token, value)
+        )
+
+    def _sequence_splice(self, container: _Container) -> _Splice | None:
+        """Replace all lines of a block sequence of single line scalars."""
+        node, _, old, positions = container
+        if not old or not node or node.fa.flow_style() or positions[0] is None:
+            return None
+        if any(map(self._is_container, old)) or any(map(self._is_container, node)):
+            return None
+
+        first_line, first_column = positions[0]
+        prefix = self._lines[first_line][:first_column]
+        if _SEQUENCE_PREFIX_REGEX.fullmatch(prefix) is None or not all(
+            self._is_simple_item(position, first_line + i, prefix, value)
+            for i, (position, value) in enumerate(zip(positions, old, strict=True))
+        ):
+            return None
+
+        items: list[str] = []
+        for value in node:
+            if (text := self._format_scalar(value, "", flow=False)) is None:
+                return None
+            items.append(f"{prefix}{text}\n")
+
+        return _Splice(
+            self._offsets[first_line],
+            self._offsets[first_line + len(old)],
+            "".join(items),
+        )
+
+    def edit(self) -> str | None:
+        """Text with changes spliced in, or ``None`` if a full dump is needed."""
+        splices: list[_Splice] = []
+        for container in self._snapshot:
+            node, keys, values, positions = container
+            if isinstance(node, list) and len(node) != len(values):  # pyright: ignore[reportUnknownArgumentType]
+                if (splice := self._sequence_splice(container)) is None:
+                    return None
+                splices.append(splice)
+                continue
+
+            if isinstance(node, dict) and list(node) != keys:  # pyright: ignore[reportUnknownArgumentType]
+                return None
+
+            flow = bool(node.fa.flow_style())
+            for key, old, position in zip(keys, values, positions, strict=True):
+                new = node[key]
+                if not self._changed(old, new):
+                    continue
+                if (
+                    self._is_container(old)
+                    or self._is_container(new)
+                    or (splice := self._scalar_splice(position, old, new, flow)) is None
+                ):
+                    return None
+                splices.append(splice)
+
+        text = self.text
+        for splice in sorted(splices, reverse=True):
+            text = text[: splice.start] + splice.text + text[splice.end :]
+        return text
+
+
+class HookIndex:
+    """
+    Index of the hooks in a loaded config.
+
+    Built once per loaded config, so that lookups by hook id or by
+    ``additional_dependencies`` package name don't rescan every repo and hook.
+    The index holds references into ``config``, so it must be rebuilt if
+    hooks or ``additional_dependencies`` are added or removed.
+
+    Parameters
+    ----------
+    config : dict
+        Loaded config.
+    exclude_repos : container of str
+        Repos to skip when iterating with ``exclude=True``. Default is to
+        exclude ``local`` and ``meta`` repos.
+    """
+
+    def __init__(
+        self,
+        config: PreCommitConfigType,
+        exclude_repos: Container[str] = frozenset({"local", "meta"}),
+    ) -> None:
+        self.config = config
+        self.repo_hooks: list[tuple[PreCommitRepoType, PreCommitHooksType]] = []
+        self._excluded: list[bool] = []
+        self._by_id: dict[str, list[int]] = {}
+
+        for repo in config["repos"]:
+            excluded = repo["repo"] in exclude_repos
+            for hook in repo["hooks"]:
+                self._by_id.setdefault(hook["id"], []).append(len(self.repo_hooks))
+                self.repo_hooks.append((repo, hook))
+                self._excluded.append(excluded)
+
+    @property
+    def hook_ids(self) -> list[str]:
+        """Hook ids in config order."""
+        return [hook["id"] for _, hook in self.repo_hooks]
+
+    def iter_hooks(
+        self,
+        hook_ids: str | Iterable[str] | None = None,
+        exclude: bool = False,
+    ) -> Iterator[tuple[PreCommitRepoType, PreCommitHooksType]]:
+        """
+        Iterate over (repo, hook) pairs in config order.
+
+        Parameters
+        ----------
+        hook_ids : str or iterable of str, optional
+            Only include these hook ids. Default is to include all hooks.
+        exclude : bool
+            If ``True``, skip hooks from ``exclude_repos``.
+
+        Yields
+        ------
+        repo : dict
+        hook : dict
+        """
+        indices: Iterable[int]
+        if hook_ids is None:
+            indices = range(len(self.repo_hooks))
+        else:
+            if isinstance(hook_ids, str):
+                hook_ids = [hook_ids]
+            indices = sorted({
+                i for hook_id in hook_ids for i in self._by_id.get(hook_id, ())
+            })
+
+        for i in indices:
+            if not (exclude and self._excluded[i]):
+                yield self.repo_hooks[i]
+
+    @cached_property
+    def dependencies(
+        self,
+    ) -> dict[NormalizedName, list[tuple[PreCommitHooksType, int]]]:
+        """
+        Mapping from package name to (hook, index) in ``additional_dependencies``.
+
+        The package name is the canonicalized part of the dependency before any
+        ``==``.
+        """
+        from packaging.utils import canonicalize_name
+
+        out: dict[NormalizedName, list[tuple[PreCommitHooksType, int]]] = {}
+        for _, hook in self.repo_hooks:
+            for i, dep in enumerate(hook.get("additional_dependencies", ())):
+                name = canonicalize_name(str(dep).partition("==")[0])
+                out.setdefault(name, []).append((hook, i))
+        return out
+
+
+class PreCommitConfigDocument:
+    """
+    Loaded ``.pre-commit-config.yaml`` shared between several transforms.
+
+    A transform is a callable taking a :class:`HookIndex` of the loaded config
+    (and any extra arguments) and returning ``True`` if it modified the config. The file is
+    only dumped once, by :meth:`dump`, and only if some transform changed it.
+
+    If ``fast_check`` is ``True`` (the default), transforms are first run
+    against a read-only (safe loaded) copy of the config. The expensive
+    round-trip load is only done once a transform reports a change.
+
+    Parameters
+    ----------
+    path : Path
+        Path to config file.
+    mapping, sequence, offset : int
+        Indentation passed to the round-trip YAML dumper.
+    fast_check : bool
+        Check for changes using a read-only load first.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        mapping: int = 2,
+        sequence: int = 4,
+        offset: int = 2,
+        fast_check: bool = True,
+    ) -> None:
+        self.path = path
+        self.indent = (mapping, sequence, offset)
+        self.updated = False
+
+        self._text = path.read_text(encoding="utf-8")
+        self._round_trip: tuple[PreCommitConfigType, YAML] | None = None
+        self._editor: _SpanEditor | None = None
+        self._index: HookIndex | None = None
+        self._read_only: PreCommitConfigType | None = (
+            pre_commit_config_load_safe(self._text) if fast_check else None
         )
-    return repo_hook_iter
+        if not fast_check:
+            _ = self._load_round_trip()
+
+    @classmethod
+    def from_path(
+        cls,
+        path: Path,
+        mapping: int = 2,
+        sequence: int = 4,
+        offset: int = 2,
+        fast_check: bool = True,
+    ) -> Self:
+        """Load document from ``path``."""
+        return cls(
+            path=path,
+            mapping=mapping,
+            sequence=sequence,
+            offset=offset,
+            fast_check=fast_check,
+        )
+
+    def _load_round_trip(self) -> tuple[PreCommitConfigType, YAML]:
+        if self._round_trip is None:
+            yaml = _round_trip_yaml(*self.indent)
+            config = cast("PreCommitConfigType", yaml.load(self._text))  # pyright: ignore[reportUnknownMemberType]
+            self._round_trip = (config, yaml)
+            self._editor = _SpanEditor(self._text, config)
+            self._read_only = None
+        return self._round_trip
+
+    @property
+    def config(self) -> PreCommitConfigType:
+        """Round-trip loaded config."""
+        return self._load_round_trip()[0]
+
+    @property
+    def yaml(self) -> YAML:
+        """Round-trip loader/dumper."""
+        return self._load_round_trip()[1]
+
+    def _get_index(self, config: PreCommitConfigType) -> HookIndex:
+        if self._index is None or self._index.config is not config:
+            self._index = HookIndex(config)
+        return self._index
+
+    @property
+    def index(self) -> HookIndex:
+        """Index of round-trip loaded config."""
+        return self._get_index(self.config)
+
+    def apply(
+        self,
+        transform: Callable[Concatenate[HookIndex, P], bool],
+        *args: P.args,
+        **kwargs: P.kwargs,
+    ) -> bool:
+        """Apply ``transform(index, *args, **kwargs)`` and record any change."""
+        if self._read_only is not None:
+            from ._logging import capture_logging, replay_logging
+
+            # Dry run on read-only copy. Messages are held back, and only
+            # emitted if there is no real run below to emit them again.
+            updated = False
+            records: list[LogRecord] = []
+            try:
+                with capture_logging() as records:
+                    updated = transform(
+                        self._get_index(self._read_only), *args, **kwargs
+                    )
+            finally:
+                if not updated:
+                    replay_logging(records)
+            if not updated:
+                return False
+
+        updated = transform(self.index, *args, **kwargs)
+        if updated:
+            # transform may have changed hooks/dependencies
+            self._index = None
+        self.updated = self.updated or updated
+        return updated
+
+    def dump(self, logger: Logger | None = None) -> int:
+        """
+        Write config to :attr:`path` if updated. Returns 1 if written, else 0.
+
+        If only scalar values (or simple block sequences of scalars) changed,
+        these are spliced into the original text, leaving everything else
+        untouched. Otherwise, the whole config is dumped. The file is written
+        with :func:`write_if_changed`.
+        """
+        if not self.updated:
+            return 0
+
+        if logger is not None:
+            logger.info("Updating %s", self.path)
+
+        config, yaml = self._load_round_trip()
+        if self._editor is None or (text := self._editor.edit()) is None:
+            from io import StringIO
+
+            stream = StringIO()
+            yaml.dump(config, stream)  # pyright: ignore[reportUnknownMemberType]
+            text = stream.getvalue()
+        return int(write_if_changed(self.path, text))
 
 
 @lru_cache
@@ -174,23 +905,17 @@ def get_version_from_lastversion(dep: str) -> str:
     return cast("str", latest(dep, output_format="tag"))
 
 
-@lru_cache
 def get_versions_from_requirements(
     requirements_string_or_path: str | Path | None,
 ) -> dict[str, str]:
     if requirements_string_or_path is None:
         return {}
 
-    requirements_string = (
-        requirements_string_or_path.read_text(encoding="utf-8")
-        if isinstance(requirements_string_or_path, Path)
-        else requirements_string_or_path
-    )
+    if isinstance(requirements_string_or_path, Path):
+        from ._versions import get_versions_from_requirements_file
+
+        return get_versions_from_requirements_file(requirements_string_or_path)
 
-    from requirements import parse
+    from ._versions import iter_pinned_versions
 
-    versions: dict[str, str] = {}
-    for requirement in parse(requirements_string):
-        name = cast("str", requirement.name)
-        versions[name] = requirement.specs[0][-1]
-    return versions
+    return dict(iter_pinned_versions(requirements_string_or_path.splitlines()))
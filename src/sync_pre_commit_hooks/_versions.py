@@ -0,0 +1,640 @@
+"""
+Sources of package versions.
+
+Every source implements :class:`VersionSource`. A :class:`VersionRegistry`
+merges several sources with explicit precedence, querying them lazily for just
+the names looked up.
+"""
+
+from __future__ import annotations
+
+import json
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import cached_property, partial
+from html.parser import HTMLParser
+from pathlib import Path
+from typing import TYPE_CHECKING, Protocol, cast
+from urllib.parse import unquote, urlsplit
+from urllib.request import url2pathname
+
+from ._cache import ParsedFileCache
+from ._logging import get_logger
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterable, Iterator, Mapping
+
+    from packaging.utils import NormalizedName
+    from packaging.version import Version
+
+
+logger = get_logger("versions")
+
+DEFAULT_LASTVERSION_TTL = 24 * 60 * 60
+DEFAULT_LASTVERSION_JOBS = 8
+
+
+class VersionSource(Protocol):
+    """Source of package versions."""
+
+    def get_many(self, names: Iterable[str]) -> dict[str, str]:
+        """Mapping from each of ``names`` known to source to its version."""
+        ...
+
+
+class VersionRegistry:
+    """
+    Merged mapping from normalized name to version, built lazily.
+
+    Each name is resolved on first lookup from the first source (in order of
+    ``sources``) that knows it. Sources are only queried for names not
+    resolved by a higher precedence source, so lower precedence sources are
+    not loaded at all if not needed.
+
+    Parameters
+    ----------
+    sources : iterable of VersionSource
+        Sources in decreasing order of precedence.
+    """
+
+    def __init__(self, sources: Iterable[VersionSource]) -> None:
+        self.sources = list(sources)
+        self._versions: dict[NormalizedName, str | None] = {}
+
+    def get_many(self, names: Iterable[str]) -> dict[NormalizedName, str]:
+        """Mapping from each of ``names`` (normalized) with a version to version."""
+        from packaging.utils import canonicalize_name
+
+        requested = list(dict.fromkeys(map(canonicalize_name, names)))
+        missing = [name for name in requested if name not in self._versions]
+        for source in self.sources:
+            if not missing:
+                break
+            found = {
+                canonicalize_name(name): version
+                for name, version in source.get_many(missing).items()
+            }
+            self._versions.update(found)
+            missing = [name for name in missing if name not in found]
+        self._versions.update(dict.fromkeys(missing))
+
+        return {
+            name: version
+            for name in requested
+            if (version := self._versions[name]) is not None
+        }
+
+    def get(self, name: str) -> str | None:
+        """Version of ``name``, or ``None`` if no source knows it."""
+        return next(iter(self.get_many([name]).values()), None)
+
+    def to_dict(self) -> dict[NormalizedName, str]:
+        """Eagerly merge all sources (which must be :class:`MappingSource`)."""
+        out: dict[NormalizedName, str] = {}
+        for source in reversed(self.sources):
+            if not isinstance(source, MappingSource):
+                msg = f"Cannot list versions of {source!r}"
+                raise TypeError(msg)
+            out.update(source.versions)
+        return out
+
+
+class MappingSource:
+    """
+    Versions from a mapping, loaded on first lookup.
+
+    Parameters
+    ----------
+    load : callable
+        Returns mapping from name to version.
+    label : str
+        Description of source (for logging).
+    """
+
+    def __init__(self, load: Callable[[], Mapping[str, str]], label: str) -> None:
+        self._load = load
+        self.label = label
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.label!r})"
+
+    @cached_property
+    def versions(self) -> dict[NormalizedName, str]:
+        """Mapping from normalized name to version."""
+        from packaging.utils import canonicalize_name
+
+        logger.debug("Loading versions from %s", self.label)
+        return {canonicalize_name(k): v for k, v in self._load().items()}
+
+    def get_many(self, names: Iterable[str]) -> dict[str, str]:
+        """Mapping from each of ``names`` in source to version."""
+        from packaging.utils import canonicalize_name
+
+        return {
+            name: version
+            for name in names
+            if (version := self.versions.get(canonicalize_name(name))) is not None
+        }
+
+    @classmethod
+    def from_requirements(cls, path: Path) -> MappingSource:
+        """Pinned versions in requirements file."""
+        from ._utils import get_versions_from_requirements
+
+        return cls(partial(get_versions_from_requirements, path), str(path))
+
+    @classmethod
+    def from_lock(cls, path: Path) -> MappingSource:
+        """Locked versions in ``uv.lock`` or ``script.py.lock`` file."""
+        return cls(partial(get_versions_from_lock, path), str(path))
+
+    @classmethod
+    def from_file(cls, path: Path) -> MappingSource:
+        """Lock file (if suffix is ``.lock``) or requirements file ``path``."""
+        if path.suffix == ".lock":
+            return cls.from_lock(path)
+        return cls.from_requirements(path)
+
+    @classmethod
+    def from_env(cls, path: Path) -> MappingSource:
+        """Installed versions in environment (or ``site-packages``) ``path``."""
+        return cls(partial(get_versions_from_env, path), str(path))
+
+
+def get_file_sources(
+    requirements: Path | Iterable[Path] | None = None,
+    locks: Path | Iterable[Path] | None = None,
+    envs: Path | Iterable[Path] | None = None,
+) -> list[MappingSource]:
+    """
+    Sources from files and environments in decreasing order of precedence.
+
+    Lock files take precedence over requirements files, which take precedence
+    over installed environments. Later paths of each kind take precedence over
+    earlier ones.
+    """
+
+    def _to_list(paths: Path | Iterable[Path] | None) -> list[Path]:
+        if paths is None:
+            return []
+        return [paths] if isinstance(paths, Path) else list(paths)
+
+    return [
+        *map(MappingSource.from_lock, reversed(_to_list(locks))),
+        *map(MappingSource.from_requirements, reversed(_to_list(requirements))),
+        *map(MappingSource.from_env, reversed(_to_list(envs))),
+    ]
+
+
+class RestrictedSource:
+    """
+    Only query ``source`` for ``names``.
+
+    Used for sources such as :class:`LastVersionLookup` that should only be
+    asked about explicitly requested packages. ``names`` are passed to
+    ``source`` as given (for example, with original capitalization).
+    """
+
+    def __init__(self, source: VersionSource, names: Iterable[str]) -> None:
+        from packaging.utils import canonicalize_name
+
+        self.source = source
+        self.names = {canonicalize_name(name): name for name in names}
+
+    def get_many(self, names: Iterable[str]) -> dict[str, str]:
+        """Mapping from each of ``names`` allowed and in source to version."""
+        from packaging.utils import canonicalize_name
+
+        original = {
+            self.names[normalized]: name
+            for name in names
+            if (normalized := canonicalize_name(name)) in self.names
+        }
+        if not original:
+            return {}
+        return {
+            original[name]: version
+            for name, version in self.source.get_many(original).items()
+        }
+
+
+def _lastversion_backend(name: str) -> str:
+    from ._utils import get_version_from_lastversion
+
+    return get_version_from_lastversion(name)
+
+
+class LastVersionLookup:
+    """
+    Latest versions of packages, looked up with ``lastversion``.
+
+    Lookups are cached on disk (in ``get_cache_dir() / "lastversion.json"``)
+    for ``ttl`` seconds, so they are shared between invocations and hooks.
+    Uncached names are looked up concurrently.
+
+    Parameters
+    ----------
+    backend : callable, optional
+        ``backend(name)`` returns the latest version of ``name``. Defaults to
+        :func:`lastversion.latest`.
+    ttl : float
+        Seconds cached lookups are valid for.
+    offline : bool
+        If ``True``, only serve cached lookups (regardless of age). Names
+        without a cached version are skipped with a warning.
+    cache_path : Path, optional
+        Cache file. Defaults to ``get_cache_dir() / "lastversion.json"``.
+    jobs : int
+        Maximum number of concurrent lookups.
+    """
+
+    def __init__(
+        self,
+        backend: Callable[[str], str] | None = None,
+        *,
+        ttl: float = DEFAULT_LASTVERSION_TTL,
+        offline: bool = False,
+        cache_path: Path | None = None,
+        jobs: int = DEFAULT_LASTVERSION_JOBS,
+    ) -> None:
+        from ._cache import JsonLRUCache, get_cache_dir
+
+        self.backend = backend or _lastversion_backend
+        self.ttl = ttl
+        self.offline = offline
+        self.jobs = jobs
+        self._cache = JsonLRUCache(cache_path or get_cache_dir() / "lastversion.json")
+        self._versions: dict[str, str] = {}
+
+    def _get_cached(self, name: str, now: float) -> str | None:
+        if (entry := self._cache.get(name)) is None:
+            return None
+        fetched, version = entry
+        if self.offline or now - fetched < self.ttl:
+            return str(version)
+        return None
+
+    def get_many(self, names: Iterable[str]) -> dict[str, str]:
+        """Mapping from each of ``names`` to latest version."""
+        names = list(dict.fromkeys(names))
+        now = time.time()
+
+        missing: list[str] = []
+        for name in names:
+            if name in self._versions:
+                continue
+            if (version := self._get_cached(name, now)) is not None:
+                self._versions[name] = version
+            elif self.offline:
+                logger.warning("No cached version of %s (offline)", name)
+            else:
+                missing.append(name)
+
+        if missing:
+            try:
+                with ThreadPoolExecutor(
+                    max_workers=max(min(self.jobs, len(missing)), 1)
+                ) as executor:
+                    for name, version in zip(
+                        missing, executor.map(self.backend, missing), strict=True
+                    ):
+                        self._versions[name] = version
+                        self._cache.set(name, [now, version])
+            finally:
+                # Never hide a backend error, or fail a lookup, over the cache.
+                _ = self._cache.try_save()
+
+        return {name: self._versions[name] for name in names if name in self._versions}
+
+    def get(self, name: str) -> str | None:
+        """Latest version of ``name`` (``None`` if offline and not cached)."""
+        return self.get_many([name]).get(name)
+
+
+# Pinned requirement as written by ``uv export``/``pip-compile``: name, optional
+# extras, ``==`` (or ``===``) version, optional marker, inline hashes,
+# continuation, and comment.
+_PINNED_RE = re.compile(
+    r"""
+    (?P<name>[A-Za-z0-9](?:[A-Za-z0-9._-]*[A-Za-z0-9])?)
+    \s*(?:\[[^\]]*\])?
+    \s*===?\s*
+    (?P<version>[^\s;,\\\#]+)
+    (?:\s*;[^\\\#]*)?
+    (?:\s+--hash=\S+)*
+    \s*\\?
+    (?:\s+\#.*)?
+    """,
+    flags=re.VERBOSE,
+)
+
+
+def _parse_requirement_line(line: str) -> tuple[str, str] | None:
+    """Fallback to ``requirements-parser`` for line not handled by fast path."""
+    from requirements import parse
+
+    out = None
+    for requirement in parse(line):
+        name = cast("str | None", requirement.name)
+        if not (name and requirement.specs):
+            logger.debug("Skipping unpinned requirement %r", line)
+            continue
+        out = (name, requirement.specs[0][-1])
+    return out
+
+
+def iter_pinned_versions(
+    lines: Iterable[str] | Iterable[bytes],
+) -> Iterator[tuple[str, str]]:
+    """
+    Stream ``(name, version)`` of pinned requirements in requirements file lines.
+
+    Comment, blank, and ``--hash=`` continuation lines are skipped, and
+    ``name==version`` pins are matched with a single regular expression. Only
+    lines not recognized (options, urls, other specifiers) are passed to the
+    full ``requirements-parser`` grammar. Like that parser, the version is the
+    first specifier's version, and requirements without a version are skipped.
+
+    Parameters
+    ----------
+    lines : iterable of str or bytes
+        Lines of file, for example an open file, or
+        ``iter(mmap.readline, b"")``. Bytes are decoded as UTF-8.
+
+    Yields
+    ------
+    tuple of str
+        Name (as written, without extras) and version.
+    """
+    fullmatch = _PINNED_RE.fullmatch
+    for line in lines:
+        text = (line.decode("utf-8") if isinstance(line, bytes) else line).strip()
+        if not text or text.startswith(("#", "--hash=")):
+            continue
+        if match := fullmatch(text):
+            yield match["name"], match["version"]
+        elif (parsed := _parse_requirement_line(text)) is not None:
+            yield parsed
+
+
+# Versions from files including other requirements files are not cached.
+_INCLUDE_RE = re.compile(rb"^[ \t]*(?:-r|--requirement)", flags=re.MULTILINE)
+
+
+def _parse_requirements(contents: bytes) -> dict[str, str]:
+    return dict(iter_pinned_versions(contents.decode("utf-8").splitlines()))
+
+
+_requirements_cache = ParsedFileCache(
+    "requirements-versions",
+    _parse_requirements,
+    cacheable=lambda contents: _INCLUDE_RE.search(contents) is None,
+)
+
+
+def get_versions_from_requirements_file(path: Path) -> dict[str, str]:
+    """
+    Pinned versions in requirements file.
+
+    Results are cached with :class:`~._cache.ParsedFileCache`, unless the file
+    includes other requirements files.
+    """
+    return _requirements_cache.get(path)
+
+
+_DIST_INFO = ".dist-info"
+
+
+def _get_site_packages(path: Path) -> list[Path]:
+    if not path.is_dir():
+        msg = f"Environment {path} is not a directory"
+        raise NotADirectoryError(msg)
+    if any(path.glob(f"*{_DIST_INFO}")):
+        return [path]
+    # venv/conda layouts on posix and windows.  lib64 is usually a symlink to lib.
+    site_packages = {
+        p.resolve()
+        for pattern in (
+            "lib/python*/site-packages",
+            "lib/site-packages",
+            "Lib/site-packages",
+        )
+        for p in path.glob(pattern)
+    }
+    if not site_packages:
+        msg = f"No site-packages found in {path}"
+        raise FileNotFoundError(msg)
+    return sorted(site_packages)
+
+
+def _get_dist_info_name_version(path: Path) -> tuple[str, str] | None:
+    """Name and version from ``dist-info`` directory name or ``METADATA``."""
+    name, sep, version = path.name[: -len(_DIST_INFO)].rpartition("-")
+    if sep and name and version:
+        return name, version
+
+    if not (metadata := path / "METADATA").is_file():
+        return None
+    headers: dict[str, str] = {}
+    with metadata.open(encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                break
+            key, _, value = line.partition(":")
+            headers[key] = value.strip()
+    if "Name" in headers and "Version" in headers:
+        return headers["Name"], headers["Version"]
+    return None
+
+
+def get_versions_from_env(path: Path) -> dict[str, str]:
+    """
+    Installed versions in a python environment, without running python or uv.
+
+    Parameters
+    ----------
+    path : Path
+        Environment (for example, ``.venv``) or ``site-packages`` directory.
+        Versions are read from ``{name}-{version}.dist-info`` directory
+        names, falling back to the ``METADATA`` file for nonstandard names.
+    """
+    import os
+
+    versions: dict[str, str] = {}
+    for site_packages in _get_site_packages(path):
+        with os.scandir(site_packages) as entries:
+            for entry in entries:
+                if not entry.name.endswith(_DIST_INFO):
+                    continue
+                if (parsed := _get_dist_info_name_version(Path(entry.path))) is None:
+                    logger.warning("Skipping %s without metadata", entry.path)
+                    continue
+                versions[parsed[0]] = parsed[1]
+    return versions
+
+
+# Sources of local packages, which are not pinned to a release.
+_LOCAL_LOCK_SOURCES = frozenset({"editable", "virtual", "directory", "path"})
+
+
+def _parse_lock(contents: bytes) -> dict[str, str]:
+    from packaging.version import InvalidVersion, Version
+
+    from ._compat import tomllib
+
+    data = tomllib.loads(contents.decode("utf-8"))
+
+    versions: dict[str, tuple[Version, str]] = {}
+    for package in data.get("package", []):
+        if "version" not in package or _LOCAL_LOCK_SOURCES.intersection(
+            package.get("source", {})
+        ):
+            continue
+        try:
+            version = Version(package["version"])
+        except InvalidVersion:
+            logger.warning("Skipping %s with invalid version", package["name"])
+            continue
+        if (name := package["name"]) not in versions or version > versions[name][0]:
+            versions[name] = (version, package["version"])
+    return {name: version_str for name, (_, version_str) in versions.items()}
+
+
+_lock_cache = ParsedFileCache("lock-versions", _parse_lock)
+
+
+def get_versions_from_lock(path: Path) -> dict[str, str]:
+    """
+    Resolved versions from a ``uv.lock`` or PEP 723 script ``*.py.lock`` file.
+
+    The lock is read directly (no ``uv export``). Local (editable, virtual,
+    directory, or path) packages are skipped. If a package is locked at
+    several versions (for different markers), the highest version is used.
+    Results are cached with :class:`~._cache.ParsedFileCache`.
+    """
+    return _lock_cache.get(path)
+
+
+class _LinkParser(HTMLParser):
+    """Collect ``href`` of anchors (PEP 503 project page)."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.hrefs: list[str] = []
+
+    def handle_starttag(self, tag: str, attrs: list[tuple[str, str | None]]) -> None:
+        if tag == "a" and (href := dict(attrs).get("href")):
+            self.hrefs.append(href)
+
+
+def _filename_from_href(href: str) -> str:
+    return unquote(urlsplit(href).path.rsplit("/", 1)[-1])
+
+
+def _parse_filename(filename: str) -> tuple[NormalizedName, Version] | None:
+    from packaging.utils import (
+        InvalidSdistFilename,
+        InvalidWheelFilename,
+        parse_sdist_filename,
+        parse_wheel_filename,
+    )
+
+    try:
+        if filename.endswith(".whl"):
+            return parse_wheel_filename(filename)[:2]
+        if filename.endswith((".tar.gz", ".zip")):
+            return parse_sdist_filename(filename)
+    except (InvalidSdistFilename, InvalidWheelFilename):
+        pass
+    return None
+
+
+def _iter_project_filenames(project: Path) -> Iterator[str]:
+    """
+    Distribution filenames of a simple index project directory.
+
+    Yields
+    ------
+    str
+        Filenames from PEP 691 ``index.json`` (skipping yanked files), PEP 503
+        ``index.html``, or else files in ``project``.
+    """
+    if (path := project / "index.json").is_file():
+        data = json.loads(path.read_text(encoding="utf-8"))
+        for file in data.get("files", []):
+            if not file.get("yanked"):
+                yield file["filename"]
+    elif (path := project / "index.html").is_file():
+        parser = _LinkParser()
+        parser.feed(path.read_text(encoding="utf-8"))
+        yield from map(_filename_from_href, parser.hrefs)
+    else:
+        yield from (p.name for p in project.iterdir() if p.is_file())
+
+
+class LocalIndex:
+    """
+    Latest versions of packages from a local index.
+
+    The index is read once (on first lookup) into a mapping from normalized
+    name to newest final release. Pre-releases are only used if a project has
+    no final releases.
+
+    Parameters
+    ----------
+    location : str or Path
+        One of:
+
+        - A flat directory of wheels and sdists.
+        - A PEP 503/691 "simple" index directory. Each project directory holds
+          an ``index.json`` (PEP 691), an ``index.html`` (PEP 503), or the
+          distribution files themselves.
+        - A ``file://`` URL to either of the above.
+    """
+
+    def __init__(self, location: str | Path) -> None:
+        if isinstance(location, str) and location.startswith("file:"):
+            location = url2pathname(urlsplit(location).path)
+        self.path = Path(location)
+
+    def _iter_filenames(self) -> Iterator[str]:
+        for path in self.path.iterdir():
+            if path.is_dir():
+                yield from _iter_project_filenames(path)
+            else:
+                yield path.name
+
+    @cached_property
+    def versions(self) -> dict[NormalizedName, Version]:
+        """Mapping from normalized name to newest version."""
+        if not self.path.is_dir():
+            msg = f"Index {self.path} is not a directory"
+            raise NotADirectoryError(msg)
+
+        finals: dict[NormalizedName, Version] = {}
+        pres: dict[NormalizedName, Version] = {}
+        for filename in self._iter_filenames():
+            if (parsed := _parse_filename(filename)) is None:
+                continue
+            name, version = parsed
+            versions = pres if version.is_prerelease else finals
+            if name not in versions or version > versions[name]:
+                versions[name] = version
+        return pres | finals
+
+    def get_many(self, names: Iterable[str]) -> dict[str, str]:
+        """Mapping from each of ``names`` in index to latest version."""
+        from packaging.utils import canonicalize_name
+
+        out: dict[str, str] = {}
+        for name in names:
+            if (version := self.versions.get(canonicalize_name(name))) is not None:
+                out[name] = str(version)
+            else:
+                logger.warning("No version of %s in %s", name, self.path)
+        return out
+
+    def get(self, name: str) -> str | None:
+        """Latest version of ``name`` (``None`` if not in index)."""
+        return self.get_many([name]).get(name)
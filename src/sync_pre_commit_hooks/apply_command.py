@@ -2,26 +2,490 @@
 
 from __future__ import annotations
 
+import hashlib
+import importlib
+import json
+import math
+import os
 import shlex
 import subprocess
-from argparse import ArgumentParser
-from pathlib import Path
-from typing import TYPE_CHECKING
+import sys
+import threading
+import time
+from argparse import ArgumentParser, BooleanOptionalAction
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from dataclasses import dataclass, replace
+from functools import partial
+from pathlib import Path, PurePath
+from typing import TYPE_CHECKING, Any, cast
 
 from ._logging import get_logger
 
 logger = get_logger("apply-command")
 
 if TYPE_CHECKING:
-    from collections.abc import Sequence
+    from argparse import Namespace
+    from collections.abc import Callable, Iterable, Iterator, Sequence
+    from concurrent.futures import Executor
+    from typing import IO
 
 
-def _apply_command(command: str, extras: Sequence[str], path: Path) -> int:
-    cmd = (*shlex.split(command), *extras, str(path))
-    logger.info("%s", shlex.join(cmd))
-    code = subprocess.call(cmd)
-    logger.info("return code: %s", code)
-    return code
+@dataclass(frozen=True)
+class _Result:
+    """Result of a single invocation. ``returncode`` is ``None`` if skipped."""
+
+    args: tuple[str, ...]
+    returncode: int | None
+    output: bytes = b""
+    error: bytes = b""
+    elapsed: float = 0.0
+
+
+# Return code for timed out invocations (as for GNU ``timeout``).
+_TIMEOUT_RETURNCODE = 124
+
+
+# POSIX minimum for ARG_MAX, used if the limit cannot be queried.
+_POSIX_ARG_MAX = 4096
+# CreateProcess command line limit is 32767 characters.
+_WINDOWS_ARG_MAX = 32000
+_ARG_MAX_HEADROOM = 2048
+
+
+def _arg_bytes(arg: str) -> int:
+    """Bytes ``arg`` takes in the argument block (string, terminator, and pointer)."""
+    return len(os.fsencode(arg)) + 1 + 8
+
+
+def _default_max_args_bytes() -> int:
+    """Platform limit on argument bytes, less the environment and some headroom."""
+    if sys.platform == "win32":
+        return _WINDOWS_ARG_MAX
+
+    try:
+        arg_max = os.sysconf("SC_ARG_MAX")
+    except (AttributeError, ValueError, OSError):  # pragma: no cover
+        arg_max = -1
+    if arg_max <= 0:  # pragma: no cover
+        arg_max = _POSIX_ARG_MAX
+
+    environ_bytes = sum(_arg_bytes(f"{k}={v}") for k, v in os.environ.items())
+    return max(arg_max - environ_bytes - _ARG_MAX_HEADROOM, _POSIX_ARG_MAX)
+
+
+def _batch_commands(
+    prefix: Sequence[str],
+    paths: Sequence[str],
+    batch_size: int = 1,
+    max_args_bytes: int | None = None,
+) -> list[tuple[str, ...]]:
+    """
+    Group ``paths`` into as few commands ``(*prefix, *batch)`` as possible.
+
+    Each batch has at most ``batch_size`` paths (unlimited if ``batch_size <=
+    0``) and, if ``max_args_bytes`` is set, the total size of the arguments
+    stays under ``max_args_bytes``. A single path that exceeds the limit on its
+    own gets its own command.
+    """
+    if batch_size == 1:
+        return [(*prefix, path) for path in paths]
+
+    prefix_bytes = sum(map(_arg_bytes, prefix))
+    commands: list[tuple[str, ...]] = []
+    batch: list[str] = []
+    batch_bytes = prefix_bytes
+    for path in paths:
+        path_bytes = _arg_bytes(path)
+        if batch and (
+            len(batch) == batch_size
+            or (
+                max_args_bytes is not None and batch_bytes + path_bytes > max_args_bytes
+            )
+        ):
+            commands.append((*prefix, *batch))
+            batch, batch_bytes = [], prefix_bytes
+        batch.append(path)
+        batch_bytes += path_bytes
+
+    if batch:
+        commands.append((*prefix, *batch))
+    return commands
+
+
+def _timed_out(
+    args: Sequence[str], error: subprocess.TimeoutExpired, output: bytes | None = None
+) -> _Result:
+    message = f"killed after timeout of {error.timeout}s\n".encode()
+    return _Result(
+        tuple(args), _TIMEOUT_RETURNCODE, output or b"", (error.stderr or b"") + message
+    )
+
+
+def _run_command(
+    args: Sequence[str], skip: threading.Event, timeout: float | None = None
+) -> _Result:
+    if skip.is_set():
+        return _Result(tuple(args), None)
+
+    try:
+        proc = subprocess.run(args, capture_output=True, check=False, timeout=timeout)
+    except subprocess.TimeoutExpired as e:
+        return _timed_out(args, e, e.stdout)
+    return _Result(tuple(args), proc.returncode, proc.stdout, proc.stderr)
+
+
+def _run_filter(
+    args: Sequence[str], skip: threading.Event, timeout: float | None = None
+) -> _Result:
+    """
+    Run ``args[:-1]`` with contents of file ``args[-1]`` on stdin.
+
+    If the command succeeds and its stdout differs from the file contents, the
+    file is atomically rewritten with it. Only stderr is reported (to stderr). Empty
+    stdout for a non-empty file is treated as a failure (it is more likely a
+    misbehaving filter than a request to empty the file).
+    """
+    if skip.is_set():
+        return _Result(tuple(args), None)
+
+    from ._utils import write_if_changed
+
+    *command, path = args
+    try:
+        contents = Path(path).read_bytes()
+    except OSError as e:
+        return _Result(tuple(args), 1, error=f"{e}\n".encode())
+
+    try:
+        proc = subprocess.run(
+            command, input=contents, capture_output=True, check=False, timeout=timeout
+        )
+    except subprocess.TimeoutExpired as e:
+        return _timed_out(args, e)
+    if proc.returncode == 0 and contents and not proc.stdout:
+        message = b"filter wrote no output for non-empty file, not rewriting\n"
+        return _Result(tuple(args), 1, error=proc.stderr + message)
+    if proc.returncode == 0 and proc.stdout != contents:
+        _ = write_if_changed(Path(path), proc.stdout)
+        logger.info("rewrote %s", path)
+    return _Result(tuple(args), proc.returncode, error=proc.stderr)
+
+
+def _exit_code(code: object) -> int:
+    """Map return value or ``SystemExit.code`` to exit code like the interpreter does."""
+    if code is None:
+        return 0
+    if isinstance(code, int):
+        return code
+    logger.error("%s", code)
+    return 1
+
+
+def _load_callable(spec: str) -> Callable[[list[str]], object]:
+    """Load ``module:function`` (``function`` may be a dotted attribute path)."""
+    module_name, sep, attrs = spec.partition(":")
+    if not sep or not module_name or not attrs:
+        msg = f"Expected 'module:function', got {spec!r}"
+        raise ValueError(msg)
+
+    obj: Any = importlib.import_module(module_name)
+    for attr in attrs.split("."):
+        obj = getattr(obj, attr)
+    if not callable(obj):
+        msg = f"{spec!r} is not callable"
+        raise TypeError(msg)
+    return cast("Callable[[list[str]], object]", obj)
+
+
+def _run_python(
+    func: Callable[[list[str]], object],
+    spec: str,
+    args: Sequence[str],
+    skip: threading.Event,
+) -> _Result:
+    """Call ``func(list(args))`` in process."""
+    if skip.is_set():
+        return _Result((spec, *args), None)
+
+    try:
+        returncode = _exit_code(func(list(args)))
+    except SystemExit as e:
+        returncode = _exit_code(e.code)
+    except Exception:
+        logger.exception("%s raised an exception", spec)
+        returncode = 1
+    return _Result((spec, *args), returncode)
+
+
+class _SkipCache:
+    """
+    Cache of file contents a command previously succeeded on.
+
+    Keys are the hash of the command identity (mode, command, and extra
+    arguments) and the file contents. After a successful run, the key for the
+    file contents *after* the run is stored, so that files a tool rewrote are
+    skipped next time as well.
+    """
+
+    def __init__(self, identity: Sequence[Any], max_size: int) -> None:
+        from ._cache import JsonLRUCache, get_cache_dir
+
+        self._identity = json.dumps(identity).encode()
+        self._cache = JsonLRUCache(get_cache_dir() / "apply-command.json", max_size)
+
+    def _key(self, path: str) -> str | None:
+        try:
+            contents = Path(path).read_bytes()
+        except OSError:
+            return None
+        return hashlib.sha256(self._identity + b"\0" + contents).hexdigest()
+
+    def filter(self, paths: Iterable[str]) -> list[str]:
+        """Paths without a cached successful run."""
+        out: list[str] = []
+        for path in paths:
+            if (key := self._key(path)) is not None and key in self._cache:
+                _ = self._cache.get(key)
+                logger.info("cached: %s", path)
+            else:
+                out.append(path)
+        return out
+
+    def add(self, paths: Iterable[str]) -> None:
+        """Record successful run on ``paths``."""
+        for path in paths:
+            if (key := self._key(path)) is not None:
+                self._cache.set(key)
+
+    def save(self) -> None:
+        """Write cache to disk."""
+        _ = self._cache.save()
+
+
+def _iter_results(
+    commands: Sequence[Sequence[str]],
+    executor: Executor | None,
+    fail_fast: bool,
+    runner: Callable[[Sequence[str], threading.Event], _Result] = _run_command,
+) -> Iterator[_Result]:
+    """
+    Run ``commands`` on ``executor`` (serially if ``None``), yielding results in input order.
+
+    If ``fail_fast``, commands that have not started when any command fails
+    are skipped.
+
+    Yields
+    ------
+    _Result
+    """
+    skip = threading.Event()
+
+    def run(args: Sequence[str]) -> _Result:
+        start = time.perf_counter()
+        result = runner(args, skip)
+        if fail_fast and result.returncode:
+            skip.set()
+        return replace(result, elapsed=time.perf_counter() - start)
+
+    if executor is None:
+        yield from map(run, commands)
+        return
+
+    futures = [executor.submit(run, args) for args in commands]
+    try:
+        for future in futures:
+            yield future.result()
+    finally:
+        for future in futures:
+            _ = future.cancel()
+
+
+def _write_output(stream: IO[str], output: bytes) -> None:
+    if not output:
+        return
+    stream.flush()
+    if (buffer := getattr(stream, "buffer", None)) is not None:
+        _ = buffer.write(output)
+        buffer.flush()
+    else:  # pragma: no cover
+        _ = stream.write(output.decode(errors="replace"))
+        stream.flush()
+
+
+def _apply_commands(
+    commands: Sequence[Sequence[str]],
+    executor: Executor | None = None,
+    fail_fast: bool = False,
+    runner: Callable[[Sequence[str], threading.Event], _Result] = _run_command,
+    on_success: Callable[[Sequence[str]], None] | None = None,
+    results: list[_Result] | None = None,
+) -> int:
+    return_code = 0
+    for args, result in zip(
+        commands,
+        _iter_results(commands, executor=executor, fail_fast=fail_fast, runner=runner),
+        strict=True,
+    ):
+        if result.returncode is None:
+            logger.info("skipped: %s", shlex.join(result.args))
+            continue
+        logger.info("%s", shlex.join(result.args))
+        _write_output(sys.stdout, result.output)
+        _write_output(sys.stderr, result.error)
+        logger.info("return code: %s", result.returncode)
+        logger.debug("elapsed: %.3fs", result.elapsed)
+        if result.returncode == _TIMEOUT_RETURNCODE:
+            logger.warning("timed out: %s", shlex.join(result.args))
+        if results is not None:
+            results.append(result)
+        return_code += result.returncode
+        if result.returncode == 0 and on_success is not None:
+            on_success(args)
+    return return_code
+
+
+@dataclass(frozen=True)
+class _Phase:
+    """Command (``prefix``) applied to ``paths``."""
+
+    prefix: tuple[str, ...]
+    paths: list[str]
+    runner: Callable[[Sequence[str], threading.Event], _Result]
+    identity: tuple[Any, ...]
+    max_args_bytes: int | None = None
+
+    def run(
+        self,
+        executor: Executor | None,
+        batch_size: int,
+        fail_fast: bool,
+        cache_size: int | None,
+        results: list[_Result] | None = None,
+    ) -> int:
+        """Run phase, skipping cached paths if ``cache_size`` is not ``None``."""
+        paths = self.paths
+        cache = None if cache_size is None else _SkipCache(self.identity, cache_size)
+        if cache is not None:
+            paths = cache.filter(paths)
+
+        try:
+            return _apply_commands(
+                _batch_commands(
+                    self.prefix,
+                    paths,
+                    batch_size=batch_size,
+                    max_args_bytes=self.max_args_bytes,
+                ),
+                executor=executor,
+                fail_fast=fail_fast,
+                runner=self.runner,
+                on_success=None
+                if cache is None
+                else lambda args: cache.add(args[len(self.prefix) :]),
+                results=results,
+            )
+        finally:
+            if cache is not None:
+                cache.save()
+
+
+def _percentile(values: Sequence[float], q: float) -> float:
+    """Nearest rank ``q`` percentile of sorted ``values``."""
+    if not values:
+        return 0.0
+    return values[max(math.ceil(q / 100 * len(values)) - 1, 0)]
+
+
+def _report(
+    results: Sequence[_Result], slowest: int, json_path: Path | None = None
+) -> None:
+    """Log ``slowest`` invocations and latency percentiles, and optionally dump as JSON."""
+    elapsed = sorted(result.elapsed for result in results)
+    percentiles = {f"p{q}": _percentile(elapsed, q) for q in (50, 95, 99)}
+
+    if slowest > 0:
+        logger.info(
+            "%d invocations in %.3fs: %s",
+            len(elapsed),
+            sum(elapsed),
+            ", ".join(f"{k}={v:.3f}s" for k, v in percentiles.items()),
+        )
+        for result in sorted(results, key=lambda r: r.elapsed, reverse=True)[:slowest]:
+            logger.info(
+                "%8.3fs [%s] %s",
+                result.elapsed,
+                result.returncode,
+                shlex.join(result.args),
+            )
+
+    if json_path is not None:
+        data = {
+            "count": len(elapsed),
+            "total": sum(elapsed),
+            **percentiles,
+            "invocations": [
+                {
+                    "args": list(result.args),
+                    "returncode": result.returncode,
+                    "elapsed": result.elapsed,
+                }
+                for result in results
+            ],
+        }
+        _ = json_path.write_text(json.dumps(data, indent=2) + "\n", encoding="utf-8")
+
+
+def _parse_dispatch(value: str) -> tuple[str, str]:
+    glob, sep, command = value.partition("=")
+    if not sep or not glob.strip() or not command.strip():
+        msg = f"Expected GLOB=COMMAND, got {value!r}"
+        raise ValueError(msg)
+    return glob.strip(), command.strip()
+
+
+def _load_dispatch_config(path: Path) -> list[tuple[str, str]]:
+    """
+    Read ``[tool.sync-pre-commit-hooks.apply-command]`` table of ``path``.
+
+    Keys are glob patterns, and values are a command or list of commands.
+    """
+    from ._compat import tomllib
+    from ._utils import get_in
+
+    with path.open("rb") as f:
+        table = get_in(
+            ["tool", "sync-pre-commit-hooks", "apply-command"], tomllib.load(f), {}
+        )
+
+    out: list[tuple[str, str]] = []
+    for glob, value in table.items():
+        commands = [value] if isinstance(value, str) else value
+        if not isinstance(commands, list) or not all(
+            isinstance(command, str) for command in commands
+        ):
+            msg = f"{path}: value for {glob!r} must be a string or list of strings"
+            raise TypeError(msg)
+        out.extend((glob, command) for command in commands)
+    return out
+
+
+def _dispatch_paths(
+    dispatch: Iterable[tuple[str, str]], paths: Sequence[str]
+) -> dict[str, list[str]]:
+    """Map each command (in order of first appearance) to paths matching any of its globs."""
+    globs: dict[str, list[str]] = {}
+    for glob, command in dispatch:
+        globs.setdefault(command, []).append(glob)
+
+    out: dict[str, list[str]] = {}
+    for command, patterns in globs.items():
+        out[command] = [
+            path
+            for path in paths
+            if any(PurePath(path).match(pattern) for pattern in patterns)
+        ]
+    return out
 
 
 def main(argv: Sequence[str] | None = None) -> int:
@@ -29,26 +493,260 @@ def main(argv: Sequence[str] | None = None) -> int:
     parser = ArgumentParser()
     _ = parser.add_argument(
         "command",
+        nargs="?",
         help="""
         Command to run. Extra arguments to ``command`` will be parsed as well.
         Note that ``command`` will be parsed with ``shlex.split``. So, if you
         need to pass complex arguments, you should wrap ``command`` and these
         arguments in a single string. For example, to run ``command --option
         a`` over ``file1`` and ``file2``, you should use ``apply-command
-        "command --option a" file1 file2``
+        "command --option a" file1 file2``. Not used with ``--python`` or
+        ``--dispatch``, in which case all positional arguments are paths.
         """,
     )
     _ = parser.add_argument(
         dest="paths",
-        nargs="+",
+        nargs="*",
         type=Path,
         help="Files to apply ``command`` to.",
     )
+    _ = parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="""
+        Number of files to process in parallel. Output of each file is
+        captured and printed in the order files are passed. (Default: number
+        of CPUs)
+        """,
+    )
+    _ = parser.add_argument(
+        "--fail-fast",
+        action="store_true",
+        help="Skip files not yet processed after the first non-zero return code.",
+    )
+    _ = parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=1,
+        help="""
+        Maximum number of files to pass to a single invocation of ``command``.
+        Use ``0`` for no limit (bounded only by ``--max-args-bytes``). Batches
+        are run in parallel according to ``--jobs``. (Default: 1)
+        """,
+    )
+    _ = parser.add_argument(
+        "--max-args-bytes",
+        type=int,
+        default=None,
+        help="""
+        Maximum size in bytes of the arguments of a single invocation when
+        batching. (Default: platform limit less the size of the environment)
+        """,
+    )
+    _ = parser.add_argument(
+        "--python",
+        metavar="MODULE:FUNCTION",
+        help="""
+        Import ``MODULE:FUNCTION`` once and call it in process as
+        ``FUNCTION([*extra_args, *paths])`` instead of running ``command``.
+        A return value or ``SystemExit`` code of ``None`` maps to ``0``, and
+        an exception to ``1``. Calls are made serially.
+        """,
+    )
+    _ = parser.add_argument(
+        "--filter",
+        action="store_true",
+        help="""
+        Run ``command`` as a filter. The contents of each file are passed on
+        stdin, and the file is rewritten with stdout only if the command
+        succeeds and the output differs. Empty output for a non-empty file is
+        an error. Not compatible with ``--batch-size`` or ``--python``.
+        """,
+    )
+    _ = parser.add_argument(
+        "--cache",
+        action=BooleanOptionalAction,
+        default=False,
+        help="""
+        Skip files whose contents a previous successful run of the same
+        command (and extra arguments) has seen. The cache is stored under
+        ``$SYNC_PRE_COMMIT_HOOKS_CACHE_DIR`` (default
+        ``$XDG_CACHE_HOME/sync-pre-commit-hooks``). Only use with idempotent
+        commands. (Default: ``--no-cache``)
+        """,
+    )
+    _ = parser.add_argument(
+        "--cache-size",
+        type=int,
+        default=10_000,
+        help="""
+        Maximum number of entries in the cache. Least recently used entries
+        are evicted. (Default: 10000)
+        """,
+    )
+    _ = parser.add_argument(
+        "--dispatch",
+        metavar="GLOB=COMMAND",
+        action="append",
+        default=[],
+        help="""
+        Run ``COMMAND`` over paths matching ``GLOB`` (matched from the right
+        as with ``pathlib.PurePath.match``). Can be specified multiple times.
+        Commands are run in the order given, each over all of its matching
+        paths, sharing the pool of ``--jobs`` workers. When used, all
+        positional arguments are paths.
+        """,
+    )
+    _ = parser.add_argument(
+        "--dispatch-config",
+        metavar="PATH",
+        type=Path,
+        help="""
+        Read ``GLOB = COMMAND`` (or ``GLOB = [COMMAND, ...]``) pairs from the
+        ``[tool.sync-pre-commit-hooks.apply-command]`` table of ``PATH``
+        (usually ``pyproject.toml``). Added after any ``--dispatch`` options.
+        """,
+    )
+    _ = parser.add_argument(
+        "--timeout",
+        type=float,
+        default=None,
+        help=f"""
+        Kill invocations running longer than ``TIMEOUT`` seconds. These have a
+        return code of {_TIMEOUT_RETURNCODE}. Not compatible with ``--python``.
+        """,
+    )
+    _ = parser.add_argument(
+        "--report",
+        metavar="N",
+        type=int,
+        default=0,
+        help="""
+        At the end of the run, report the ``N`` slowest invocations along with
+        p50/p95/p99 wall time.
+        """,
+    )
+    _ = parser.add_argument(
+        "--report-json",
+        metavar="PATH",
+        type=Path,
+        default=None,
+        help="Write wall time and return code of every invocation to ``PATH``.",
+    )
     options, extras = parser.parse_known_args(argv)
 
-    return_code = 0
-    for path in options.paths:
-        return_code += _apply_command(options.command, extras, path)
+    paths = [str(path) for path in options.paths]
+    dispatch = _check_options(parser, options, extras)
+    if (options.python is not None or dispatch) and options.command is not None:
+        paths.insert(0, options.command)
+
+    runner = partial(
+        _run_filter if options.filter else _run_command, timeout=options.timeout
+    )
+    mode = "filter" if options.filter else "command"
+    max_args_bytes = options.max_args_bytes or _default_max_args_bytes()
+    jobs = options.jobs
+
+    if options.python is not None:
+        try:
+            func = _load_callable(options.python)
+        except (ImportError, AttributeError, ValueError, TypeError) as e:
+            parser.error(f"--python: {e}")
+        phases = [
+            _Phase(
+                tuple(extras),
+                paths,
+                partial(_run_python, func, options.python),
+                ("python", options.python, extras),
+            )
+        ]
+        jobs = 1
+    elif dispatch:
+        phases = [
+            _Phase(
+                tuple(command_args := shlex.split(command)),
+                command_paths,
+                runner,
+                (mode, command_args, []),
+                max_args_bytes,
+            )
+            for command, command_paths in _dispatch_paths(dispatch, paths).items()
+        ]
+    elif options.command is None or not paths:
+        parser.error("the following arguments are required: command, paths")
+    else:
+        command = shlex.split(options.command)
+        phases = [
+            _Phase(
+                (*command, *extras),
+                paths,
+                runner,
+                (mode, command, extras),
+                max_args_bytes,
+            )
+        ]
+
+    results: list[_Result] = []
+    return_code = _run_phases(
+        phases,
+        jobs=jobs,
+        batch_size=options.batch_size,
+        fail_fast=options.fail_fast,
+        cache_size=options.cache_size if options.cache else None,
+        results=results,
+    )
+    if options.report or options.report_json is not None:
+        _report(results, options.report, options.report_json)
+    return return_code
+
+
+def _check_options(
+    parser: ArgumentParser, options: Namespace, extras: Sequence[str]
+) -> list[tuple[str, str]]:
+    """Validate options and get ``(glob, command)`` pairs to dispatch."""
+    try:
+        dispatch = [_parse_dispatch(value) for value in options.dispatch]
+        if options.dispatch_config is not None:
+            dispatch.extend(_load_dispatch_config(options.dispatch_config))
+    except (OSError, ValueError, TypeError) as e:
+        parser.error(str(e))
+
+    if options.filter and (options.python is not None or options.batch_size != 1):
+        parser.error("--filter is not compatible with --python or --batch-size")
+    if dispatch and options.python is not None:
+        parser.error("--dispatch is not compatible with --python")
+    if options.timeout is not None and options.python is not None:
+        parser.error("--timeout is not compatible with --python")
+    if dispatch and extras:
+        parser.error(f"unrecognized arguments: {' '.join(extras)}")
+    return dispatch
+
+
+def _run_phases(
+    phases: Sequence[_Phase],
+    jobs: int,
+    batch_size: int,
+    fail_fast: bool,
+    cache_size: int | None,
+    results: list[_Result] | None = None,
+) -> int:
+    with (
+        ThreadPoolExecutor(max_workers=jobs) if jobs > 1 else nullcontext()
+    ) as executor:
+        return_code = 0
+        for phase in phases:
+            if fail_fast and return_code:
+                logger.info("skipped: %s", shlex.join(phase.prefix))
+                continue
+            return_code += phase.run(
+                executor,
+                batch_size=batch_size,
+                fail_fast=fail_fast,
+                cache_size=cache_size,
+                results=results,
+            )
     return return_code
 
 
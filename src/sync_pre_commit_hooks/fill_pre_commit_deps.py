@@ -13,22 +13,27 @@ from itertools import chain
 from pathlib import Path
 from typing import TYPE_CHECKING, cast
 
-from packaging.requirements import Requirement
 from packaging.utils import canonicalize_name
 
 from ._logging import get_logger
+from ._markers import PLATFORMS, get_targets, parse_python_version, prune_requirements
+from ._requirements import NormalizedRequirement
 from ._utils import (
+    HookIndex,
+    PreCommitConfigDocument,
     add_pre_commit_config_argument,
     add_pyproject_argument,
     add_yaml_arguments,
     get_in,
-    pre_commit_config_load,
-    pre_commit_config_repo_hook_iter,
+    hook_file_lock,
 )
+from ._versions import MappingSource, VersionRegistry
 from .resolve_dependencies import (
+    RequirementConflictError,
     ResolveDependencyGroups,
     ResolveOptionalDependencies,
     canonicalize_requirement,
+    merge_requirements,
 )
 
 if TYPE_CHECKING:
@@ -37,13 +42,13 @@ if TYPE_CHECKING:
         Callable,
         Collection,
         Iterable,
+        Mapping,
         Sequence,
     )
     from typing import Any
 
     from packaging.utils import NormalizedName
 
-    from ._typing import NormalizedRequirement
     from ._typing_compat import Self
 
 
@@ -51,24 +56,64 @@ logger = get_logger("fill-pre-commit-deps")
 
 
 def _limit_requirements(
-    deps: Iterable[Requirement], exclude: Collection[str], include: Collection[str]
-) -> Iterable[Requirement]:
+    deps: Iterable[NormalizedRequirement],
+    exclude: Collection[str],
+    include: Collection[str],
+) -> Iterable[NormalizedRequirement]:
     if exclude:
 
-        def func_exclude(x: Requirement) -> bool:
+        def func_exclude(x: NormalizedRequirement) -> bool:
             return x.name not in exclude
 
         deps = filter(func_exclude, deps)
 
     if include:
 
-        def func_include(x: Requirement) -> bool:
+        def func_include(x: NormalizedRequirement) -> bool:
             return x.name in include
 
         deps = filter(func_include, deps)
     return deps
 
 
+def _pin_requirements(
+    deps: Iterable[NormalizedRequirement], versions: Mapping[NormalizedName, str]
+) -> list[NormalizedRequirement]:
+    """
+    Rewrite requirements as ``name[extras]==version`` from ``versions``.
+
+    Markers are kept. Requirements with a url, not in ``versions``, or whose
+    specifier excludes the locked version, are kept as is.
+    """
+    from packaging.requirements import InvalidRequirement
+
+    out: list[NormalizedRequirement] = []
+    for dep in deps:
+        if dep.url is not None:
+            logger.debug("Not pinning url requirement %s", dep)
+            out.append(dep)
+            continue
+        if (version := versions.get(dep.name)) is None:
+            logger.info("No locked version of %s", dep)
+            out.append(dep)
+            continue
+
+        extras = f"[{','.join(sorted(dep.extras))}]" if dep.extras else ""
+        marker = f" ; {dep.marker}" if dep.marker is not None else ""
+        try:
+            pinned = NormalizedRequirement.from_string(
+                f"{dep.name}{extras}=={version}{marker}"
+            )
+        except InvalidRequirement:
+            pinned = None
+        if pinned is None or not dep.specifier.contains(version, prereleases=True):
+            logger.warning("Locked version %s does not satisfy %s", version, dep)
+            out.append(dep)
+        else:
+            out.append(pinned)
+    return out
+
+
 class ParseDependencies:
     """
     Parse pyproject.toml file for dependencies
@@ -101,7 +146,7 @@ class ParseDependencies:
     def dependencies(self) -> list[NormalizedRequirement]:
         """project.dependencies"""
         return [
-            canonicalize_requirement(Requirement(x))
+            canonicalize_requirement(x)
             for x in self.get_in(
                 "project",
                 "dependencies",
@@ -109,21 +154,41 @@ class ParseDependencies:
             )
         ]
 
+    def _parse_optional_dependencies(
+        self, previous: dict[str, Any] | None = None
+    ) -> dict[NormalizedName, Sequence[NormalizedRequirement]]:
+        """
+        Parse project.optional-dependencies.
+
+        Extras unchanged from ``previous`` data reuse already parsed
+        requirements.
+        """
+        keys = ("project", "optional-dependencies")
+        table = self.get_in(*keys, factory=dict)
+        old_table, old_parsed = (
+            (
+                get_in(keys=keys, nested_dict=previous, factory=dict),
+                self.optional_dependencies.unresolved,
+            )
+            if previous is not None
+            else ({}, {})
+        )
+
+        out: dict[NormalizedName, Sequence[NormalizedRequirement]] = {}
+        for name, deps in table.items():
+            key = canonicalize_name(name)
+            if old_table.get(name) == deps and key in old_parsed:
+                out[key] = old_parsed[key]
+            else:
+                out[key] = list(map(canonicalize_requirement, deps))
+        return out
+
     @cached_property
     def optional_dependencies(self) -> ResolveOptionalDependencies:
         """project.optional-dependencies"""
         return ResolveOptionalDependencies(
             package_name=self.package_name,
-            unresolved={
-                canonicalize_name(k): list(
-                    map(canonicalize_requirement, map(Requirement, v))
-                )
-                for k, v in self.get_in(
-                    "project",
-                    "optional-dependencies",
-                    factory=dict,
-                ).items()
-            },
+            unresolved=self._parse_optional_dependencies(),
         )
 
     @cached_property
@@ -141,6 +206,34 @@ class ParseDependencies:
             optional_dependencies=self.optional_dependencies,
         )
 
+    def update(self, data: dict[str, Any]) -> None:
+        """
+        Replace ``data``, keeping resolved extras and groups not affected.
+
+        Only extras and groups which changed, or which (directly or not)
+        include changed ones, are resolved again.
+        """
+        previous, self.data = self.data, data
+        _ = self.__dict__.pop("dependencies", None)
+
+        if (
+            "package_name" in self.__dict__
+            and canonicalize_name(self.get_in("project", "name", default=""))
+            != self.package_name
+        ):
+            for name in ("package_name", "optional_dependencies", "dependency_groups"):
+                _ = self.__dict__.pop(name, None)
+        if "optional_dependencies" not in self.__dict__:
+            return
+
+        optional_dependencies = self._parse_optional_dependencies(previous)
+        if "dependency_groups" in self.__dict__:
+            _ = self.dependency_groups.update(
+                self.get_in("dependency-groups", factory=dict), optional_dependencies
+            )
+        else:
+            _ = self.optional_dependencies.update(optional_dependencies)
+
     def pip_requirements(
         self,
         extras: Iterable[str],
@@ -183,26 +276,16 @@ def parse_requirements_file(
     from requirements import parse
 
     with requirements_path.open(encoding="utf-8") as f:
-        return {canonicalize_requirement(Requirement(req.line)) for req in parse(f)}
+        return {canonicalize_requirement(req.line) for req in parse(f)}
 
 
-def _update_yaml_file(
-    path: Path,
-    hook_id: str,
-    deps: list[str],
-    yaml_mapping: int = 2,
-    yaml_sequence: int = 4,
-    yaml_offset: int = 2,
-) -> int:
+def update_config(index: HookIndex, hook_id: str, deps: list[str]) -> bool:
+    """Set ``additional_dependencies`` of ``hook_id`` to ``deps``. Returns ``True`` if updated."""
     if not deps:
-        return 0
-
-    loaded, yaml = pre_commit_config_load(
-        path, mapping=yaml_mapping, sequence=yaml_sequence, offset=yaml_offset
-    )
+        return False
 
     updated = False
-    for _, hook in pre_commit_config_repo_hook_iter(loaded, include_hook_ids=hook_id):
+    for _, hook in index.iter_hooks(hook_id):
         logger.info("Updating dependencies of hook %s", hook_id)
         if (seq := hook.get("additional_dependencies")) is not None:
             if seq == deps:
@@ -214,12 +297,26 @@ def _update_yaml_file(
 
         updated = True
 
-    if updated:
-        logger.info("Updating %s", path)
-        yaml.dump(loaded, path)  # pyright: ignore[reportUnknownMemberType]
-        return 1
+    return updated
 
-    return 0
+
+def _update_yaml_file(
+    path: Path,
+    hook_id: str,
+    deps: list[str],
+    yaml_mapping: int = 2,
+    yaml_sequence: int = 4,
+    yaml_offset: int = 2,
+) -> int:
+    if not deps:
+        return 0
+
+    with hook_file_lock(path):
+        document = PreCommitConfigDocument.from_path(
+            path, mapping=yaml_mapping, sequence=yaml_sequence, offset=yaml_offset
+        )
+        _ = document.apply(update_config, hook_id=hook_id, deps=deps)
+        return document.dump(logger)
 
 
 def _get_options(argv: Sequence[str] | None = None) -> Namespace:
@@ -296,6 +393,56 @@ def _get_options(argv: Sequence[str] | None = None) -> Namespace:
         those packages are included.
         """,
     )
+    # markers
+    _ = parser.add_argument(
+        "--prune-markers",
+        action="store_true",
+        help="""
+        Drop requirements whose environment marker is false for every target
+        environment. Target python versions are taken from
+        `--python-version`, else the `language_version` of the hook, else
+        `--python-version-file`. Markers on variables not fixed by the
+        targets (for example, the platform if `--platform` is not passed)
+        are assumed to possibly apply.
+        """,
+    )
+    _ = parser.add_argument(
+        "--python-version",
+        dest="python_versions",
+        action="append",
+        default=[],
+        help="Target python version for `--prune-markers`. Can be repeated.",
+    )
+    _ = parser.add_argument(
+        "--python-version-file",
+        type=Path,
+        default=Path(".python-version"),
+        help="""
+        File with target python versions (one per line) for
+        `--prune-markers`. Ignored if it does not exist.
+        """,
+    )
+    _ = parser.add_argument(
+        "--platform",
+        dest="platforms",
+        action="append",
+        default=[],
+        choices=sorted(PLATFORMS),
+        help="Target platform for `--prune-markers`. Can be repeated.",
+    )
+    # pins
+    _ = parser.add_argument(
+        "--pin-from",
+        type=Path,
+        action="append",
+        default=[],
+        help="""
+        Lock file (``uv.lock`` or ``script.py.lock``) or requirements file
+        to pin dependencies from. Each dependency found is written as
+        ``name==version``. Can be specified multiple times, with later files
+        taking precedence.
+        """,
+    )
     # extra deps
     _ = parser.add_argument(
         "extra_deps",
@@ -317,6 +464,30 @@ def _get_options(argv: Sequence[str] | None = None) -> Namespace:
     return parser.parse_args(argv)
 
 
+def _get_python_versions(options: Namespace) -> list[str]:
+    """Target python versions for ``--prune-markers``."""
+    from ._utils import pre_commit_config_load_safe
+
+    versions: list[str] = options.python_versions
+    if not versions:
+        index = HookIndex(pre_commit_config_load_safe(options.pre_commit_config))
+        versions = [
+            language_version
+            for _, hook in index.iter_hooks(options.hook_id)
+            if (language_version := hook.get("language_version")) is not None
+        ]
+    if not versions and options.python_version_file.exists():
+        versions = options.python_version_file.read_text(encoding="utf-8").split()
+
+    out: list[str] = []
+    for version in versions:
+        if (parsed := parse_python_version(version)) is None:
+            logger.info("Ignoring python version %s", version)
+        else:
+            out.append(parsed)
+    return out
+
+
 def main(argv: Sequence[str] | None = None) -> int:
     """CLI."""
     options = _get_options(argv)
@@ -340,7 +511,24 @@ def main(argv: Sequence[str] | None = None) -> int:
 
         deps = chain(deps, deps_req)
 
-    deps_clean = [*options.extra_deps, *sorted(set(map(str, deps)))]
+    try:
+        merged = merge_requirements(deps)
+    except RequirementConflictError as e:
+        logger.error("%s", e)  # ruff:ignore[error-instead-of-exception]
+        return 1
+
+    if options.prune_markers:
+        merged = prune_requirements(
+            merged, get_targets(_get_python_versions(options), options.platforms)
+        )
+
+    if options.pin_from:
+        versions = VersionRegistry(
+            map(MappingSource.from_file, reversed(options.pin_from))
+        ).get_many(dep.name for dep in merged if dep.url is None)
+        merged = _pin_requirements(merged, versions)
+
+    deps_clean = [*options.extra_deps, *sorted(map(str, merged))]
 
     return _update_yaml_file(
         path=options.pre_commit_config,
@@ -5,23 +5,32 @@ from __future__ import annotations
 
 from abc import ABC, abstractmethod
 from dataclasses import dataclass, field
-from typing import TYPE_CHECKING, cast
+from typing import TYPE_CHECKING, ClassVar, cast
 
-from dependency_groups import DependencyGroupResolver
+from dependency_groups import (
+    CyclicDependencyError,
+    DependencyGroupInclude,
+    DependencyGroupResolver,
+)
 from packaging.utils import NormalizedName, canonicalize_name
 
-from ._typing import NormalizedRequirement
+from ._requirements import NormalizedRequirement
 from ._typing_compat import override
 
 if TYPE_CHECKING:
     from collections.abc import (
+        Callable,
+        Container,
         Iterable,
+        Iterator,
         Mapping,
         Sequence,
     )
     from typing import Any
 
     from packaging.requirements import Requirement
+    from packaging.specifiers import Specifier, SpecifierSet
+    from packaging.version import Version
 
 
 # Not used, but keep for posterity
@@ -40,53 +49,204 @@ if TYPE_CHECKING:
 #             yield requirement
 
 
-def canonicalize_requirement(dep: Requirement) -> NormalizedRequirement:
-    """Normalized ``Requirement``"""
-    dep.name = canonicalize_name(dep.name)
-    dep.extras = {canonicalize_name(e) for e in dep.extras}
-    return cast("NormalizedRequirement", dep)
+def canonicalize_requirement(dep: Requirement | str) -> NormalizedRequirement:
+    """Normalized (interned) requirement. ``dep`` is not modified."""
+    if isinstance(dep, str):
+        return NormalizedRequirement.from_string(dep)
+    return NormalizedRequirement.from_requirement(dep)
+
+
+def _iter_components(
+    root: NormalizedName,
+    get_children: Callable[[NormalizedName], Iterable[NormalizedName]],
+    done: Container[NormalizedName],
+    allow_cycles: bool = True,
+) -> Iterator[list[NormalizedName]]:
+    """
+    Strongly connected components reachable from ``root`` (iterative Tarjan).
+
+    Components are yielded in reverse topological order, that is, after all
+    components reachable from them. Keys in ``done`` are not visited.
+
+    Yields
+    ------
+    list of str
+        Keys in component.
+    """
+    index: dict[NormalizedName, int] = {}
+    lowlink: dict[NormalizedName, int] = {}
+    # position of key in stack, so components are split off in O(size)
+    position: dict[NormalizedName, int] = {}
+    stack: list[NormalizedName] = []
+    on_stack: set[NormalizedName] = set()
+    work: list[tuple[NormalizedName, Iterator[NormalizedName]]] = []
+
+    def visit(key: NormalizedName) -> None:
+        index[key] = lowlink[key] = len(index)
+        position[key] = len(stack)
+        stack.append(key)
+        on_stack.add(key)
+        work.append((key, iter(get_children(key))))
+
+    visit(root)
+    while work:
+        key, remaining = work[-1]
+        for child in remaining:
+            if child not in index and child not in done:
+                visit(child)
+                break
+            if child in on_stack:
+                if not allow_cycles:
+                    raise CyclicDependencyError(root, key, child)
+                lowlink[key] = min(lowlink[key], index[child])
+        else:
+            _ = work.pop()
+            if work:
+                parent = work[-1][0]
+                lowlink[parent] = min(lowlink[parent], lowlink[key])
+            if lowlink[key] == index[key]:
+                component = stack[position[key] :]
+                del stack[position[key] :]
+                on_stack.difference_update(component)
+                yield component
+
+
+def _changed_keys(
+    old: Mapping[NormalizedName, Any], new: Mapping[NormalizedName, Any]
+) -> set[NormalizedName]:
+    """Keys added, removed, or changed between ``old`` and ``new``."""
+    return {
+        key
+        for key in old.keys() | new.keys()
+        if key not in old or key not in new or old[key] != new[key]
+    }
 
 
 @dataclass
 class _Resolve(ABC):
-    """Base resolver"""
+    """
+    Base resolver.
+
+    Keys (extras or groups) form a graph, with an edge for each key referenced
+    by another (``package[extra]`` or ``include-group``). Closures are computed
+    with an iterative Tarjan strongly connected components pass, so every key
+    reachable from a requested key is resolved once, in time linear in the
+    size of the graph, and without recursion. Keys in a cycle share the same
+    closure.
+
+    A reverse index of which keys reference each key is kept, so that
+    :meth:`update` only invalidates closures affected by a change.
+    """
+
+    # If ``False``, raise ``CyclicDependencyError`` on cycles.
+    allow_cycles: ClassVar[bool] = True
 
     package_name: NormalizedName
     unresolved: Mapping[str, Any]
     resolved: dict[NormalizedName, set[NormalizedRequirement]] = field(
         init=False, default_factory=dict[NormalizedName, set[NormalizedRequirement]]
     )
+    _children: dict[NormalizedName, list[NormalizedName]] = field(
+        init=False,
+        repr=False,
+        default_factory=dict[NormalizedName, list[NormalizedName]],
+    )
+    _parents: dict[NormalizedName, set[NormalizedName]] = field(
+        init=False,
+        repr=False,
+        default_factory=dict[NormalizedName, set[NormalizedName]],
+    )
 
     @abstractmethod
-    def _get_unresolved_deps(
-        self, key: NormalizedName
-    ) -> Iterable[NormalizedRequirement]: ...
+    def _get_table(self) -> Mapping[NormalizedName, Any]:
+        """Mapping from each (normalized) key to its unresolved value."""
 
     @abstractmethod
-    def _get_resolved_package_extras(
-        self, extras: Iterable[NormalizedName]
-    ) -> Iterable[NormalizedRequirement]: ...
+    def _get_node(
+        self, key: NormalizedName
+    ) -> tuple[set[NormalizedRequirement], list[NormalizedName]]:
+        """Requirements of ``key`` and other keys it references."""
 
     def _resolve(self, key: NormalizedName) -> set[NormalizedRequirement]:
         """Do underlying resolve of normalized group/extra"""
         if key in self.resolved:
             return self.resolved[key]
 
-        resolved: set[NormalizedRequirement] = set()
-        for dep in self._get_unresolved_deps(key):
-            if dep in resolved:
+        direct: dict[NormalizedName, set[NormalizedRequirement]] = {}
+        children = self._children
+
+        def get_children(k: NormalizedName) -> list[NormalizedName]:
+            direct[k], children[k] = self._get_node(k)
+            for child in children[k]:
+                self._parents.setdefault(child, set()).add(k)
+            return children[k]
+
+        for component in _iter_components(
+            key, get_children, self.resolved, self.allow_cycles
+        ):
+            resolved: set[NormalizedRequirement] = set()
+            for member in component:
+                resolved.update(direct[member])
+                for child in children[member]:
+                    # other components reachable from this one are already resolved
+                    if child in self.resolved:
+                        resolved.update(self.resolved[child])
+            for member in component:
+                self.resolved[member] = resolved
+
+        return self.resolved[key]
+
+    def resolve_all(self) -> dict[NormalizedName, set[NormalizedRequirement]]:
+        """Resolve every key. Returns mapping from key to its requirements."""
+        for key in self._get_table():
+            _ = self._resolve(key)
+        return dict(self.resolved)
+
+    def _set_unresolved(self, unresolved: Mapping[Any, Any]) -> set[NormalizedName]:
+        """Replace ``unresolved``. Returns keys added, removed, or changed."""
+        old = self._get_table()
+        self.unresolved = unresolved
+        return _changed_keys(old, self._get_table())
+
+    def invalidate(self, keys: Iterable[NormalizedName]) -> set[NormalizedName]:
+        """
+        Drop closures of ``keys`` and of all keys referencing them.
+
+        Returns
+        -------
+        set of str
+            Invalidated keys.
+        """
+        invalidated: set[NormalizedName] = set()
+        stack = list(keys)
+        while stack:
+            if (key := stack.pop()) in invalidated:
                 continue
-            if dep.name == self.package_name:
-                resolved.update(
-                    self._get_resolved_package_extras(
-                        map(canonicalize_name, dep.extras)
-                    )
-                )
-            else:
-                resolved.add(dep)
+            invalidated.add(key)
+            stack.extend(self._parents.get(key, ()))
+
+        for key in invalidated:
+            _ = self.resolved.pop(key, None)
+            for child in self._children.pop(key, ()):
+                self._parents.get(child, set()).discard(key)
+        return invalidated
+
+    def update(self, unresolved: Mapping[Any, Any]) -> set[NormalizedName]:
+        """
+        Replace ``unresolved``, keeping closures not affected by the change.
 
-        self.resolved[key] = resolved
-        return resolved
+        ``unresolved`` should be a new mapping (the current one is compared
+        against it).
+
+        Only keys which were added, removed, or changed, and keys referencing
+        them (directly or not), are resolved again on next lookup.
+
+        Returns
+        -------
+        set of str
+            Invalidated keys.
+        """
+        return self.invalidate(self._set_unresolved(unresolved))
 
     def __getitem__(self, key: str | Iterable[str]) -> set[NormalizedRequirement]:
         if isinstance(key, str):
@@ -106,37 +266,249 @@ class ResolveOptionalDependencies(_Resolve):
     unresolved: Mapping[NormalizedName, Sequence[NormalizedRequirement]]  # type: ignore[assignment]  # pyright: ignore[reportIncompatibleVariableOverride]
 
     @override
-    def _get_unresolved_deps(
-        self, key: NormalizedName
-    ) -> Iterable[NormalizedRequirement]:
-        yield from self.unresolved[key]
+    def _get_table(self) -> Mapping[NormalizedName, Any]:
+        return self.unresolved
 
     @override
-    def _get_resolved_package_extras(
-        self, extras: Iterable[NormalizedName]
-    ) -> Iterable[NormalizedRequirement]:
-        for e in extras:
-            yield from self._resolve(e)
+    def _get_node(
+        self, key: NormalizedName
+    ) -> tuple[set[NormalizedRequirement], list[NormalizedName]]:
+        deps: set[NormalizedRequirement] = set()
+        extras: list[NormalizedName] = []
+        for dep in self.unresolved[key]:
+            if dep.name == self.package_name:
+                extras.extend(map(canonicalize_name, dep.extras))
+            else:
+                deps.add(dep)
+        return deps, extras
 
 
 @dataclass
 class ResolveDependencyGroups(_Resolve):
     """Resolve ``dependency-groups``."""
 
+    allow_cycles: ClassVar[bool] = False
+
     optional_dependencies: ResolveOptionalDependencies
     _resolver: DependencyGroupResolver = field(init=False)
+    # extras of package referenced by each group
+    _extras: dict[NormalizedName, set[NormalizedName]] = field(
+        init=False,
+        repr=False,
+        default_factory=dict[NormalizedName, set[NormalizedName]],
+    )
 
     def __post_init__(self) -> None:
         self._resolver = DependencyGroupResolver(self.unresolved)
 
     @override
-    def _get_unresolved_deps(
-        self, key: NormalizedName
-    ) -> Iterable[NormalizedRequirement]:
-        return map(canonicalize_requirement, self._resolver.resolve(key))
+    def _set_unresolved(self, unresolved: Mapping[Any, Any]) -> set[NormalizedName]:
+        old = self._get_table()
+        self.unresolved = unresolved
+        self.__post_init__()
+        return _changed_keys(old, self._get_table())
 
     @override
-    def _get_resolved_package_extras(
-        self, extras: Iterable[NormalizedName]
-    ) -> Iterable[NormalizedRequirement]:
-        yield from self.optional_dependencies[extras]
+    def update(
+        self,
+        unresolved: Mapping[Any, Any],
+        optional_dependencies: Mapping[NormalizedName, Sequence[NormalizedRequirement]]
+        | None = None,
+    ) -> set[NormalizedName]:
+        """
+        Replace ``unresolved`` (and, optionally, unresolved optional dependencies).
+
+        Groups referencing extras invalidated by the change to
+        ``optional_dependencies`` are also invalidated.
+
+        Returns
+        -------
+        set of str
+            Invalidated groups.
+        """
+        changed = self._set_unresolved(unresolved)
+        if optional_dependencies is not None and (
+            extras := self.optional_dependencies.update(optional_dependencies)
+        ):
+            changed.update(
+                group
+                for group, refs in self._extras.items()
+                if not refs.isdisjoint(extras)
+            )
+        invalidated = self.invalidate(changed)
+        for group in invalidated:
+            _ = self._extras.pop(group, None)
+        return invalidated
+
+    @override
+    def _get_table(self) -> Mapping[NormalizedName, Any]:
+        return cast("Mapping[NormalizedName, Any]", self._resolver.dependency_groups)
+
+    @override
+    def _get_node(
+        self, key: NormalizedName
+    ) -> tuple[set[NormalizedRequirement], list[NormalizedName]]:
+        deps: set[NormalizedRequirement] = set()
+        groups: list[NormalizedName] = []
+        for item in self._resolver.lookup(key):
+            if isinstance(item, DependencyGroupInclude):
+                groups.append(canonicalize_name(item.include_group))
+            elif (dep := canonicalize_requirement(item)).name == self.package_name:
+                deps.update(self.optional_dependencies[dep.extras])
+                self._extras.setdefault(key, set()).update(
+                    map(canonicalize_name, dep.extras)
+                )
+            else:
+                deps.add(dep)
+        return deps, groups
+
+
+class RequirementConflictError(ValueError):
+    """
+    Requirements for the same package (and marker) which cannot be merged.
+
+    Parameters
+    ----------
+    conflicts : mapping
+        Map from package name to the conflicting requirements.
+    """
+
+    def __init__(
+        self, conflicts: Mapping[NormalizedName, Sequence[NormalizedRequirement]]
+    ) -> None:
+        self.conflicts = dict(conflicts)
+        super().__init__(
+            "; ".join(
+                f"Conflicting requirements for {name}: {', '.join(map(str, deps))}"
+                for name, deps in self.conflicts.items()
+            )
+        )
+
+
+# Operators of lower and upper bounds, mapped to whether they are inclusive.
+_LOWER_BOUNDS = {">=": True, ">": False}
+_UPPER_BOUNDS = {"<=": True, "<": False}
+
+
+def _tighter(
+    current: tuple[Version, bool, Specifier] | None,
+    bound: tuple[Version, bool, Specifier],
+    upper: bool,
+) -> tuple[Version, bool, Specifier]:
+    """Tighter of lower (or ``upper``) bounds ``current`` and ``bound``."""
+    if current is None:
+        return bound
+    if bound[0] == current[0]:
+        return current if not current[1] else bound
+    return bound if (bound[0] < current[0]) == upper else current
+
+
+def _intersect(specifiers: Iterable[SpecifierSet]) -> SpecifierSet | None:
+    """
+    Intersection of ``specifiers`` without redundant bounds.
+
+    Returns ``None`` if a pin is excluded by the other specifiers, or the
+    lower bound is above the upper bound. Anything more subtle is left to pip.
+    """
+    from packaging.specifiers import SpecifierSet
+    from packaging.version import Version
+
+    specifier = SpecifierSet()
+    for s in specifiers:
+        specifier &= s
+
+    if pins := [
+        spec
+        for spec in specifier
+        if spec.operator in {"==", "==="} and not spec.version.endswith(".*")
+    ]:
+        if all(specifier.contains(pin.version, prereleases=True) for pin in pins):
+            return SpecifierSet(",".join(map(str, pins)))
+        return None
+
+    lower: tuple[Version, bool, Specifier] | None = None
+    upper: tuple[Version, bool, Specifier] | None = None
+    other: list[Specifier] = []
+    for spec in specifier:
+        if spec.operator in _LOWER_BOUNDS:
+            bound = (Version(spec.version), _LOWER_BOUNDS[spec.operator], spec)
+            lower = _tighter(lower, bound, upper=False)
+        elif spec.operator in _UPPER_BOUNDS:
+            bound = (Version(spec.version), _UPPER_BOUNDS[spec.operator], spec)
+            upper = _tighter(upper, bound, upper=True)
+        else:
+            other.append(spec)
+
+    if (
+        lower is not None
+        and upper is not None
+        and not (
+            lower[0] < upper[0] or (lower[0] == upper[0] and lower[1] and upper[1])
+        )
+    ):
+        return None
+    other.extend(bound[2] for bound in (lower, upper) if bound is not None)
+    return SpecifierSet(",".join(map(str, other)))
+
+
+def _merge_group(
+    deps: Sequence[NormalizedRequirement],
+) -> NormalizedRequirement | None:
+    """Single requirement equivalent to ``deps``, or ``None`` if they conflict."""
+    if len(deps) == 1:
+        return deps[0]
+
+    urls = {dep.url for dep in deps}
+    if len(urls) > 1:
+        return None
+
+    if (specifier := _intersect(dep.specifier for dep in deps)) is None:
+        return None
+
+    first = deps[0]
+    extras = sorted(set().union(*(dep.extras for dep in deps)))
+    out = first.name + (f"[{','.join(extras)}]" if extras else "")
+    out += f" @ {first.url}" if first.url else str(specifier)
+    if first.marker is not None:
+        out += f" ; {first.marker}"
+    return NormalizedRequirement.from_string(out)
+
+
+def merge_requirements(
+    deps: Iterable[NormalizedRequirement],
+) -> list[NormalizedRequirement]:
+    """
+    Merge requirements for the same package.
+
+    Requirements with the same name and marker are combined into one, with
+    the intersection of their specifiers and the union of their extras.
+    Requirements with different markers are kept separate.
+
+    Returns
+    -------
+    list of NormalizedRequirement
+        Merged requirements, in order of first appearance.
+
+    Raises
+    ------
+    RequirementConflictError
+        If requirements for a package have different urls, or specifiers no
+        version can satisfy.
+    """
+    groups: dict[tuple[NormalizedName, str], list[NormalizedRequirement]] = {}
+    for dep in deps:
+        key = (dep.name, "" if dep.marker is None else str(dep.marker))
+        if dep not in (group := groups.setdefault(key, [])):
+            group.append(dep)
+
+    out: list[NormalizedRequirement] = []
+    conflicts: dict[NormalizedName, list[NormalizedRequirement]] = {}
+    for (name, _), group in groups.items():
+        if (merged := _merge_group(group)) is None:
+            conflicts.setdefault(name, []).extend(group)
+        else:
+            out.append(merged)
+
+    if conflicts:
+        raise RequirementConflictError(conflicts)
+    return out
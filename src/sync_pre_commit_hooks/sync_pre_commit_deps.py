@@ -5,23 +5,31 @@
 from __future__ import annotations
 
 from argparse import ArgumentParser
+from functools import partial
 from pathlib import Path
 from typing import TYPE_CHECKING, Any
 
 from ._logging import get_logger
 from ._utils import (
+    PreCommitConfigDocument,
+    add_lastversion_arguments,
     add_pre_commit_config_argument,
     add_yaml_arguments,
-    get_version_from_lastversion,
-    get_versions_from_requirements,
-    pre_commit_config_load,
-    pre_commit_config_repo_hook_iter,
+    hook_file_lock,
+)
+from ._versions import (
+    LastVersionLookup,
+    LocalIndex,
+    MappingSource,
+    RestrictedSource,
+    VersionRegistry,
+    get_file_sources,
 )
 
 if TYPE_CHECKING:
-    from collections.abc import Container, Sequence
+    from collections.abc import Iterable, Sequence
 
-    from ._typing import PreCommitConfigType
+    from ._utils import HookIndex
 
 ID_TO_PACKAGE = [
     "ruff-format:ruff",
@@ -35,14 +43,12 @@ logger = get_logger("sync-pre-commit-deps")
 
 
 def _get_versions_from_ids(
-    loaded: PreCommitConfigType,
-    hook_ids_from: Container[str],
+    index: HookIndex,
+    hook_ids_from: Iterable[str],
     id_to_package_mapping: dict[str, str],
 ) -> dict[str, str]:
     versions: dict[str, str] = {}
-    for repo, hook in pre_commit_config_repo_hook_iter(
-        loaded, include_hook_ids=hook_ids_from, exclude_repos={"local", "meta"}
-    ):
+    for repo, hook in index.iter_hooks(hook_ids_from, exclude=True):
         hid = hook["id"]
         # `mirrors-mypy` uses versions with a 'v' prefix, so we
         # have to strip it out to get the mypy version.
@@ -53,19 +59,6 @@ def _get_versions_from_ids(
     return versions
 
 
-def _get_versions_from_lastversion(dependencies: Sequence[str]) -> dict[str, Any]:
-    return {dep: get_version_from_lastversion(dep) for dep in dependencies}
-
-
-def _get_hook_ids(loaded: PreCommitConfigType) -> list[str]:
-    return [
-        hook["id"]
-        for _, hook in pre_commit_config_repo_hook_iter(
-            loaded,
-        )
-    ]
-
-
 def _limit_hooks(
     hook_ids: Sequence[str],
     include: Sequence[str],
@@ -86,44 +79,62 @@ def _parse_id_to_dep(id_to_package: Sequence[str]) -> dict[str, str]:
     return out
 
 
-def _update_yaml_file(
-    pre_commit_config: Path,
-    yaml_mapping: int,
-    yaml_sequence: int,
-    yaml_offset: int,
-    hook_include: Sequence[str],
-    hook_exclude: Sequence[str],
-    from_include: Sequence[str],
-    from_exclude: Sequence[str],
-    requirements: Path | None,
-    lastversion_dependencies: Sequence[str],
-    id_to_package_mapping: dict[str, str],
-) -> int:
-    loaded, yaml = pre_commit_config_load(
-        pre_commit_config,
-        mapping=yaml_mapping,
-        sequence=yaml_sequence,
-        offset=yaml_offset,
+def update_config(
+    index: HookIndex,
+    hook_include: Sequence[str] = (),
+    hook_exclude: Sequence[str] = (),
+    from_include: Sequence[str] = (),
+    from_exclude: Sequence[str] = (),
+    requirements: Path | Sequence[Path] | None = None,
+    lastversion_dependencies: Sequence[str] = (),
+    id_to_package_mapping: dict[str, str] | None = None,
+    lock: Path | Sequence[Path] | None = None,
+    from_env: Path | Sequence[Path] | None = None,
+    latest_lookup: LastVersionLookup | LocalIndex | None = None,
+) -> bool:
+    """
+    Update ``additional_dependencies`` in config. Returns ``True`` if updated.
+
+    Versions are taken from (in decreasing precedence) ``latest_lookup`` (for
+    ``lastversion_dependencies`` only), lock files, requirements files,
+    installed environments (``from_env``), and revisions of hooks.
+    """
+    hook_ids = index.hook_ids
+    hook_ids_update = set(
+        _limit_hooks(hook_ids, include=hook_include, exclude=hook_exclude)
     )
-
-    hook_ids = _get_hook_ids(loaded)
-    hook_ids_update = _limit_hooks(hook_ids, include=hook_include, exclude=hook_exclude)
     hook_ids_from = _limit_hooks(hook_ids, include=from_include, exclude=from_exclude)
 
-    versions = _get_versions_from_ids(loaded, hook_ids_from, id_to_package_mapping)
-    versions.update(get_versions_from_requirements(requirements))
-    versions.update(_get_versions_from_lastversion(lastversion_dependencies))
+    registry = VersionRegistry([
+        RestrictedSource(
+            latest_lookup or LastVersionLookup(), lastversion_dependencies
+        ),
+        *get_file_sources(requirements, lock, from_env),
+        MappingSource(
+            partial(
+                _get_versions_from_ids,
+                index,
+                hook_ids_from,
+                id_to_package_mapping or {},
+            ),
+            "hook revisions",
+        ),
+    ])
+    versions = registry.get_many(
+        name
+        for name, deps in index.dependencies.items()
+        if any(hook["id"] in hook_ids_update for hook, _ in deps)
+    )
 
     updated = False
-    for _repo, hook in pre_commit_config_repo_hook_iter(
-        loaded, include_hook_ids=hook_ids_update
-    ):
-        if "additional_dependencies" not in hook:
-            continue
+    for package, target_version in versions.items():
+        for hook, i in index.dependencies[package]:
+            if hook["id"] not in hook_ids_update:
+                continue
 
-        for i, dep in enumerate(hook["additional_dependencies"]):
+            dep = hook["additional_dependencies"][i]
             name, _, cur_version = dep.partition("==")
-            if (target_version := versions.get(name, cur_version)) != cur_version:
+            if target_version != cur_version:
                 name_and_version = type(dep)(f"{name}=={target_version}")
                 if hasattr(dep, "anchor"):
                     # pyrefly: ignore [missing-attribute]
@@ -137,11 +148,47 @@ def _update_yaml_file(
                 )
                 updated = True
 
-    if updated:
-        yaml.dump(loaded, pre_commit_config)  # pyright: ignore[reportUnknownMemberType]
-        return 1
+    return updated
+
 
-    return 0
+def _update_yaml_file(
+    pre_commit_config: Path,
+    yaml_mapping: int,
+    yaml_sequence: int,
+    yaml_offset: int,
+    hook_include: Sequence[str],
+    hook_exclude: Sequence[str],
+    from_include: Sequence[str],
+    from_exclude: Sequence[str],
+    requirements: Sequence[Path],
+    lastversion_dependencies: Sequence[str],
+    id_to_package_mapping: dict[str, str],
+    latest_lookup: LastVersionLookup | LocalIndex | None = None,
+    lock: Sequence[Path] = (),
+    from_env: Sequence[Path] = (),
+) -> int:
+    with hook_file_lock(pre_commit_config):
+        document = PreCommitConfigDocument.from_path(
+            pre_commit_config,
+            mapping=yaml_mapping,
+            sequence=yaml_sequence,
+            offset=yaml_offset,
+        )
+        _ = document.apply(
+            update_config,
+            hook_include=hook_include,
+            hook_exclude=hook_exclude,
+            from_include=from_include,
+            from_exclude=from_exclude,
+            requirements=requirements,
+            lastversion_dependencies=lastversion_dependencies,
+            id_to_package_mapping=id_to_package_mapping,
+            lock=lock,
+            from_env=from_env,
+            # shared between dry run and update
+            latest_lookup=latest_lookup or LastVersionLookup(),
+        )
+        return document.dump(logger)
 
 
 def _get_options(
@@ -189,8 +236,36 @@ def _get_options(
         "-r",
         "--requirements",
         type=Path,
-        default=None,
-        help="Requirements file to lookup pinned requirements to update.",
+        action="append",
+        default=[],
+        help="""
+        Requirements file to lookup pinned requirements to update. Can be
+        specified multiple times, with later files taking precedence.
+        """,
+    )
+    _ = parser.add_argument(
+        "--lock",
+        type=Path,
+        action="append",
+        default=[],
+        help="""
+        ``uv.lock`` (or ``script.py.lock``) file to lookup locked versions to
+        update. Can be specified multiple times, with later files taking
+        precedence. Takes precedence over ``--requirements``.
+        """,
+    )
+    _ = parser.add_argument(
+        "--from-env",
+        type=Path,
+        action="append",
+        default=[],
+        help="""
+        Python environment (for example, ``.venv``) or ``site-packages``
+        directory to lookup installed versions to update. Versions are read
+        from ``*.dist-info`` metadata (python is not run). Can be specified
+        multiple times, with later environments taking precedence.
+        ``--lock`` and ``--requirements`` take precedence over this.
+        """,
     )
     # use lastversion?
     _ = parser.add_argument(
@@ -200,10 +275,13 @@ def _get_options(
         action="append",
         default=[],
         help="""
-        Dependencies to lookup using `lastversion`. Requires network access and
-        `lastversion` to be installed.
+        Dependencies to lookup latest version of using `lastversion` (requires
+        network access and `lastversion` to be installed), or from ``--index``
+        if passed. `lastversion` lookups run concurrently and are cached on
+        disk.
         """,
     )
+    parser = add_lastversion_arguments(parser)
     _ = parser.add_argument(
         "-m",
         "--id-dep",
@@ -225,6 +303,14 @@ def _get_options(
 
     # updates
     kws["id_to_package_mapping"] = _parse_id_to_dep(kws.pop("id_dep"))
+    offline = kws.pop("offline")
+    lastversion_ttl = kws.pop("lastversion_ttl")
+    version_index = kws.pop("version_index")
+    kws["latest_lookup"] = (
+        LocalIndex(version_index)
+        if version_index is not None
+        else LastVersionLookup(offline=offline, ttl=lastversion_ttl)
+    )
 
     return kws
 
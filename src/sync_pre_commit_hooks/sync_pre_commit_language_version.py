@@ -8,17 +8,19 @@ from typing import TYPE_CHECKING
 
 from ._logging import get_logger
 from ._utils import (
+    PreCommitConfigDocument,
     add_pre_commit_config_argument,
     add_yaml_arguments,
     get_language_version,
-    pre_commit_config_load,
-    pre_commit_config_repo_hook_iter,
+    hook_file_lock,
 )
 
 if TYPE_CHECKING:
-    from collections.abc import Container, Sequence
+    from collections.abc import Iterable, Sequence
     from typing import Any
 
+    from ._utils import HookIndex
+
 logger = get_logger("sync-pre-commit-language-version")
 
 
@@ -70,23 +72,14 @@ def _get_options(argv: Sequence[str] | None = None) -> dict[str, Any]:
     return kws
 
 
-def _update_yaml_file(
-    pre_commit_config: Path,
-    hook_ids: Container[str],
+def update_config(
+    index: HookIndex,
+    hook_ids: Iterable[str],
     language_version: str,
-    yaml_mapping: int = 2,
-    yaml_sequence: int = 4,
-    yaml_offset: int = 2,
-) -> int:
-    loaded, yaml = pre_commit_config_load(
-        pre_commit_config,
-        mapping=yaml_mapping,
-        sequence=yaml_sequence,
-        offset=yaml_offset,
-    )
-
+) -> bool:
+    """Update ``language_version`` of ``hook_ids``. Returns ``True`` if updated."""
     updated = False
-    for _, hook in pre_commit_config_repo_hook_iter(loaded, include_hook_ids=hook_ids):
+    for _, hook in index.iter_hooks(hook_ids):
         if (
             language_version_current := hook.get("language_version")
         ) is not None and language_version != language_version_current:
@@ -99,12 +92,28 @@ def _update_yaml_file(
             hook["language_version"] = language_version
             updated = True
 
-    if updated:
-        logger.info("Updating %s", pre_commit_config)
-        yaml.dump(loaded, pre_commit_config)  # pyright: ignore[reportUnknownMemberType]
-        return 1
+    return updated
 
-    return 0
+
+def _update_yaml_file(
+    pre_commit_config: Path,
+    hook_ids: Iterable[str],
+    language_version: str,
+    yaml_mapping: int = 2,
+    yaml_sequence: int = 4,
+    yaml_offset: int = 2,
+) -> int:
+    with hook_file_lock(pre_commit_config):
+        document = PreCommitConfigDocument.from_path(
+            pre_commit_config,
+            mapping=yaml_mapping,
+            sequence=yaml_sequence,
+            offset=yaml_offset,
+        )
+        _ = document.apply(
+            update_config, hook_ids=hook_ids, language_version=language_version
+        )
+        return document.dump(logger)
 
 
 def main(argv: Sequence[str] | None = None) -> int:
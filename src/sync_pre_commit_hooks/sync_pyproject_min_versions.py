@@ -14,14 +14,20 @@ from pathlib import Path
 from subprocess import check_output
 from typing import TYPE_CHECKING
 
-from packaging.requirements import InvalidRequirement, Requirement
+from packaging.requirements import InvalidRequirement
 from packaging.utils import canonicalize_name
 
 from ._logging import get_logger
-from ._utils import get_versions_from_requirements
+from ._requirements import NormalizedRequirement
+from ._utils import (
+    get_versions_from_requirements,
+    hook_file_lock,
+    write_if_changed,
+)
+from ._versions import VersionRegistry, get_file_sources, get_versions_from_lock
 
 if TYPE_CHECKING:
-    from collections.abc import Callable, Container, Iterable, Sequence
+    from collections.abc import Callable, Container, Iterable, Mapping, Sequence
     from types import EllipsisType
     from typing import Any, Final, Literal
 
@@ -193,11 +199,11 @@ class Replacer:
     ) -> str:
         original_string = match.group(0)
         try:
-            dep = Requirement(match.group("inner"))
+            dep = NormalizedRequirement.from_string(match.group("inner"))
         except InvalidRequirement:
             return original_string
 
-        if (name := canonicalize_name(dep.name)) in ignore:
+        if (name := dep.name) in ignore:
             return original_string
 
         if include is not ... and name not in include:  # pragma: no cover  # pyrefly: ignore [not-iterable]
@@ -281,16 +287,26 @@ class Replacer:
         return contents
 
 
+def _to_paths(paths: Path | Iterable[Path] | None) -> tuple[Path, ...]:
+    if paths is None:
+        return ()
+    return (paths,) if isinstance(paths, Path) else tuple(paths)
+
+
 @dataclass(frozen=True)
 class Options:
-    requirements: Path | None = None
+    requirements: tuple[Path, ...] = ()
+    lock: tuple[Path, ...] = ()
+    from_env: tuple[Path, ...] = ()
     include: frozenset[NormalizedName] = field(default_factory=frozenset)
     exclude: frozenset[NormalizedName] = field(default_factory=frozenset)
     toml_paths: tuple[Path, ...] = field(default_factory=tuple)
     script_paths: tuple[Path, ...] = field(default_factory=tuple)
     script_lock: SCRIPT_LOCK = "infer"
 
-    def normalize_versions(self, versions: dict[str, str]) -> dict[NormalizedName, str]:
+    def normalize_versions(
+        self, versions: Mapping[str, str] | Mapping[NormalizedName, str]
+    ) -> dict[NormalizedName, str]:
         out = {canonicalize_name(name): version for name, version in versions.items()}
 
         if self.include:
@@ -308,16 +324,25 @@ class Options:
         return self.normalize_versions(get_versions_from_requirements(requirements))
 
     @cached_property
-    def versions(self) -> dict[NormalizedName, str]:
-        return (
-            self.get_versions_from_requirements(self.requirements)
-            if self.requirements
-            else {}
+    def registry(self) -> VersionRegistry:
+        return VersionRegistry(
+            get_file_sources(self.requirements, self.lock, self.from_env)
         )
 
-    def get_versions_from_script(self, script_path: Path) -> dict[NormalizedName, str]:
-        lock_exists = script_path.with_suffix(".py.lock").exists()
-        if self.script_lock == "force" or (self.script_lock == "infer" and lock_exists):
+    def get_versions(self, names: Iterable[str]) -> dict[NormalizedName, str]:
+        """Versions of ``names`` from requirements, lock files, and environments."""
+        return self.normalize_versions(self.registry.get_many(names))
+
+    def get_versions_from_script(
+        self, script_path: Path, names: Iterable[str] = ()
+    ) -> dict[NormalizedName, str]:
+        lock_path = script_path.with_suffix(".py.lock")
+        lock_exists = lock_path.exists()
+        if self.script_lock == "infer" and lock_exists:
+            logger.info("Read: %s", lock_path)
+            return self.normalize_versions(get_versions_from_lock(lock_path))
+
+        if self.script_lock == "force":
             import shlex
 
             args = [
@@ -333,12 +358,14 @@ class Options:
             return self.get_versions_from_requirements(
                 check_output(args).decode("utf-8")
             )
-        return self.versions
+        return self.get_versions(names)
 
     @classmethod
     def from_params(
         cls,
-        requirements: Path | None = None,
+        requirements: Path | Iterable[Path] | None = None,
+        lock: Path | Iterable[Path] | None = None,
+        from_env: Path | Iterable[Path] | None = None,
         include: Iterable[str] = (),
         exclude: Iterable[str] = (),
         paths: Iterable[Path] = (),
@@ -357,7 +384,9 @@ class Options:
                 logger.info("ignoring path %s", path)
 
         return cls(
-            requirements=requirements,
+            requirements=_to_paths(requirements),
+            lock=_to_paths(lock),
+            from_env=_to_paths(from_env),
             include=frozenset(canonicalize_name(x) for x in include),
             exclude=frozenset(canonicalize_name(x) for x in exclude),
             toml_paths=tuple(toml_paths),
@@ -376,7 +405,38 @@ class Options:
             "-r",
             "--requirements",
             type=Path,
-            help="Requirements file to extract locked versions from.",
+            action="append",
+            default=[],
+            help="""
+            Requirements file to extract locked versions from. Can be
+            specified multiple times, with later files taking precedence.
+            """,
+        )
+        _ = parser.add_argument(
+            "--lock",
+            type=Path,
+            action="append",
+            default=[],
+            help="""
+            ``uv.lock`` (or ``script.py.lock``) file to extract locked versions
+            from. Can be specified multiple times, with later files taking
+            precedence. Versions from lock files take precedence over those
+            from ``--requirements``.
+            """,
+        )
+        _ = parser.add_argument(
+            "--from-env",
+            type=Path,
+            action="append",
+            default=[],
+            help="""
+            Python environment (for example, ``.venv``) or ``site-packages``
+            directory to extract installed versions from. Versions are read
+            from ``*.dist-info`` metadata (python is not run). Can be
+            specified multiple times, with later environments taking
+            precedence. ``--lock`` and ``--requirements`` take precedence over
+            this.
+            """,
         )
         _ = parser.add_argument(
             "--include",
@@ -405,11 +465,12 @@ class Options:
             help="""
             How to determine locked dependencies for scripts.
 
-            * infer (default): Use ``uv export --frozen --script script.py`` if
-              ``script.py.lock`` exists or fallback to ``requirements``
-            * force: Use output of ``uv export --script script.py`` always.
-              Note that this may require network access.
-            * requirements:  Use passed ``--requirements`` file
+            * infer (default): Use versions locked in ``script.py.lock`` if it
+              exists or fallback to ``--requirements``/``--lock``/``--from-env``
+            * force: Use output of ``uv export --script script.py`` always
+              (with ``--frozen`` if ``script.py.lock`` exists). Note that this
+              requires ``uv`` and may require network access.
+            * requirements:  Use passed ``--requirements``/``--lock``/``--from-env``
             """,
         )
         _ = parser.add_argument(
@@ -420,6 +481,8 @@ class Options:
 
         return cls.from_params(
             requirements=opts.requirements,
+            lock=opts.lock,
+            from_env=opts.from_env,
             include=opts.include,
             exclude=opts.exclude,
             paths=opts.paths,
@@ -429,29 +492,57 @@ class Options:
 
 def _process_path(path: Path, replacer: Callable[[str], str]) -> None:
     logger.info("processing %s", path)
-    contents = path.read_text(encoding="utf-8")
-    out = replacer(contents)
-    if contents != out:
-        logger.info("update %s", path)
-        _ = path.write_text(out, encoding="utf-8")
-    else:
-        logger.info("no change %s", path)
+    with hook_file_lock(path):
+        contents = path.read_text(encoding="utf-8")
+        out = replacer(contents)
+        if contents != out:
+            logger.info("update %s", path)
+            _ = write_if_changed(path, out)
+        else:
+            logger.info("no change %s", path)
+
+
+def _get_requirement_name(match: re.Match[str]) -> NormalizedName | None:
+    try:
+        return NormalizedRequirement.from_string(match.group("inner")).name
+    except InvalidRequirement:
+        return None
+
+
+def _get_requirement_names(contents: str) -> set[NormalizedName]:
+    """Names of (possible) requirements in ``contents``."""
+    return {
+        name
+        for match in REQUIREMENT_REGEX.finditer(contents)
+        if (name := _get_requirement_name(match)) is not None
+    }
+
+
+def _replace_toml(contents: str, opts: Options) -> str:
+    if versions := opts.get_versions(_get_requirement_names(contents)):
+        return Replacer(versions).replace_contents(contents)
+    return contents
+
+
+def _replace_script(contents: str, opts: Options, path: Path) -> str:
+    names = _get_requirement_names(contents)
+    if versions := opts.get_versions_from_script(path, names):
+        return Replacer(versions).replace_contents_pep723(contents)
+    return contents
 
 
 def main(argv: Sequence[str] | None = None) -> bool:
     """Main function"""
     opts = Options.from_argv(argv)
 
-    if opts.toml_paths and opts.versions:
-        replacer = Replacer(opts.versions)
-        for path in opts.toml_paths:
-            _process_path(path=path, replacer=replacer.replace_contents)
+    # Only the versions of requirements found in the files are looked up.
+    for path in opts.toml_paths:
+        _process_path(path=path, replacer=partial(_replace_toml, opts=opts))
 
-    if (opts.versions or opts.script_lock in {"infer", "force"}) and opts.script_paths:
-        for path in opts.script_paths:
-            lock_replacer = Replacer(opts.get_versions_from_script(path))
-            if lock_replacer.versions:
-                _process_path(path=path, replacer=lock_replacer.replace_contents_pep723)
+    for path in opts.script_paths:
+        _process_path(
+            path=path, replacer=partial(_replace_script, opts=opts, path=path)
+        )
 
     return False
 
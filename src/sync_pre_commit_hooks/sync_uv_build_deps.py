@@ -10,22 +10,27 @@ from packaging.version import Version
 
 from ._logging import get_logger
 from ._utils import (
+    add_lastversion_arguments,
     add_pre_commit_config_argument,
     add_pyproject_argument,
-    get_version_from_lastversion,
-    pre_commit_config_load,
+    hook_file_lock,
+    pre_commit_config_load_safe,
+    toml_load,
+    write_if_changed,
 )
 
 if TYPE_CHECKING:
+    from argparse import Namespace
     from collections.abc import Sequence
     from pathlib import Path
-    from typing import Any
+
+    from ._versions import LastVersionLookup, LocalIndex
 
 
 logger = get_logger("sync-uv-build-deps")
 
 
-def _get_options(argv: Sequence[str] | None = None) -> tuple[Path, Path, bool]:
+def _get_options(argv: Sequence[str] | None = None) -> Namespace:
     from argparse import ArgumentParser
 
     parser = ArgumentParser(description=__doc__)
@@ -37,18 +42,20 @@ def _get_options(argv: Sequence[str] | None = None) -> tuple[Path, Path, bool]:
         "--lastversion",
         action="store_true",
         help="""
-        Use `lastversion` to get latest version of uv instead of syncing with
-        uv-pre-commit version from .pre-commit-config.yaml.
+        Use `lastversion` (or ``--index``) to get latest version of uv instead
+        of syncing with uv-pre-commit version from .pre-commit-config.yaml.
         """,
     )
+    parser = add_lastversion_arguments(parser)
 
     options = parser.parse_args(argv)
-
-    return options.pre_commit_config, options.pyproject, options.lastversion
+    if options.version_index is not None and not options.lastversion:
+        parser.error("--index requires --lastversion")
+    return options
 
 
 def _get_uv_version(pre_commit_config: Path) -> Version:
-    loaded, _ = pre_commit_config_load(pre_commit_config)
+    loaded = pre_commit_config_load_safe(pre_commit_config)
     for repo in loaded["repos"]:
         if repo["repo"].endswith("uv-pre-commit"):
             return Version(repo["rev"])
@@ -57,6 +64,13 @@ def _get_uv_version(pre_commit_config: Path) -> Version:
     raise ValueError(msg)
 
 
+def _get_latest_uv_version(lookup: LastVersionLookup | LocalIndex) -> Version:
+    if (version := lookup.get("uv")) is None:
+        msg = "No latest version of uv found"
+        raise ValueError(msg)
+    return Version(version)
+
+
 def _get_uv_build_dep(uv_version: Version) -> str:
     release = list(uv_version.release)
     release[1] += 1
@@ -67,39 +81,42 @@ def _get_uv_build_dep(uv_version: Version) -> str:
 
 
 def _update_pyproject(pyproject: Path, uv_build_dep: str) -> int:
-    from tomlkit.toml_file import TOMLFile
-
-    toml = TOMLFile(pyproject)
-
-    data: Any = toml.read()
-
-    # NOTE: modify in place to preserve formatting.
-    requires: list[str] = data["build-system"]["requires"]
-    for i, dep in enumerate(requires):
-        name = canonicalize_name(Requirement(dep).name)
-        if name == "uv-build" and dep != uv_build_dep:
-            logger.info("update %s to %s", dep, uv_build_dep)
-            index = i
-            break
-    else:
-        index = -1
-
-    if index >= 0:
-        requires[index] = uv_build_dep
-        toml.write(data)
-        return 1
-    return 0
+    with hook_file_lock(pyproject):
+        data, newline = toml_load(pyproject)
+
+        # NOTE: modify in place to preserve formatting.
+        requires: list[str] = data["build-system"]["requires"]
+        for i, dep in enumerate(requires):
+            name = canonicalize_name(Requirement(dep).name)
+            if name == "uv-build" and dep != uv_build_dep:
+                logger.info("update %s to %s", dep, uv_build_dep)
+                index = i
+                break
+        else:
+            index = -1
+
+        if index >= 0:
+            requires[index] = uv_build_dep
+            return int(write_if_changed(pyproject, data.as_string(), newline=newline))
+        return 0
 
 
 def main(argv: Sequence[str] | None = None) -> int:
     """Main function."""
-    pre_commit_config, pyproject, use_lastversion = _get_options(argv)
-
-    uv_version = (
-        Version(get_version_from_lastversion("uv"))
-        if use_lastversion
-        else _get_uv_version(pre_commit_config)
-    )
+    options = _get_options(argv)
+    pre_commit_config: Path = options.pre_commit_config
+    pyproject: Path = options.pyproject
+
+    if options.lastversion:
+        from ._versions import LastVersionLookup, LocalIndex
+
+        uv_version = _get_latest_uv_version(
+            LastVersionLookup(offline=options.offline, ttl=options.lastversion_ttl)
+            if options.version_index is None
+            else LocalIndex(options.version_index)
+        )
+    else:
+        uv_version = _get_uv_version(pre_commit_config)
 
     logger.info("pre_commit_config: %s", pre_commit_config)
     logger.info("pyproject: %s", pyproject)
@@ -13,7 +13,12 @@ from typing import TYPE_CHECKING
 from packaging.specifiers import Specifier
 
 from ._logging import get_logger
-from ._utils import get_language_version
+from ._utils import (
+    get_language_version,
+    hook_file_lock,
+    toml_load,
+    write_if_changed,
+)
 
 if TYPE_CHECKING:
     from collections.abc import Sequence
@@ -46,38 +51,34 @@ def _process_file(
     config_file: Path,
     python_version: str,
 ) -> int:
-    from tomlkit.toml_file import TOMLFile
-
     logger.info("Processing file %s", config_file)
 
-    toml = TOMLFile(config_file)
+    with hook_file_lock(config_file):
+        data, newline = toml_load(config_file)
 
-    data: Any = toml.read()
+        dependency_groups: dict[str, dict[str, Any]] | None = (
+            data["tool"]["uv"] if config_file.name == "pyproject.toml" else data
+        ).get("dependency-groups")
 
-    dependency_groups: dict[str, dict[str, Any]] | None = (
-        data["tool"]["uv"] if config_file.name == "pyproject.toml" else data
-    ).get("dependency-groups")
+        if dependency_groups is None:
+            logger.info("No dependency-group table found")
+            return 0
 
-    if dependency_groups is None:
-        logger.info("No dependency-group table found")
-        return 0
+        update = False
+        for k, v in dependency_groups.items():
+            if "requires-python" in v:
+                requires_python = v["requires-python"]
+                if requires_python != (
+                    new_spec := _update_spec(requires_python, python_version)
+                ):
+                    update = True
+                    logger.info("update %s from %s to %s", k, requires_python, new_spec)
+                    v["requires-python"] = new_spec
 
-    update = False
-    for k, v in dependency_groups.items():
-        if "requires-python" in v:
-            requires_python = v["requires-python"]
-            if requires_python != (
-                new_spec := _update_spec(requires_python, python_version)
-            ):
-                update = True
-                logger.info("update %s from %s to %s", k, requires_python, new_spec)
-                v["requires-python"] = new_spec
-
-    if update:
-        toml.write(data)
-        return 1
-
-    return 0
+        if update:
+            return int(write_if_changed(config_file, data.as_string(), newline=newline))
+
+        return 0
 
 
 def _get_options(argv: Sequence[str] | None = None) -> dict[str, Any]:
@@ -13,3 +13,13 @@ def create_config_file(
     cfg.write_text(contents, encoding="utf-8")
 
     return cfg
+
+
+def make_env(root: Path, versions: dict[str, str]) -> Path:
+    """Create virtual environment ``root`` with ``dist-info`` of ``versions``."""
+    site_packages = root / "lib" / "python3.13" / "site-packages"
+    site_packages.mkdir(parents=True)
+    for name, version in versions.items():
+        (site_packages / f"{name}-{version}.dist-info").mkdir()
+    (site_packages / "module").mkdir()
+    return root
@@ -16,3 +16,10 @@ def example_path(tmp_path: Path) -> Iterator[Path]:
     os.chdir(tmp_path)
     yield tmp_path
     os.chdir(old_cwd)
+
+
+@pytest.fixture(autouse=True)  # ruff:ignore[pytest-fixture-autouse]
+def cache_dir(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    path = tmp_path / "_cache"
+    monkeypatch.setenv("SYNC_PRE_COMMIT_HOOKS_CACHE_DIR", str(path))
+    return path
@@ -0,0 +1,192 @@
+from __future__ import annotations
+
+import json
+import os
+import time
+from typing import TYPE_CHECKING
+from unittest.mock import patch
+
+import pytest
+
+from sync_pre_commit_hooks._cache import (  # ruff:ignore[import-private-name]
+    JsonLRUCache,
+    ParsedFileCache,
+    get_cache_dir,
+)
+from sync_pre_commit_hooks._versions import (  # ruff:ignore[import-private-name]
+    get_versions_from_requirements_file,
+)
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+
+def test_get_cache_dir(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
+    monkeypatch.setenv("SYNC_PRE_COMMIT_HOOKS_CACHE_DIR", str(tmp_path / "a"))
+    assert get_cache_dir() == tmp_path / "a"
+
+    monkeypatch.delenv("SYNC_PRE_COMMIT_HOOKS_CACHE_DIR")
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "b"))
+    assert get_cache_dir() == tmp_path / "b" / "sync-pre-commit-hooks"
+
+    monkeypatch.delenv("XDG_CACHE_HOME")
+    monkeypatch.setenv("HOME", str(tmp_path / "c"))
+    monkeypatch.setenv("USERPROFILE", str(tmp_path / "c"))
+    monkeypatch.delenv("LOCALAPPDATA", raising=False)
+    assert get_cache_dir() == tmp_path / "c" / ".cache" / "sync-pre-commit-hooks"
+
+
+def test_json_lru_cache(tmp_path: Path) -> None:
+    path = tmp_path / "sub" / "cache.json"
+    cache = JsonLRUCache(path, max_size=2)
+    assert not cache.save()
+    assert not path.exists()
+
+    cache.set("a", 1)
+    cache.set("b", [2])
+    assert "a" in cache
+    assert cache.get("b") == [2]
+    assert cache.get("c", "default") == "default"
+    assert cache.last_used("c") is None
+    assert cache.save()
+
+    other = JsonLRUCache(path, max_size=2)
+    assert len(other) == other.max_size
+    assert other.get("a") == 1
+
+    # "b" was read after "a" was set
+    cache.set("c", 3)
+    assert cache.save()
+    assert len(cache) == cache.max_size
+    assert "a" not in cache
+
+    # concurrent writer: entries are merged, least recently used evicted
+    assert other.save()
+    assert set(json.loads(path.read_text())["entries"]) == {"a", "c"}
+
+
+@pytest.mark.parametrize("contents", ["not json", "[]", '{"version": 0}'])
+def test_json_lru_cache_bad_file(tmp_path: Path, contents: str) -> None:
+    path = tmp_path / "cache.json"
+    _ = path.write_text(contents)
+    cache = JsonLRUCache(path)
+    assert len(cache) == 0
+    cache.set("a")
+    assert cache.save()
+    assert JsonLRUCache(path).last_used("a") is not None
+
+
+def test_parsed_file_cache(tmp_path: Path, cache_dir: Path) -> None:
+    calls: list[bytes] = []
+
+    def parse(data: bytes) -> str:
+        calls.append(data)
+        return data.decode().upper()
+
+    path = tmp_path / "file.txt"
+    _ = path.write_text("abc")
+    cache = ParsedFileCache("test", parse, disk=True)
+
+    # freshly written: stat not trusted, but digest avoids re-parsing
+    assert cache.get(path) == "ABC"
+    assert cache.get(path) == "ABC"
+    assert calls == [b"abc"]
+
+    # same size and mtime but new contents is detected
+    mtime_ns = path.stat().st_mtime_ns
+    _ = path.write_text("xyz")
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+    assert cache.get(path) == "XYZ"
+    assert len(calls) == 2  # ruff:ignore[magic-value-comparison]
+
+    # old files are not read at all, including from a new process
+    old_ns = time.time_ns() - 10**10
+    os.utime(path, ns=(old_ns, old_ns))
+    assert cache.get(path) == "XYZ"
+    cache.clear()
+    assert cache.get(path) == "XYZ"
+    assert (
+        json.loads((cache_dir / "test.json").read_text())["entries"][
+            str(path.resolve())
+        ][1]["value"]
+        == "XYZ"
+    )
+
+    with patch.object(type(path), "read_bytes", side_effect=AssertionError):
+        assert ParsedFileCache("test", parse, disk=True).get(path) == "XYZ"
+    assert len(calls) == 2  # ruff:ignore[magic-value-comparison]
+
+
+def test_parsed_file_cache_not_cacheable(tmp_path: Path, cache_dir: Path) -> None:
+    path = tmp_path / "file.txt"
+    _ = path.write_text("abc")
+    cache = ParsedFileCache("test", bytes.decode, cacheable=lambda _: False, disk=True)
+
+    assert cache.get(path) == "abc"
+    assert not (cache_dir / "test.json").exists()
+
+
+def test_parsed_file_cache_unwritable(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    blocker = tmp_path / "blocker"
+    _ = blocker.write_text("")
+    monkeypatch.setenv("SYNC_PRE_COMMIT_HOOKS_CACHE_DIR", str(blocker / "cache"))
+    monkeypatch.setenv("SYNC_PRE_COMMIT_HOOKS_DISK_CACHE", "1")
+
+    path = tmp_path / "file.txt"
+    _ = path.write_text("abc")
+    cache = ParsedFileCache("test", bytes.decode)
+    assert cache.get(path) == "abc"
+    assert cache.get(path) == "abc"
+
+    (requirements := tmp_path / "requirements.txt").write_text("foo==1.0\n")
+    assert get_versions_from_requirements_file(requirements) == {"foo": "1.0"}
+
+
+@pytest.mark.parametrize(
+    ("env", "disk", "expected"),
+    [
+        (None, None, False),
+        ("1", None, True),
+        ("1", False, False),
+        (None, True, True),
+    ],
+)
+def test_parsed_file_cache_disk_opt_in(
+    tmp_path: Path,
+    cache_dir: Path,
+    monkeypatch: pytest.MonkeyPatch,
+    env: str | None,
+    disk: bool | None,
+    expected: bool,
+) -> None:
+    if env is None:
+        monkeypatch.delenv("SYNC_PRE_COMMIT_HOOKS_DISK_CACHE", raising=False)
+    else:
+        monkeypatch.setenv("SYNC_PRE_COMMIT_HOOKS_DISK_CACHE", env)
+    path = tmp_path / "file.txt"
+    _ = path.write_text("abc")
+    cache = ParsedFileCache("test", bytes.decode, disk=disk)
+
+    assert cache.get(path) == "abc"
+    assert cache.get(path) == "abc"
+    assert (cache_dir / "test.json").exists() == expected
+
+
+def test_parsed_file_cache_disk_loaded_once(tmp_path: Path, cache_dir: Path) -> None:
+    cache = ParsedFileCache("test", bytes.decode, disk=True)
+    old_ns = time.time_ns() - 10**10
+    for name in "abc":
+        _ = (path := tmp_path / name).write_text(name)
+        os.utime(path, ns=(old_ns, old_ns))
+        assert cache.get(path) == name
+    assert len(json.loads((cache_dir / "test.json").read_text())["entries"]) == 3  # ruff:ignore[magic-value-comparison]
+
+    # served from the disk cache loaded on the first lookup
+    cache.clear()
+    with (
+        patch.object(JsonLRUCache, "_read", side_effect=AssertionError),
+        patch.object(type(path), "read_bytes", side_effect=AssertionError),
+    ):
+        assert cache.get(tmp_path / "a") == "a"
@@ -0,0 +1,152 @@
+from __future__ import annotations
+
+import sys
+from typing import TYPE_CHECKING
+
+import pytest
+from packaging.markers import Marker
+
+from sync_pre_commit_hooks._markers import (  # ruff:ignore[import-private-name]
+    TargetEnvironment,
+    evaluate_marker,
+    get_environment,
+    get_targets,
+    parse_python_version,
+    prune_requirements,
+)
+from sync_pre_commit_hooks._requirements import (  # ruff:ignore[import-private-name]
+    NormalizedRequirement,
+)
+
+if TYPE_CHECKING:
+    from typing import Any
+
+
+@pytest.mark.parametrize(
+    ("version", "expected"),
+    [
+        ("3.12", "3.12"),
+        ("python3.12", "3.12"),
+        (" 3.12.1\n", "3.12.1"),
+        ("python3", None),
+        ("default", None),
+        ("system", None),
+    ],
+)
+def test_parse_python_version(version: str, expected: str | None) -> None:
+    assert parse_python_version(version) == expected
+
+
+def test_get_targets() -> None:
+    assert get_targets([], []) == [TargetEnvironment()]
+    assert get_targets(["3.12", "3.12"], ["linux", "win32"]) == [
+        TargetEnvironment("3.12", "linux"),
+        TargetEnvironment("3.12", "win32"),
+    ]
+
+
+def test_get_environment() -> None:
+    assert get_environment(TargetEnvironment()) == {}
+    assert get_environment(TargetEnvironment("3.12.1", "win32")) == {
+        "python_version": "3.12",
+        "python_full_version": "3.12.1",
+        "sys_platform": "win32",
+        "os_name": "nt",
+        "platform_system": "Windows",
+    }
+    assert get_environment(TargetEnvironment("3.12")) is get_environment(
+        TargetEnvironment("3.12")
+    )
+
+
+@pytest.mark.parametrize(
+    ("marker", "expected"),
+    [
+        ("python_version < '3.11'", [False, True, None, False]),
+        ("python_full_version < '3.11'", [False, True, None, False]),
+        ("python_full_version >= '3.12.2'", [None, False, None, False]),
+        ("python_full_version == '3.11.4'", [None, None, None, True]),
+        ("sys_platform == 'win32'", [None, False, True, None]),
+        ("'linux' in sys_platform", [None, True, False, None]),
+        (
+            "python_version < '3.11' or sys_platform == 'win32'",
+            [None, True, True, None],
+        ),
+        (
+            "python_version < '3.11' and sys_platform == 'win32'",
+            [False, False, None, False],
+        ),
+        (
+            "(python_version < '3.11' or python_version >= '3.13') and extra == 'test'",
+            [False, None, None, False],
+        ),
+        ("platform_machine == 'x86_64'", [None, None, None, None]),
+    ],
+)
+def test_evaluate_marker(marker: str, expected: list[bool | None]) -> None:
+    targets = [
+        TargetEnvironment("3.12"),
+        TargetEnvironment("3.10", "linux"),
+        TargetEnvironment(None, "win32"),
+        TargetEnvironment("3.11.4"),
+    ]
+    assert [evaluate_marker(Marker(marker), target) for target in targets] == expected
+
+
+class _OtherMarker:
+    """Stand-in for a marker from a ``packaging`` with different internals."""
+
+    def __init__(self, markers: object = None) -> None:
+        if markers is not None:
+            self._markers = markers
+
+    def __str__(self) -> str:
+        return "python_version < '3.0'"
+
+
+@pytest.mark.parametrize(
+    ("change", "marker"),
+    [
+        ("no variable", Marker("python_version < '3.0'")),
+        ("no markers", _OtherMarker()),
+        ("bad markers", _OtherMarker([("python_version",)])),
+        ("not a list", _OtherMarker("python_version < '3.0'")),
+    ],
+)
+def test_evaluate_marker_internals_changed(
+    monkeypatch: pytest.MonkeyPatch, change: str, marker: Any
+) -> None:
+    if change == "no variable":
+        monkeypatch.setitem(sys.modules, "packaging._parser", None)
+
+    evaluate_marker.cache_clear()
+    try:
+        # unknown, so requirements using the marker are kept
+        assert evaluate_marker(marker, TargetEnvironment("3.12")) is None
+    finally:
+        evaluate_marker.cache_clear()
+
+
+def test_prune_requirements() -> None:
+    deps = list(
+        map(
+            NormalizedRequirement.from_string,
+            [
+                "a",
+                "tomli; python_version < '3.11'",
+                "pywin32; sys_platform == 'win32'",
+                "b; platform_machine == 'arm64'",
+            ],
+        )
+    )
+    assert prune_requirements(deps, get_targets(["3.12"], [])) == [
+        deps[0],
+        deps[2],
+        deps[3],
+    ]
+    assert prune_requirements(deps, get_targets(["3.10", "3.12"], ["linux"])) == [
+        deps[0],
+        deps[1],
+        deps[3],
+    ]
+    assert prune_requirements(deps, [TargetEnvironment()]) == deps
@@ -3,17 +3,36 @@ from __future__ import annotations
 from contextlib import nullcontext
 from pathlib import Path
 from textwrap import dedent
-from typing import Any
+from typing import TYPE_CHECKING, Any
 from unittest.mock import patch
 
 import pytest
 
+from sync_pre_commit_hooks import (
+    fill_pre_commit_deps,
+    sync_pre_commit_deps,
+    sync_pre_commit_language_version,
+)
 from sync_pre_commit_hooks._utils import (  # ruff:ignore[import-private-name]
+    HookIndex,
+    PreCommitConfigDocument,
+    _SpanEditor,
+    file_lock,
+    get_in,
     get_language_version,
     get_version_from_lastversion,
     get_versions_from_requirements,
+    hook_file_lock,
+    pre_commit_config_load,
+    toml_load,
+    write_if_changed,
 )
 
+from ._utils import create_config_file
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Sequence
+
 
 @pytest.mark.parametrize(
     ("python_version", "python_version_file", "create_file", "expected"),
@@ -70,3 +89,404 @@ def test_get_versions_from_requirements(
     path = tmp_path / "requirements.txt"
     path.write_text(data)
     assert get_versions_from_requirements(path) == expected
+
+
+def test_get_versions_from_requirements_changed(tmp_path: Path) -> None:
+    path = tmp_path / "requirements.txt"
+    path.write_text("ruff==0.14.6\n")
+    assert get_versions_from_requirements(path) == {"ruff": "0.14.6"}
+
+    path.write_text("ruff==0.14.7\n")
+    assert get_versions_from_requirements(path) == {"ruff": "0.14.7"}
+
+
+def test_pre_commit_config_document(tmp_path: Path) -> None:
+    cfg = create_config_file(
+        tmp_path,
+        dedent("""\
+repos:
+  - repo: https://github.com/psf/black
+    rev: 23.3.0
+    hooks:
+      - id: black
+  - repo: https://github.com/adamchainz/blacken-docs
+    rev: 1.15.0
+    hooks:
+      - id: blacken-docs
+        language_version: "3.12"
+        additional_dependencies:
+          - black==23.2.0
+      - id: other
+        """),
+    )
+
+    document = PreCommitConfigDocument.from_path(cfg)
+    with patch.object(document.yaml, "dump", wraps=document.yaml.dump) as mocked:
+        assert document.apply(sync_pre_commit_deps.update_config)
+        assert document.apply(
+            sync_pre_commit_language_version.update_config,
+            hook_ids=["blacken-docs"],
+            language_version="3.13",
+        )
+        assert document.apply(
+            fill_pre_commit_deps.update_config, hook_id="other", deps=["a"]
+        )
+        assert not document.apply(
+            sync_pre_commit_language_version.update_config,
+            hook_ids=["blacken-docs"],
+            language_version="3.13",
+        )
+        assert document.dump() == 1
+        assert mocked.call_count == 1
+
+    assert cfg.read_text() == dedent("""\
+repos:
+  - repo: https://github.com/psf/black
+    rev: 23.3.0
+    hooks:
+      - id: black
+  - repo: https://github.com/adamchainz/blacken-docs
+    rev: 1.15.0
+    hooks:
+      - id: blacken-docs
+        language_version: "3.13"
+        additional_dependencies:
+          - black==23.3.0
+      - id: other
+        additional_dependencies:
+          - a
+        """)
+
+    document = PreCommitConfigDocument.from_path(cfg)
+    assert not document.apply(sync_pre_commit_deps.update_config)
+    with patch.object(document.yaml, "dump") as mocked:
+        assert document.dump() == 0
+        mocked.assert_not_called()
+
+
+@pytest.mark.parametrize(
+    ("language_version", "round_trip_calls", "expected"),
+    [
+        ("3.12", 0, 0),
+        ("3.13", 1, 1),
+    ],
+)
+def test_pre_commit_config_document_fast_check(
+    tmp_path: Path, language_version: str, round_trip_calls: int, expected: int
+) -> None:
+    from sync_pre_commit_hooks import _utils  # ruff:ignore[import-private-name]
+
+    s = dedent("""\
+repos:
+  - repo: https://github.com/adamchainz/blacken-docs
+    rev: 1.15.0
+    hooks:
+      - id: blacken-docs
+        language_version: "3.12"  # comment
+    """)
+    cfg = create_config_file(tmp_path, s)
+
+    with patch.object(
+        _utils, "_round_trip_yaml", wraps=_utils._round_trip_yaml
+    ) as mocked:
+        document = PreCommitConfigDocument.from_path(cfg)
+        for _ in range(2):
+            _ = document.apply(
+                sync_pre_commit_language_version.update_config,
+                hook_ids=["blacken-docs"],
+                language_version=language_version,
+            )
+        assert document.dump() == expected
+        assert mocked.call_count == round_trip_calls
+
+    assert cfg.read_text() == s.replace("3.12", language_version)
+
+
+@pytest.mark.parametrize("updated", [True, False])
+@pytest.mark.parametrize("raises", [True, False])
+def test_pre_commit_config_document_apply_logging(
+    tmp_path: Path, caplog: pytest.LogCaptureFixture, updated: bool, raises: bool
+) -> None:
+    import logging
+    import threading
+
+    logger = logging.getLogger("test-apply")
+    cfg = create_config_file(tmp_path, "repos: []\n")
+
+    def transform(index: HookIndex) -> bool:  # ruff:ignore[unused-function-argument]
+        logger.warning("transform message")
+        other = threading.Thread(target=logger.warning, args=("other thread",))
+        other.start()
+        other.join()
+        if raises:
+            msg = "transform error"
+            raise ValueError(msg)
+        return updated
+
+    document = PreCommitConfigDocument.from_path(cfg)
+    if raises:
+        with pytest.raises(ValueError, match="transform error"):
+            _ = document.apply(transform)
+    else:
+        assert document.apply(transform) == updated
+
+    assert caplog.messages.count("transform message") == 1
+    assert "other thread" in caplog.messages
+
+
+def _set_in(keys: Sequence[Any], value: Any) -> Callable[[Any], None]:
+    def func(config: Any) -> None:
+        get_in(keys[:-1], config)[keys[-1]] = value
+
+    return func
+
+
+def _replace_seq(keys: Sequence[Any], values: list[str]) -> Callable[[Any], None]:
+    def func(config: Any) -> None:
+        seq = get_in(keys, config)
+        seq.clear()
+        seq.extend(values)
+
+    return func
+
+
+SPAN_CONFIG = dedent("""\
+repos:
+    -   repo: https://github.com/adamchainz/blacken-docs
+        rev: 1.15.0   # comment
+        hooks:
+            -   id: blacken-docs
+                language_version: 3.12
+                additional_dependencies:
+                    - &black-dep black==23.2.0
+                    - "ruff==0.14.0"
+                    - mypy==1.0  # comment
+            -   id: other
+                args: [--a, "b", c]
+                additional_dependencies:
+                    - *black-dep
+                    - ruff==0.14.0
+""")
+
+
+@pytest.mark.parametrize(
+    ("func", "expected"),
+    [
+        pytest.param(
+            _set_in(["repos", 0, "rev"], "1.16.0"),
+            SPAN_CONFIG.replace("rev: 1.15.0", "rev: 1.16.0"),
+            id="plain",
+        ),
+        pytest.param(
+            _set_in(["repos", 0, "hooks", 0, "language_version"], "3.13"),
+            SPAN_CONFIG.replace("3.12", "'3.13'"),
+            id="plain needs quote",
+        ),
+        pytest.param(
+            _set_in(["repos", 0, "hooks", 0, "additional_dependencies", 0], "b==1"),
+            SPAN_CONFIG.replace("&black-dep black==23.2.0", "&black-dep b==1"),
+            id="anchor",
+        ),
+        pytest.param(
+            _set_in(["repos", 0, "hooks", 0, "additional_dependencies", 1], "r==1"),
+            SPAN_CONFIG.replace('"ruff==0.14.0"', '"r==1"'),
+            id="double quoted",
+        ),
+        pytest.param(
+            _set_in(["repos", 0, "hooks", 1, "args", 1], "x, y"),
+            SPAN_CONFIG.replace('"b"', '"x, y"'),
+            id="flow",
+        ),
+        pytest.param(
+            _set_in(["repos", 0, "hooks", 1, "args", 2], "x, y"),
+            SPAN_CONFIG.replace("c]", "'x, y']"),
+            id="flow plain",
+        ),
+        pytest.param(
+            _replace_seq(
+                ["repos", 0, "hooks", 1, "additional_dependencies"],
+                ["a", "b", "c"],
+            ),
+            None,
+            id="sequence with alias",
+        ),
+        pytest.param(
+            _replace_seq(
+                ["repos", 0, "hooks", 0, "additional_dependencies"],
+                ["a", "b"],
+            ),
+            None,
+            id="sequence with anchor",
+        ),
+        pytest.param(
+            _set_in(["repos", 0, "hooks", 1, "additional_dependencies", 0], "b==1"),
+            None,
+            id="alias",
+        ),
+        pytest.param(
+            _set_in(["repos", 0, "hooks", 1, "language_version"], "3.13"),
+            None,
+            id="new key",
+        ),
+        pytest.param(
+            _set_in(["repos", 0, "hooks", 1, "args"], ["a"]),
+            None,
+            id="new container",
+        ),
+    ],
+)
+def test_span_editor(func: Callable[[Any], None], expected: str | None) -> None:
+    config, _ = pre_commit_config_load(SPAN_CONFIG)  # type: ignore[arg-type]  # pyright: ignore[reportArgumentType]
+    editor = _SpanEditor(SPAN_CONFIG, config)
+    func(config)
+    assert editor.edit() == expected
+
+
+def test_span_editor_sequence() -> None:
+    s = dedent("""\
+repos:
+  - repo: local
+    hooks:
+      - id: other  # comment
+        additional_dependencies:
+          - a
+          - b  # comment
+          - "c"
+        args: ["--flag"]
+    """)
+    config, _ = pre_commit_config_load(s)  # type: ignore[arg-type]  # pyright: ignore[reportArgumentType]
+    editor = _SpanEditor(s, config)
+    _replace_seq(["repos", 0, "hooks", 0, "additional_dependencies"], ["x", "3.1"])(
+        config
+    )
+    assert editor.edit() is None
+
+    s = s.replace('  # comment\n          - "c"', "\n          - 'c'")
+    config, _ = pre_commit_config_load(s)  # type: ignore[arg-type]  # pyright: ignore[reportArgumentType]
+    editor = _SpanEditor(s, config)
+    _replace_seq(["repos", 0, "hooks", 0, "additional_dependencies"], ["x", "3.1"])(
+        config
+    )
+    assert editor.edit() == dedent("""\
+repos:
+  - repo: local
+    hooks:
+      - id: other  # comment
+        additional_dependencies:
+          - x
+          - '3.1'
+        args: ["--flag"]
+    """)
+
+
+def test_hook_index() -> None:
+    config: Any = {
+        "repos": [
+            {
+                "repo": "a",
+                "rev": "1",
+                "hooks": [
+                    {"id": "x", "additional_dependencies": ["Foo_Bar==1", "baz"]},
+                    {"id": "y"},
+                ],
+            },
+            {
+                "repo": "local",
+                "hooks": [{"id": "x", "additional_dependencies": ["foo-bar"]}],
+            },
+        ]
+    }
+    index = HookIndex(config)
+    repo_a, repo_local = config["repos"]
+    x_a, y_a = repo_a["hooks"]
+    x_local = repo_local["hooks"][0]
+
+    assert index.hook_ids == ["x", "y", "x"]
+    assert list(index.iter_hooks()) == [
+        (repo_a, x_a),
+        (repo_a, y_a),
+        (repo_local, x_local),
+    ]
+    assert list(index.iter_hooks(["y", "x"])) == list(index.iter_hooks())
+    assert list(index.iter_hooks("x", exclude=True)) == [(repo_a, x_a)]
+    assert not list(index.iter_hooks([]))
+    assert not list(index.iter_hooks("z"))
+
+    assert index.dependencies == {
+        "foo-bar": [(x_a, 0), (x_local, 0)],
+        "baz": [(x_a, 1)],
+    }
+
+
+def test_write_if_changed(tmp_path: Path) -> None:
+    path = tmp_path / "a.txt"
+    assert write_if_changed(path, "hello\n", newline="")
+    assert path.read_bytes() == b"hello\n"
+
+    path.chmod(0o640)
+    stat = path.stat()
+    with patch("tempfile.mkstemp") as mocked:
+        assert not write_if_changed(path, b"hello\n")
+        mocked.assert_not_called()
+
+    link = tmp_path / "link.txt"
+    link.symlink_to(path)
+    assert write_if_changed(link, "there\n", newline="\r\n")
+    assert link.is_symlink()
+    assert path.read_bytes() == b"there\r\n"
+    assert path.stat().st_mode == stat.st_mode
+    assert path.stat().st_ino != stat.st_ino
+    # no temporary files left behind
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["a.txt", "link.txt"]
+
+
+def test_file_lock_read_modify_write(tmp_path: Path) -> None:
+    import threading
+    import time
+
+    path = tmp_path / "count.txt"
+    _ = path.write_text("0")
+
+    def increment() -> None:
+        with file_lock(path):
+            count = int(path.read_text())
+            time.sleep(0.01)
+            _ = write_if_changed(path, str(count + 1))
+
+    threads = [threading.Thread(target=increment) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert path.read_text() == "8"
+    # no lock files left behind
+    assert [p.name for p in tmp_path.iterdir()] == ["count.txt"]
+
+
+@pytest.mark.parametrize("env", [None, "1"])
+def test_hook_file_lock(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch, env: str | None
+) -> None:
+    if env is None:
+        monkeypatch.delenv("SYNC_PRE_COMMIT_HOOKS_LOCK", raising=False)
+    else:
+        monkeypatch.setenv("SYNC_PRE_COMMIT_HOOKS_LOCK", env)
+
+    path = tmp_path / "a.txt"
+    with hook_file_lock(path):
+        _ = write_if_changed(path, "a")
+        locked = sorted(p.name for p in tmp_path.iterdir())
+    assert locked == (["a.txt"] if env is None else [".a.txt.lock", "a.txt"])
+    assert [p.name for p in tmp_path.iterdir()] == ["a.txt"]
+
+
+@pytest.mark.parametrize("newline", ["\n", "\r\n"])
+def test_toml_load(tmp_path: Path, newline: str) -> None:
+    path = tmp_path / "a.toml"
+    _ = path.write_bytes(f"[a]{newline}b = 1{newline}".encode())
+
+    data, newline_out = toml_load(path)
+    assert newline_out == newline
+    data["a"]["b"] = 2
+    assert write_if_changed(path, data.as_string(), newline=newline_out)
+    assert path.read_bytes() == f"[a]{newline}b = 2{newline}".encode()
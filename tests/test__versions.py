@@ -0,0 +1,360 @@
+from __future__ import annotations
+
+import json
+import threading
+from pathlib import Path
+from textwrap import dedent
+from unittest.mock import patch
+
+import pytest
+
+from sync_pre_commit_hooks._versions import (  # ruff:ignore[import-private-name]
+    LastVersionLookup,
+    LocalIndex,
+    MappingSource,
+    RestrictedSource,
+    VersionRegistry,
+    get_file_sources,
+    get_versions_from_env,
+    get_versions_from_lock,
+    iter_pinned_versions,
+)
+
+from ._utils import make_env
+
+
+class FakeBackend:
+    def __init__(
+        self, versions: dict[str, str], barrier: threading.Barrier | None = None
+    ) -> None:
+        self.versions = versions
+        self.barrier = barrier
+        self.calls: list[str] = []
+        self._lock = threading.Lock()
+
+    def __call__(self, name: str) -> str:
+        with self._lock:
+            self.calls.append(name)
+        if self.barrier is not None:
+            _ = self.barrier.wait(timeout=10)
+        return self.versions[name]
+
+
+def test_lastversion_lookup(cache_dir: Path) -> None:
+    # barrier only passes if "a" and "b" are looked up concurrently
+    backend = FakeBackend({"a": "1.0", "b": "2.0", "c": "3.0"}, threading.Barrier(2))
+
+    lookup = LastVersionLookup(backend, jobs=2)
+    assert lookup.get_many(["a", "b", "a"]) == {"a": "1.0", "b": "2.0"}
+    assert sorted(backend.calls) == ["a", "b"]
+    assert (cache_dir / "lastversion.json").exists()
+
+    # in memory
+    assert lookup.get("a") == "1.0"
+    assert len(backend.calls) == 2  # ruff:ignore[magic-value-comparison]
+
+    # on disk cache shared with new lookups
+    backend.barrier = None
+    backend.versions["a"] = "1.1"
+    assert LastVersionLookup(backend).get_many(["a", "c"]) == {"a": "1.0", "c": "3.0"}
+    assert backend.calls[2:] == ["c"]
+
+    # expired
+    assert LastVersionLookup(backend, ttl=0).get("a") == "1.1"
+
+
+def test_lastversion_lookup_offline(caplog: pytest.LogCaptureFixture) -> None:
+    backend = FakeBackend({"a": "1.0", "b": "2.0"})
+    assert LastVersionLookup(backend).get("a") == "1.0"
+
+    lookup = LastVersionLookup(backend, ttl=0, offline=True)
+    assert lookup.get_many(["a", "b"]) == {"a": "1.0"}
+    assert backend.calls == ["a"]
+    assert "No cached version of b" in caplog.text
+
+
+def test_lastversion_lookup_error() -> None:
+    backend = FakeBackend({"a": "1.0"})
+    with pytest.raises(KeyError):
+        _ = LastVersionLookup(backend, jobs=1).get_many(["a", "b"])
+
+    assert LastVersionLookup(backend, offline=True).get_many(["a", "b"]) == {"a": "1.0"}
+
+
+def test_lastversion_lookup_unwritable_cache(tmp_path: Path) -> None:
+    _ = (blocker := tmp_path / "blocker").write_text("")
+    cache_path = blocker / "lastversion.json"
+
+    backend = FakeBackend({"a": "1.0"})
+    assert LastVersionLookup(backend, cache_path=cache_path).get("a") == "1.0"
+    with pytest.raises(KeyError):
+        _ = LastVersionLookup(backend, cache_path=cache_path).get_many(["a", "b"])
+
+
+def test_lastversion_lookup_default_backend() -> None:
+    with patch("lastversion.latest", autospec=True, return_value="abc") as latest:
+        assert LastVersionLookup().get("ruff-unique") == "abc"
+    latest.assert_called_once_with("ruff-unique", output_format="tag")
+
+
+def _make_index(root: Path, kind: str) -> Path:
+    files = {
+        "foo-bar": [
+            "foo_bar-1.0-py3-none-any.whl",
+            "foo_bar-1.10.tar.gz",
+            "foo_bar-2.0rc1-py3-none-any.whl",
+        ],
+        "pre": ["pre-1.0a1.tar.gz"],
+        "other": ["not-a-dist.txt", "other-bad.tar.gz"],
+    }
+    root.mkdir()
+    for project, filenames in files.items():
+        if kind == "flat":
+            for filename in filenames:
+                (root / filename).touch()
+            continue
+
+        (project_dir := root / project).mkdir()
+        if kind == "files":
+            for filename in filenames:
+                (project_dir / filename).touch()
+        elif kind == "html":
+            links = "".join(
+                f'<a href="../../packages/{f}#sha256=abc">{f}</a><br/>'
+                for f in filenames
+            )
+            _ = (project_dir / "index.html").write_text(
+                f"<!DOCTYPE html><html><body>{links}</body></html>"
+            )
+        else:
+            _ = (project_dir / "index.json").write_text(
+                json.dumps({
+                    "meta": {"api-version": "1.0"},
+                    "name": project,
+                    "files": [
+                        {"filename": f, "url": f, "hashes": {}} for f in filenames
+                    ]
+                    + [{"filename": "foo_bar-3.0.tar.gz", "yanked": "bad"}],
+                })
+            )
+    return root
+
+
+@pytest.mark.parametrize("kind", ["flat", "files", "html", "json"])
+@pytest.mark.parametrize("as_url", [False, True])
+def test_local_index(
+    tmp_path: Path, kind: str, as_url: bool, caplog: pytest.LogCaptureFixture
+) -> None:
+    root = _make_index(tmp_path / "index", kind)
+    index = LocalIndex(root.as_uri() if as_url else root)
+    assert index.path == root
+    assert index.get_many(["Foo.Bar", "pre", "other", "missing"]) == {
+        "Foo.Bar": "1.10",
+        "pre": "1.0a1",
+    }
+    assert "No version of missing" in caplog.text
+    assert index.get("foo_bar") == "1.10"
+
+
+def test_local_index_missing(tmp_path: Path) -> None:
+    with pytest.raises(NotADirectoryError):
+        _ = LocalIndex(tmp_path / "missing").get("a")
+
+
+def test_get_versions_from_lock(tmp_path: Path) -> None:
+    path = tmp_path / "uv.lock"
+    _ = path.write_text(
+        dedent("""\
+        version = 1
+        revision = 3
+        requires-python = ">=3.10"
+
+        [[package]]
+        name = "project"
+        version = "0.1.0"
+        source = { editable = "." }
+
+        [[package]]
+        name = "numpy"
+        version = "2.2.6"
+        source = { registry = "https://pypi.org/simple" }
+        resolution-markers = ["python_full_version < '3.11'"]
+
+        [[package]]
+        name = "numpy"
+        version = "2.3.01"
+        source = { registry = "https://pypi.org/simple" }
+        resolution-markers = ["python_full_version >= '3.11'"]
+
+        [[package]]
+        name = "from-git"
+        version = "1.0"
+        source = { git = "https://github.com/example/from-git" }
+
+        [[package]]
+        name = "dynamic"
+        source = { virtual = "sub" }
+
+        [[package]]
+        name = "bad"
+        version = "not-a-version"
+        source = { registry = "https://pypi.org/simple" }
+        """)
+    )
+    assert get_versions_from_lock(path) == {"numpy": "2.3.01", "from-git": "1.0"}
+
+
+def _mapping_source(versions: dict[str, str], loaded: list[str]) -> MappingSource:
+    label = ",".join(versions)
+
+    def load() -> dict[str, str]:
+        loaded.append(label)
+        return versions
+
+    return MappingSource(load, label)
+
+
+def test_version_registry() -> None:
+    loaded: list[str] = []
+    registry = VersionRegistry([
+        _mapping_source({"Foo_Bar": "2.0"}, loaded),
+        _mapping_source({"foo-bar": "1.0", "baz": "1.0"}, loaded),
+        _mapping_source({"other": "1.0"}, loaded),
+    ])
+
+    assert registry.get_many(["foo.bar"]) == {"foo-bar": "2.0"}
+    assert loaded == ["Foo_Bar"]
+
+    assert registry.get_many(["baz", "missing", "foo-bar"]) == {
+        "baz": "1.0",
+        "foo-bar": "2.0",
+    }
+    assert registry.get("missing") is None
+    assert loaded == ["Foo_Bar", "foo-bar,baz", "other"]
+
+    assert registry.to_dict() == {"foo-bar": "2.0", "baz": "1.0", "other": "1.0"}
+
+    with pytest.raises(TypeError, match="Cannot list versions"):
+        _ = VersionRegistry([LastVersionLookup(offline=True)]).to_dict()
+
+
+def test_restricted_source() -> None:
+    backend = FakeBackend({"Ruff": "1.0", "black": "2.0"})
+    source = RestrictedSource(LastVersionLookup(backend, ttl=0), ["Ruff"])
+    registry = VersionRegistry([source])
+
+    assert registry.get_many(["ruff", "black"]) == {"ruff": "1.0"}
+    assert backend.calls == ["Ruff"]
+    assert RestrictedSource(source, []).get_many(["ruff"]) == {}
+
+
+def test_get_file_sources(tmp_path: Path) -> None:
+    paths = []
+    for i, version in enumerate(["1.0", "2.0"]):
+        path = tmp_path / f"requirements-{i}.txt"
+        _ = path.write_text(f"foo=={version}\nbar=={version}\n")
+        paths.append(path)
+    (lock := tmp_path / "uv.lock").write_text(
+        dedent("""\
+        [[package]]
+        name = "foo"
+        version = "3.0"
+        source = { registry = "https://pypi.org/simple" }
+        """)
+    )
+
+    assert [s.label for s in get_file_sources(paths, lock)] == [
+        str(lock),
+        str(paths[1]),
+        str(paths[0]),
+    ]
+    assert VersionRegistry(get_file_sources(paths, lock)).to_dict() == {
+        "foo": "3.0",
+        "bar": "2.0",
+    }
+    assert get_file_sources() == []
+
+
+def test_mapping_source_from_file(tmp_path: Path) -> None:
+    (requirements := tmp_path / "requirements.txt").write_text("foo==1.0\n")
+    (lock := tmp_path / "script.py.lock").write_text(
+        dedent("""\
+        [[package]]
+        name = "foo"
+        version = "2.0"
+        source = { registry = "https://pypi.org/simple" }
+        """)
+    )
+    assert MappingSource.from_file(requirements).versions == {"foo": "1.0"}
+    assert MappingSource.from_file(lock).versions == {"foo": "2.0"}
+
+
+@pytest.mark.parametrize(
+    ("line", "expected"),
+    [
+        pytest.param("foo==1.0", [("foo", "1.0")], id="simple"),
+        pytest.param("  Foo_Bar == 1!2.0+local  ", [("Foo_Bar", "1!2.0+local")]),
+        pytest.param("foo[a,b]===1.0.*", [("foo", "1.0.*")], id="extras"),
+        pytest.param(
+            "foo==1.0 ; python_version >= '3.11' \\",
+            [("foo", "1.0")],
+            id="marker",
+        ),
+        pytest.param("foo==1.0 --hash=sha256:abc  # comment", [("foo", "1.0")]),
+        pytest.param("    --hash=sha256:abc \\", [], id="hash"),
+        pytest.param("    # via bar", [], id="comment"),
+        pytest.param("", [], id="blank"),
+        # fallback
+        pytest.param("foo>=1.0,<2", [("foo", "1.0")], id="range"),
+        pytest.param("foo==1.0,", [("foo", "1.0")], id="trailing-comma"),
+        pytest.param("foo @ https://example.com/foo.whl", [], id="url"),
+        pytest.param("foo", [], id="unpinned"),
+    ],
+)
+def test_iter_pinned_versions(line: str, expected: list[tuple[str, str]]) -> None:
+    assert list(iter_pinned_versions([line])) == expected
+    assert list(iter_pinned_versions([line.encode()])) == expected
+
+
+def test_iter_pinned_versions_export() -> None:
+    lines = dedent("""\
+        # This file was autogenerated by uv via the following command:
+        #    uv export --generate-hashes
+        numpy==2.2.6 ; python_full_version < '3.11' \\
+            --hash=sha256:abc \\
+            --hash=sha256:def
+            # via project
+        numpy==2.3.1 ; python_full_version >= '3.11' \\
+            --hash=sha256:abc
+        --index-url https://example.com/simple
+        """)
+    with patch("requirements.parse", autospec=True, return_value=iter([])) as parse:
+        assert dict(iter_pinned_versions(lines.splitlines())) == {"numpy": "2.3.1"}
+    parse.assert_called_once_with("--index-url https://example.com/simple")
+
+
+def test_get_versions_from_env(tmp_path: Path) -> None:
+    env = make_env(tmp_path / ".venv", {"foo_bar": "1.2.3", "baz": "2.0"})
+    site_packages = env / "lib" / "python3.13" / "site-packages"
+    metadata_only = site_packages / "odd.dist-info"
+    metadata_only.mkdir()
+    _ = (metadata_only / "METADATA").write_text(
+        "Metadata-Version: 2.1\nName: Odd\nVersion: 0.1\n\nVersion: body\n"
+    )
+    (site_packages / "missing.dist-info").mkdir()
+
+    expected = {"foo_bar": "1.2.3", "baz": "2.0", "Odd": "0.1"}
+    assert get_versions_from_env(env) == expected
+    assert get_versions_from_env(site_packages) == expected
+
+    with pytest.raises(FileNotFoundError, match="No site-packages"):
+        _ = get_versions_from_env(tmp_path)
+    with pytest.raises(NotADirectoryError):
+        _ = get_versions_from_env(tmp_path / "missing")
+
+
+def test_get_versions_from_env_installed() -> None:
+    import packaging
+
+    site_packages = Path(packaging.__file__).parent.parent
+    assert get_versions_from_env(site_packages)["packaging"] == packaging.__version__
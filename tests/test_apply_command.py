@@ -1,7 +1,13 @@
 from __future__ import annotations
 
-from typing import TYPE_CHECKING
-from unittest.mock import call, patch
+import json
+import os
+import shlex
+import subprocess
+import sys
+from textwrap import dedent
+from typing import TYPE_CHECKING, Any
+from unittest.mock import patch
 
 import pytest
 
@@ -9,8 +15,16 @@ from sync_pre_commit_hooks import apply_command
 
 if TYPE_CHECKING:
     from collections.abc import Sequence
+    from pathlib import Path
 
 
+def _completed(
+    args: Sequence[str], returncode: int
+) -> subprocess.CompletedProcess[bytes]:
+    return subprocess.CompletedProcess(args, returncode, f"{args[-1]}\n".encode())
+
+
+@pytest.mark.parametrize("jobs", [["-j1"], ["--jobs=2"], []])
 @pytest.mark.parametrize(
     ("return_value", "return_code"),
     [
@@ -31,15 +45,452 @@ if TYPE_CHECKING:
     ],
 )
 def test_main(
+    capsys: pytest.CaptureFixture[str],
     argv: Sequence[str],
     files: Sequence[str],
     command: Sequence[str],
     return_value: int,
     return_code: int,
+    jobs: Sequence[str],
 ) -> None:
-    with patch("subprocess.call", return_value=return_value) as mocked_call:
-        assert apply_command.main([*argv, *files]) == return_code
+    def side_effect(args: Sequence[str], **kwargs: Any) -> Any:  # ruff:ignore[unused-function-argument]
+        return _completed(args, return_value)
 
-        assert mocked_call.call_args_list == [
-            call((*command, str(file))) for file in files
+    with patch("subprocess.run", side_effect=side_effect) as mocked_run:
+        assert apply_command.main([*jobs, *argv, *files]) == return_code
+
+        assert sorted(c.args[0] for c in mocked_run.call_args_list) == [
+            (*command, str(file)) for file in files
         ]
+
+    # output in input order
+    assert capsys.readouterr().out == "".join(f"{file}\n" for file in files)
+
+
+@pytest.mark.parametrize(
+    ("jobs", "expected_calls", "return_code"),
+    [
+        (["-j1"], ["a", "b"], 1),
+        (["-j1", "--fail-fast"], ["a"], 1),
+    ],
+)
+def test_main_fail_fast(
+    jobs: Sequence[str], expected_calls: Sequence[str], return_code: int
+) -> None:
+    def side_effect(args: Sequence[str], **kwargs: Any) -> Any:  # ruff:ignore[unused-function-argument]
+        return _completed(args, int(args[-1] == "a"))
+
+    with patch("subprocess.run", side_effect=side_effect) as mocked_run:
+        assert apply_command.main([*jobs, "cmd", "a", "b"]) == return_code
+        assert [c.args[0][-1] for c in mocked_run.call_args_list] == expected_calls
+
+
+@pytest.mark.parametrize(
+    ("batch_size", "max_args_bytes", "expected"),
+    [
+        (1, None, [["a"], ["bb"], ["ccc"], ["d"]]),
+        (2, None, [["a", "bb"], ["ccc", "d"]]),
+        (3, None, [["a", "bb", "ccc"], ["d"]]),
+        (0, None, [["a", "bb", "ccc", "d"]]),
+        # prefix "cmd" is 12 bytes, each path len + 9 bytes
+        (0, 12 + 12 + 10, [["a", "bb"], ["ccc", "d"]]),
+        (0, 12 + 10 + 11 - 1, [["a"], ["bb"], ["ccc"], ["d"]]),
+        (0, 1, [["a"], ["bb"], ["ccc"], ["d"]]),
+        (2, 1000, [["a", "bb"], ["ccc", "d"]]),
+    ],
+)
+def test_batch_commands(
+    batch_size: int, max_args_bytes: int | None, expected: list[list[str]]
+) -> None:
+    assert apply_command._batch_commands(
+        ["cmd"], ["a", "bb", "ccc", "d"], batch_size, max_args_bytes
+    ) == [("cmd", *batch) for batch in expected]
+
+
+def test_default_max_args_bytes() -> None:
+    assert (
+        apply_command._POSIX_ARG_MAX
+        <= apply_command._default_max_args_bytes()
+        <= max(os.sysconf("SC_ARG_MAX"), apply_command._WINDOWS_ARG_MAX)
+    )
+
+
+@pytest.mark.parametrize("jobs", [["-j1"], ["-j2"]])
+def test_main_batch(capsys: pytest.CaptureFixture[str], jobs: Sequence[str]) -> None:
+    def side_effect(args: Sequence[str], **kwargs: Any) -> Any:  # ruff:ignore[unused-function-argument]
+        return _completed(args, int("c" in args))
+
+    with patch("subprocess.run", side_effect=side_effect) as mocked_run:
+        assert apply_command.main([*jobs, "--batch-size=2", "cmd", "a", "b", "c"]) == 1
+        assert sorted(c.args[0] for c in mocked_run.call_args_list) == [
+            ("cmd", "a", "b"),
+            ("cmd", "c"),
+        ]
+
+    assert capsys.readouterr().out == "b\nc\n"
+
+
+@pytest.mark.parametrize("jobs", [["-j1"], ["-j3"]])
+def test_main_stderr(
+    capfdbinary: pytest.CaptureFixture[bytes], jobs: Sequence[str]
+) -> None:
+    command = shlex.join([
+        sys.executable,
+        "-c",
+        (
+            "import sys, time; name = sys.argv[-1]; "
+            "time.sleep(0.1 * (name == 'a')); "
+            "print('out', name); print('err', name, file=sys.stderr)"
+        ),
+    ])
+    assert apply_command.main([*jobs, command, "a", "b", "c"]) == 0
+
+    # streams kept apart, each in input order
+    captured = capfdbinary.readouterr()
+    assert captured.out.splitlines() == [b"out a", b"out b", b"out c"]
+    assert [x for x in captured.err.splitlines() if x.startswith(b"err")] == [
+        b"err a",
+        b"err b",
+        b"err c",
+    ]
+
+
+@pytest.fixture
+def python_module(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> str:
+    _ = (tmp_path / "_apply_target.py").write_text(
+        dedent(
+            """\
+            calls = []
+
+            def main(argv):
+                calls.append(argv)
+                if "fail" in argv:
+                    return 2
+                if "exit" in argv:
+                    raise SystemExit(3)
+                if "error" in argv:
+                    raise ValueError(argv)
+                return None
+
+            class ns:
+                main = main
+            """
+        ),
+        encoding="utf-8",
+    )
+    monkeypatch.syspath_prepend(str(tmp_path))
+    monkeypatch.delitem(sys.modules, "_apply_target", raising=False)
+    return "_apply_target"
+
+
+@pytest.mark.parametrize("attr", ["main", "ns.main"])
+@pytest.mark.parametrize(
+    ("args", "calls", "return_code"),
+    [
+        (["a", "b"], [["a"], ["b"]], 0),
+        (["--opt", "a", "b"], [["--opt", "a"], ["--opt", "b"]], 0),
+        (["--batch-size=0", "a", "b"], [["a", "b"]], 0),
+        (["a", "fail", "exit", "error"], [["a"], ["fail"], ["exit"], ["error"]], 6),
+        (["--fail-fast", "fail", "a"], [["fail"]], 2),
+        ([], [], 0),
+    ],
+)
+def test_main_python(
+    python_module: str,
+    attr: str,
+    args: Sequence[str],
+    calls: list[list[str]],
+    return_code: int,
+) -> None:
+    with patch("subprocess.run") as mocked_run:
+        assert (
+            apply_command.main(["--python", f"{python_module}:{attr}", *args])
+            == return_code
+        )
+        mocked_run.assert_not_called()
+
+    assert sys.modules[python_module].calls == calls
+
+
+@pytest.mark.parametrize(
+    "spec",
+    [
+        "_apply_target",
+        "_apply_target:",
+        "_apply_target:missing",
+        "_apply_target:calls",
+        "_no_such_module:main",
+    ],
+)
+def test_main_python_bad_spec(python_module: str, spec: str) -> None:  # ruff:ignore[unused-function-argument]
+    with pytest.raises(SystemExit, match="2"):
+        _ = apply_command.main(["--python", spec, "a"])
+
+
+def test_main_missing_command() -> None:
+    with pytest.raises(SystemExit, match="2"):
+        _ = apply_command.main(["cmd"])
+
+
+def test_main_cache(example_path: Path, cache_dir: Path) -> None:
+    for name in "abc":
+        _ = (example_path / name).write_text(name)
+
+    def side_effect(args: Sequence[str], **kwargs: Any) -> Any:  # ruff:ignore[unused-function-argument]
+        # "rewrite" a, fail on b
+        if args[-1] == "a":
+            _ = (example_path / "a").write_text("A")
+        return _completed(args, int(args[-1] == "b"))
+
+    def run(*args: str) -> list[str]:
+        with patch("subprocess.run", side_effect=side_effect) as mocked_run:
+            _ = apply_command.main(["-j1", *args, "cmd", "a", "b", "c"])
+        return [c.args[0][-1] for c in mocked_run.call_args_list]
+
+    assert run("--no-cache") == ["a", "b", "c"]
+    assert not cache_dir.exists()
+
+    assert run("--cache") == ["a", "b", "c"]
+    assert (cache_dir / "apply-command.json").exists()
+    assert run("--cache") == ["b"]
+    # different extras
+    assert run("--cache", "--opt") == ["a", "b", "c"]
+    assert run("--cache", "--opt") == ["b"]
+
+    _ = (example_path / "c").write_text("changed")
+    assert run("--cache") == ["b", "c"]
+    assert run() == ["a", "b", "c"]
+
+    # cache size
+    assert run("--cache", "--cache-size=0") == ["b"]
+    assert run("--cache") == ["a", "b", "c"]
+
+
+def test_main_cache_python(
+    example_path: Path,
+    python_module: str,
+) -> None:
+    _ = (example_path / "a").write_text("a")
+    for _ in range(2):
+        assert (
+            apply_command.main(["--cache", "--python", f"{python_module}:main", "a"])
+            == 0
+        )
+    assert sys.modules[python_module].calls == [["a"]]
+
+
+_UPPER = (
+    "import sys; data = sys.stdin.read(); "
+    "sys.stderr.write('fail\\n') if 'fail' in data else sys.stdout.write(data.upper()); "
+    "sys.exit('fail' in data)"
+)
+
+
+@pytest.mark.parametrize("jobs", [["-j1"], ["-j2"]])
+def test_main_filter(
+    capfdbinary: pytest.CaptureFixture[bytes],
+    example_path: Path,
+    jobs: Sequence[str],
+) -> None:
+    contents = {"a": "a\n", "b": "B\n", "c": "fail\n"}
+    for name, text in contents.items():
+        _ = (example_path / name).write_text(text)
+    mtime = (example_path / "b").stat().st_mtime_ns
+    os.utime(example_path / "b", ns=(mtime - 10**9, mtime - 10**9))
+
+    command = shlex.join([sys.executable, "-c", _UPPER])
+    failures = ["c", "missing"]
+    assert apply_command.main([
+        *jobs,
+        "--filter",
+        command,
+        *contents,
+        "missing",
+    ]) == len(failures)
+
+    assert (example_path / "a").read_text() == "A\n"
+    assert (example_path / "b").stat().st_mtime_ns == mtime - 10**9
+    assert (example_path / "c").read_text() == "fail\n"
+    # no temporary or lock files left behind
+    assert sorted(p.name for p in example_path.iterdir()) == list(contents)
+    captured = capfdbinary.readouterr()
+    assert b"fail\n" in captured.err
+    assert b"A\n" not in captured.out + captured.err
+
+
+def test_main_filter_empty_output(
+    capfdbinary: pytest.CaptureFixture[bytes], example_path: Path
+) -> None:
+    _ = (example_path / "a").write_text("a\n")
+    _ = (example_path / "empty").write_text("")
+
+    command = shlex.join([sys.executable, "-c", "import sys; sys.stdin.read()"])
+    assert apply_command.main(["--filter", command, "a", "empty"]) == 1
+
+    assert (example_path / "a").read_text() == "a\n"
+    assert b"no output" in capfdbinary.readouterr().err
+
+
+@pytest.mark.parametrize(
+    "args",
+    [
+        ["--batch-size=2", "cmd", "a"],
+        ["--python", "os:getcwd", "a"],
+    ],
+)
+def test_main_filter_incompatible(args: Sequence[str]) -> None:
+    with pytest.raises(SystemExit, match="2"):
+        _ = apply_command.main(["--filter", *args])
+
+
+@pytest.mark.parametrize("jobs", [["-j1"], ["-j2"]])
+def test_main_dispatch(
+    example_path: Path, capsys: pytest.CaptureFixture[str], jobs: Sequence[str]
+) -> None:
+    _ = (example_path / "pyproject.toml").write_text(
+        dedent(
+            """\
+            [tool.sync-pre-commit-hooks.apply-command]
+            "*.py" = ["fmt --py", "lint"]
+            "justfile" = "just --fmt"
+            """
+        )
+    )
+
+    def side_effect(args: Sequence[str], **kwargs: Any) -> Any:  # ruff:ignore[unused-function-argument]
+        return _completed(args, int(args[0] == "lint"))
+
+    with patch("subprocess.run", side_effect=side_effect) as mocked_run:
+        assert (
+            apply_command.main([
+                *jobs,
+                "--dispatch=*.txt=cat",
+                "--dispatch",
+                "sub/*.py = lint",
+                "--dispatch-config=pyproject.toml",
+                "a.py",
+                "sub/b.py",
+                "justfile",
+                "c.txt",
+                "other",
+            ])
+            == 2  # ruff:ignore[magic-value-comparison]
+        )
+        calls = [c.args[0] for c in mocked_run.call_args_list]
+
+    expected = [
+        ("cat", "c.txt"),
+        ("lint", "a.py"),
+        ("lint", "sub/b.py"),
+        ("fmt", "--py", "a.py"),
+        ("fmt", "--py", "sub/b.py"),
+        ("just", "--fmt", "justfile"),
+    ]
+    assert sorted(calls) == sorted(expected)
+    # phases run in order
+    assert [c[0] for c in calls] == [c[0] for c in expected]
+    assert capsys.readouterr().out == "".join(f"{c[-1]}\n" for c in expected)
+
+
+def test_main_dispatch_fail_fast(example_path: Path) -> None:  # ruff:ignore[unused-function-argument]
+    def side_effect(args: Sequence[str], **kwargs: Any) -> Any:  # ruff:ignore[unused-function-argument]
+        return _completed(args, int(args[0] == "lint"))
+
+    with patch("subprocess.run", side_effect=side_effect) as mocked_run:
+        assert (
+            apply_command.main([
+                "-j1",
+                "--fail-fast",
+                "--dispatch=*.py=lint",
+                "--dispatch=*.py=fmt",
+                "a.py",
+                "b.py",
+            ])
+            == 1
+        )
+    assert [c.args[0] for c in mocked_run.call_args_list] == [("lint", "a.py")]
+
+
+@pytest.mark.parametrize(
+    ("args", "config"),
+    [
+        (["--dispatch=*.py"], None),
+        (["--dispatch=*.py=lint", "--extra"], None),
+        (["--dispatch=*.py=lint", "--python=os:getcwd"], None),
+        (["--dispatch-config"], None),
+        (
+            ["--dispatch-config"],
+            '[tool.sync-pre-commit-hooks.apply-command]\n"*.py" = 1\n',
+        ),
+    ],
+)
+def test_main_dispatch_errors(
+    example_path: Path, args: Sequence[str], config: str | None
+) -> None:
+    if config is not None:
+        _ = (example_path / "pyproject.toml").write_text(config)
+    with pytest.raises(SystemExit, match="2"):
+        _ = apply_command.main([*args, "a.py"])
+
+
+@pytest.mark.parametrize("filter_", [[], ["--filter"]])
+def test_main_timeout(example_path: Path, filter_: Sequence[str]) -> None:
+    for name in ("fast", "slow"):
+        _ = (example_path / name).write_text(name)
+    command = shlex.join([
+        sys.executable,
+        "-c",
+        (
+            "import sys, time; data = sys.stdin.read(); "
+            "time.sleep(10 * ('slow' in sys.argv[-1] + data)); sys.stdout.write(data)"
+        ),
+    ])
+    assert (
+        apply_command.main([*filter_, "--timeout=0.5", command, "fast", "slow"])
+        == apply_command._TIMEOUT_RETURNCODE
+    )
+
+
+def test_main_timeout_python() -> None:
+    with pytest.raises(SystemExit, match="2"):
+        _ = apply_command.main(["--timeout=1", "--python=os:getcwd", "a"])
+
+
+@pytest.mark.parametrize(
+    ("values", "expected"),
+    [
+        ([], [0, 0, 0]),
+        ([1.0], [1.0, 1.0, 1.0]),
+        ([float(x) for x in range(1, 101)], [50.0, 95.0, 99.0]),
+        ([1.0, 2.0, 3.0, 4.0], [2.0, 4.0, 4.0]),
+    ],
+)
+def test_percentile(values: Sequence[float], expected: Sequence[float]) -> None:
+    assert [apply_command._percentile(values, q) for q in (50, 95, 99)] == expected
+
+
+def test_main_report(example_path: Path, caplog: pytest.LogCaptureFixture) -> None:
+    def side_effect(args: Sequence[str], **kwargs: Any) -> Any:  # ruff:ignore[unused-function-argument]
+        return _completed(args, int(args[-1] == "b"))
+
+    with patch("subprocess.run", side_effect=side_effect):
+        assert (
+            apply_command.main([
+                "-j1",
+                "--report=1",
+                "--report-json=report.json",
+                "cmd",
+                "a",
+                "b",
+            ])
+            == 1
+        )
+
+    data = json.loads((example_path / "report.json").read_text())
+    assert data["count"] == len(data["invocations"]) == 2  # ruff:ignore[magic-value-comparison]
+    assert [(x["args"], x["returncode"]) for x in data["invocations"]] == [
+        (["cmd", "a"], 0),
+        (["cmd", "b"], 1),
+    ]
+    assert data["p50"] <= data["p95"] <= data["p99"] <= data["total"]
+    assert "2 invocations in" in caplog.text
@@ -7,12 +7,13 @@ from textwrap import dedent
 from typing import TYPE_CHECKING
 
 import pytest
-from packaging.requirements import Requirement
+from packaging.utils import NormalizedName
 
 from sync_pre_commit_hooks import fill_pre_commit_deps as fill_deps
 from sync_pre_commit_hooks.fill_pre_commit_deps import (
     _limit_requirements,  # ruff:ignore[import-private-name]
 )
+from sync_pre_commit_hooks.resolve_dependencies import canonicalize_requirement
 
 from ._utils import create_config_file
 
@@ -66,14 +67,14 @@ def parser(example_pyproject: str) -> fill_deps.ParseDependencies:
             ["foo[a, b]", "bar_thing", "thing", "other"],
             [],
             [],
-            ["foo[a,b]", "bar_thing", "thing", "other"],
+            ["foo[a,b]", "bar-thing", "thing", "other"],
             id="noop",
         ),
         pytest.param(
             ["foo[a, b]", "bar_thing", "thing", "other"],
             ["foo"],
             [],
-            ["bar_thing", "thing", "other"],
+            ["bar-thing", "thing", "other"],
             id="exclude",
         ),
         pytest.param(
@@ -91,9 +92,9 @@ def test__limit_requirements(
     include: Sequence[str],
     expected: list[str],
 ) -> None:
+    requirements = map(canonicalize_requirement, deps)
     assert (
-        list(map(str, _limit_requirements(map(Requirement, deps), exclude, include)))
-        == expected
+        list(map(str, _limit_requirements(requirements, exclude, include))) == expected
     )
 
 
@@ -418,6 +419,136 @@ repos:
             1,
             id="requirements",
         ),
+        pytest.param(
+            [
+                "--hook=mypy",
+                "--group=type_check",
+                "--exclude=mypy",
+                "--no-project-dependencies",
+                "--requirements=requirements.txt",
+            ],
+            dedent("""\
+repos:
+  - repo: https://github.com/pre-commit/mirrors-mypy
+    rev: v1.19.0
+    hooks:
+      - id: mypy
+            """),
+            dedent("""\
+            foo >= 0.1
+            Foo[thing] == 0.2
+            pytest>=8
+            """),
+            dedent("""\
+repos:
+  - repo: https://github.com/pre-commit/mirrors-mypy
+    rev: v1.19.0
+    hooks:
+      - id: mypy
+        additional_dependencies:
+          - foo[thing]==0.2
+          - pytest>=8
+          - types-pyyaml
+            """),
+            1,
+            id="requirements merge",
+        ),
+        pytest.param(
+            [
+                "--hook=mypy",
+                "--no-project-dependencies",
+                "--requirements=requirements.txt",
+            ],
+            dedent("""\
+repos:
+  - repo: https://github.com/pre-commit/mirrors-mypy
+    rev: v1.19.0
+    hooks:
+      - id: mypy
+            """),
+            dedent("""\
+            foo<0.1
+            foo>=0.2
+            """),
+            dedent("""\
+repos:
+  - repo: https://github.com/pre-commit/mirrors-mypy
+    rev: v1.19.0
+    hooks:
+      - id: mypy
+            """),
+            1,
+            id="requirements conflict",
+        ),
+        pytest.param(
+            [
+                "--hook=mypy",
+                "--no-project-dependencies",
+                "--requirements=requirements.txt",
+                "--prune-markers",
+            ],
+            dedent("""\
+repos:
+  - repo: https://github.com/pre-commit/mirrors-mypy
+    rev: v1.19.0
+    hooks:
+      - id: mypy
+        language_version: python3.12
+            """),
+            dedent("""\
+            tomli; python_version < '3.11'
+            pywin32; sys_platform == 'win32'
+            foo>=1; python_version >= '3.11'
+            """),
+            dedent("""\
+repos:
+  - repo: https://github.com/pre-commit/mirrors-mypy
+    rev: v1.19.0
+    hooks:
+      - id: mypy
+        language_version: python3.12
+        additional_dependencies:
+          - foo>=1; python_version >= "3.11"
+          - pywin32; sys_platform == "win32"
+            """),
+            1,
+            id="prune markers language_version",
+        ),
+        pytest.param(
+            [
+                "--hook=mypy",
+                "--no-project-dependencies",
+                "--requirements=requirements.txt",
+                "--prune-markers",
+                "--python-version=3.10",
+                "--platform=linux",
+            ],
+            dedent("""\
+repos:
+  - repo: https://github.com/pre-commit/mirrors-mypy
+    rev: v1.19.0
+    hooks:
+      - id: mypy
+        language_version: python3.12
+            """),
+            dedent("""\
+            tomli; python_version < '3.11'
+            pywin32; sys_platform == 'win32'
+            foo>=1; python_version >= '3.11'
+            """),
+            dedent("""\
+repos:
+  - repo: https://github.com/pre-commit/mirrors-mypy
+    rev: v1.19.0
+    hooks:
+      - id: mypy
+        language_version: python3.12
+        additional_dependencies:
+          - tomli; python_version < "3.11"
+            """),
+            1,
+            id="prune markers options",
+        ),
     ],
 )
 def test_main(
@@ -441,3 +572,157 @@ def test_main(
     assert fill_deps.main((*options, *config_options)) == code
 
     assert pre_commit_config.read_text() == expected
+
+
+@pytest.mark.parametrize(
+    ("python_version_file", "expected"),
+    [
+        pytest.param(
+            "3.10\n3.12\n",
+            ['pywin32; sys_platform == "win32"', 'tomli; python_version < "3.11"'],
+            id="file",
+        ),
+        pytest.param(
+            None,
+            [
+                'foo; python_version < "3.10"',
+                'pywin32; sys_platform == "win32"',
+                'tomli; python_version < "3.11"',
+            ],
+            id="no file",
+        ),
+    ],
+)
+def test_main_prune_markers_python_version_file(
+    example_path: Path, python_version_file: str | None, expected: list[str]
+) -> None:
+    pre_commit_config = create_config_file(
+        example_path,
+        dedent("""\
+repos:
+  - repo: https://github.com/pre-commit/mirrors-mypy
+    rev: v1.19.0
+    hooks:
+      - id: mypy
+        """),
+    )
+    _ = create_config_file(
+        example_path,
+        "[project]\nname = 'package'\ndependencies = []\n",
+        name="pyproject.toml",
+    )
+    _ = create_config_file(
+        example_path,
+        "tomli; python_version < '3.11'\npywin32; sys_platform == 'win32'\nfoo; python_version < '3.10'\n",
+        name="requirements.txt",
+    )
+    if python_version_file is not None:
+        _ = create_config_file(
+            example_path, python_version_file, name=".python-version"
+        )
+
+    assert (
+        fill_deps.main(["--hook=mypy", "-r", "requirements.txt", "--prune-markers"])
+        == 1
+    )
+    assert pre_commit_config.read_text().splitlines()[6:] == [
+        f"          - {dep}" for dep in expected
+    ]
+
+
+def test_main_pin_from(example_path: Path, caplog: pytest.LogCaptureFixture) -> None:
+    pre_commit_config = create_config_file(
+        example_path,
+        dedent("""\
+repos:
+  - repo: https://github.com/pre-commit/mirrors-mypy
+    rev: v1.19.0
+    hooks:
+      - id: mypy
+        """),
+    )
+    _ = create_config_file(
+        example_path,
+        dedent("""\
+        [project]
+        name = "package"
+        dependencies = [
+            "Foo[b,a]>=1",
+            "bar>=2; python_version < '3.11'",
+            "baz<1",
+            "other",
+            "url @ https://example.com/url.tar.gz",
+        ]
+        """),
+        name="pyproject.toml",
+    )
+    _ = create_config_file(
+        example_path, "foo==1.0\nbar==2.0\nbaz==2.0\n", name="requirements.txt"
+    )
+    _ = create_config_file(
+        example_path,
+        dedent("""\
+        [[package]]
+        name = "foo"
+        version = "1.5"
+        source = { registry = "https://pypi.org/simple" }
+
+        [[package]]
+        name = "url"
+        version = "3.0"
+        source = { url = "https://example.com/url.tar.gz" }
+        """),
+        name="uv.lock",
+    )
+
+    options = ["--hook=mypy", "--pin-from=requirements.txt", "--pin-from=uv.lock"]
+    caplog.set_level("DEBUG")
+    assert fill_deps.main(options) == 1
+    assert pre_commit_config.read_text().splitlines()[5:] == [
+        "        additional_dependencies:",
+        '          - bar==2.0; python_version < "3.11"',
+        "          - baz<1",
+        "          - foo[a,b]==1.5",
+        "          - other",
+        "          - url @ https://example.com/url.tar.gz",
+    ]
+    assert "Locked version 2.0 does not satisfy baz<1" in caplog.text
+    assert "No locked version of other" in caplog.text
+    assert "No locked version of url" not in caplog.text
+    assert "Not pinning url requirement url @" in caplog.text
+
+
+def test_parsedependencies_update(
+    parser: fill_deps.ParseDependencies, example_pyproject: str
+) -> None:
+    from sync_pre_commit_hooks._compat import (  # ruff:ignore[import-private-name]
+        tomllib,
+    )
+
+    assert "c-0" in map(str, parser.pip_requirements(extras=[], groups=["dev"]))
+    optional_dependencies = parser.optional_dependencies
+    unchanged = optional_dependencies.unresolved[NormalizedName("other")]
+
+    data = tomllib.loads(example_pyproject.replace('"c_0"', '"c_1"'))
+    data["project"]["dependencies"] = ["dep_2"]
+    parser.update(data)
+
+    assert parser.optional_dependencies is optional_dependencies
+    assert optional_dependencies.unresolved[NormalizedName("other")] is unchanged
+    assert set(parser.dependency_groups.resolved) == {"test", "type-check"}
+    assert sorted(
+        map(str, parser.pip_requirements(extras=[], groups=["optional"]))
+    ) == [
+        "a-thing",
+        "b-0",
+        "b-1",
+        "b-thing",
+        "c-1",
+        "dep-2",
+        "other-0",
+        "other-1",
+    ]
+
+    data["project"]["name"] = "other"
+    parser.update(data)
+    assert parser.optional_dependencies is not optional_dependencies
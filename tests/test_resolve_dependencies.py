@@ -1,16 +1,29 @@
 # pylint: disable=bad-builtin
 from __future__ import annotations
 
+from typing import TYPE_CHECKING
+
 import pytest
+from dependency_groups import CyclicDependencyError
 from packaging.requirements import Requirement
 from packaging.utils import NormalizedName, canonicalize_name
 
+from sync_pre_commit_hooks._requirements import (  # ruff:ignore[import-private-name]
+    _INTERNED,
+    NormalizedRequirement,
+)
 from sync_pre_commit_hooks.resolve_dependencies import (
+    RequirementConflictError,
     ResolveDependencyGroups,
     ResolveOptionalDependencies,
+    _iter_components,  # ruff:ignore[import-private-name]
     canonicalize_requirement,
+    merge_requirements,
 )
 
+if TYPE_CHECKING:
+    from typing import Any
+
 
 @pytest.mark.parametrize(
     ("dep", "expected"),
@@ -22,6 +35,62 @@ from sync_pre_commit_hooks.resolve_dependencies import (
 )
 def test__canonicalize_requirement(dep: str, expected: str) -> None:
     assert str(canonicalize_requirement(Requirement(dep))) == expected
+    assert str(canonicalize_requirement(dep)) == expected
+
+
+@pytest.mark.parametrize(
+    "dep",
+    [
+        "foo",
+        "foo[b,a]>=1.0,<2",
+        "foo>=1; python_version < '3.10'",
+        "foo[a] @ https://example.com/foo.tar.gz ; sys_platform == 'linux'",
+    ],
+)
+def test_normalized_requirement_str(dep: str) -> None:
+    requirement = Requirement(dep)
+    assert str(NormalizedRequirement.from_requirement(requirement)) == str(requirement)
+
+
+def test_normalized_requirement_interned() -> None:
+    a = NormalizedRequirement.from_string("Foo_Bar[B, a]>=1")
+    assert NormalizedRequirement.from_string("Foo_Bar[B, a]>=1") is a
+    assert NormalizedRequirement.from_string("foo-bar[a,b]>=1") is a
+    assert canonicalize_requirement(Requirement("foo.bar[b,a] >= 1")) is a
+    assert a == NormalizedRequirement(Requirement("foo_bar[a,b]>=1"))
+    assert len({a, NormalizedRequirement(Requirement("foo-bar[a,b]>=1"))}) == 1
+    assert a != NormalizedRequirement.from_string("foo-bar[a,b]>=2")
+    assert a != "foo-bar[a,b]>=1"
+
+    assert a.name == "foo-bar"
+    assert a.extras == {"a", "b"}
+    assert str(a.specifier) == ">=1"
+    assert a.marker is None
+    assert a.url is None
+
+
+def test_normalized_requirement_interned_weakly() -> None:
+    import gc
+
+    a = NormalizedRequirement.from_string("Weak_Thing>=1")
+    assert _INTERNED["Weak_Thing>=1"] is a
+    assert _INTERNED["weak-thing>=1"] is a
+
+    del a
+    _ = gc.collect()
+    assert "Weak_Thing>=1" not in _INTERNED
+    assert "weak-thing>=1" not in _INTERNED
+
+
+def test_normalized_requirement_immutable() -> None:
+    a = NormalizedRequirement.from_string("foo")
+    with pytest.raises(AttributeError, match="immutable"):
+        a.name = NormalizedName("bar")
+    with pytest.raises(AttributeError, match="immutable"):
+        del a.name
+    with pytest.raises(AttributeError):
+        a.other = 1
+    assert a.name == "foo"
 
 
 @pytest.fixture
@@ -142,3 +211,233 @@ def test_parsedependencies_resolve_groups(
     expected: list[str],
 ) -> None:
     assert sorted(map(str, dependency_groups[groups])) == expected
+
+
+def _optional(
+    package_name: NormalizedName, deps: dict[str, list[str]]
+) -> ResolveOptionalDependencies:
+    return ResolveOptionalDependencies(
+        package_name=package_name,
+        unresolved={
+            canonicalize_name(k): list(
+                map(canonicalize_requirement, map(Requirement, v))
+            )
+            for k, v in deps.items()
+        },
+    )
+
+
+def test_optional_dependencies_cycles(package_name: NormalizedName) -> None:
+    optional_dependencies = _optional(
+        package_name,
+        {
+            "a": ["a_0", "package[a]", "package[b]"],
+            "b": ["b_0", "package[c]", "package[a]"],
+            "c": ["c_0"],
+            "d": ["package[b]"],
+        },
+    )
+    assert sorted(map(str, optional_dependencies["d"])) == ["a-0", "b-0", "c-0"]
+    resolved = optional_dependencies.resolved
+    assert resolved[NormalizedName("a")] is resolved[NormalizedName("b")]
+    assert {
+        k: sorted(map(str, v)) for k, v in optional_dependencies.resolve_all().items()
+    } == {
+        "a": ["a-0", "b-0", "c-0"],
+        "b": ["a-0", "b-0", "c-0"],
+        "c": ["c-0"],
+        "d": ["a-0", "b-0", "c-0"],
+    }
+
+
+def test_optional_dependencies_missing(package_name: NormalizedName) -> None:
+    optional_dependencies = _optional(package_name, {"a": ["package[missing]"]})
+    with pytest.raises(KeyError, match="missing"):
+        _ = optional_dependencies["a"]
+
+
+def test_resolve_deep(package_name: NormalizedName) -> None:
+    n = 1500  # deeper than the recursion limit
+    optional_dependencies = _optional(
+        package_name,
+        {f"extra-{i}": [f"dep-{i}", f"package[extra-{i + 1}]"] for i in range(n)}
+        | {f"extra-{n}": ["package[extra-0]"]},
+    )
+    assert len(optional_dependencies["extra-0"]) == n
+
+    dependency_groups = ResolveDependencyGroups(
+        package_name=package_name,
+        unresolved={
+            f"group-{i}": [f"group-dep-{i}", {"include-group": f"group-{i + 1}"}]
+            for i in range(n)
+        }
+        | {f"group-{n}": ["package[extra-0]"]},
+        optional_dependencies=optional_dependencies,
+    )
+    assert len(dependency_groups["group-0"]) == 2 * n
+    assert len(dependency_groups.resolve_all()) == n + 1
+
+
+def test_iter_components_long_chain() -> None:
+    import time
+
+    n = 50_000
+    keys = [NormalizedName(f"k-{i}") for i in range(n)]
+    children = {key: keys[i + 1 : i + 2] for i, key in enumerate(keys)}
+
+    start = time.perf_counter()
+    components = list(_iter_components(keys[0], children.__getitem__, set()))
+    elapsed = time.perf_counter() - start
+
+    assert components == [[key] for key in reversed(keys)]
+    # linear in chain length (quadratic splitting took about 20 s)
+    assert elapsed < 5  # ruff:ignore[magic-value-comparison]
+
+
+@pytest.mark.parametrize(
+    "groups",
+    [
+        pytest.param({"a": [{"include-group": "a"}]}, id="self"),
+        pytest.param(
+            {"a": [{"include-group": "b"}], "b": ["x", {"include-group": "a"}]},
+            id="mutual",
+        ),
+    ],
+)
+def test_dependency_groups_cycle(
+    package_name: NormalizedName,
+    optional_dependencies: ResolveOptionalDependencies,
+    groups: dict[str, Any],
+) -> None:
+    dependency_groups = ResolveDependencyGroups(
+        package_name=package_name,
+        unresolved=groups,
+        optional_dependencies=optional_dependencies,
+    )
+    with pytest.raises(CyclicDependencyError):
+        _ = dependency_groups["a"]
+
+
+def test_dependency_groups_missing(
+    dependency_groups: ResolveDependencyGroups,
+) -> None:
+    with pytest.raises(LookupError, match="not found"):
+        _ = dependency_groups["missing"]
+
+
+def test_optional_dependencies_update(
+    optional_dependencies: ResolveOptionalDependencies,
+) -> None:
+    resolved = optional_dependencies.resolve_all()
+    unresolved = dict(optional_dependencies.unresolved)
+    unresolved[NormalizedName("other")] = [canonicalize_requirement(Requirement("x"))]
+
+    assert optional_dependencies.update(unresolved) == {
+        "other",
+        "b-option",
+        "a-option",
+        "all",
+    }
+    assert optional_dependencies.resolved == {
+        k: v for k, v in resolved.items() if k == "c-option"
+    }
+    assert sorted(map(str, optional_dependencies["all"])) == [
+        "a-thing",
+        "b-0",
+        "b-1",
+        "b-thing",
+        "c-0",
+        "x",
+    ]
+
+    # removed
+    unresolved = dict(unresolved)
+    del unresolved[NormalizedName("c-option")]
+    assert optional_dependencies.update(unresolved) == {"c-option", "a-option", "all"}
+    with pytest.raises(KeyError):
+        _ = optional_dependencies["all"]
+
+
+def test_dependency_groups_update(
+    dependency_groups: ResolveDependencyGroups,
+    optional_dependencies: ResolveOptionalDependencies,
+) -> None:
+    _ = dependency_groups.resolve_all()
+    groups = dict(dependency_groups.unresolved)
+
+    groups["test"] = ["pytest", "pytest-cov"]
+    assert dependency_groups.update(groups) == {"test", "dev"}
+    assert dependency_groups.update(groups) == set()
+    assert "pytest-cov" in map(str, dependency_groups["dev"])
+
+    # change to extras invalidates groups using them
+    extras = dict(optional_dependencies.unresolved)
+    extras[NormalizedName("c-option")] = [canonicalize_requirement(Requirement("y"))]
+    assert dependency_groups.update(groups, extras) == {"optional", "dev"}
+    assert sorted(map(str, dependency_groups["optional"])) == [
+        "a-thing",
+        "b-0",
+        "b-1",
+        "b-thing",
+        "other-0",
+        "other-1",
+        "y",
+    ]
+
+
+@pytest.mark.parametrize(
+    ("deps", "expected"),
+    [
+        pytest.param(["a", "b>1", "a"], ["a", "b>1"], id="unique"),
+        pytest.param(["a>=1", "A>=2", "A"], ["a>=2"], id="lower bound"),
+        pytest.param(["a<3", "a<=2", "a>1"], ["a<=2,>1"], id="bounds"),
+        pytest.param(["a<=2", "a<2", "a<=2"], ["a<2"], id="exclusive bound"),
+        pytest.param(["a>=1,<3,!=2", "a~=1.1"], ["a!=2,<3,>=1,~=1.1"], id="other"),
+        pytest.param(["a==1.0", "a>=1,<2", "a==1"], ["a==1"], id="pin"),
+        pytest.param(["a>=1,<=1"], ["a<=1,>=1"], id="single"),
+        pytest.param(["a[x]", "a[y]>1", "b[x]"], ["a[x,y]>1", "b[x]"], id="extras"),
+        pytest.param(
+            ["a>1", "a<1; python_version < '3.10'"],
+            ["a>1", 'a<1; python_version < "3.10"'],
+            id="markers",
+        ),
+        pytest.param(
+            ["a @ https://x/a.tar.gz", "a[b] @ https://x/a.tar.gz"],
+            ["a[b] @ https://x/a.tar.gz"],
+            id="url",
+        ),
+    ],
+)
+def test_merge_requirements(deps: list[str], expected: list[str]) -> None:
+    assert (
+        list(map(str, merge_requirements(map(canonicalize_requirement, deps))))
+        == expected
+    )
+
+
+@pytest.mark.parametrize(
+    ("deps", "conflicts"),
+    [
+        pytest.param(["a==1", "a==2", "b"], ["a==1", "a==2"], id="pins"),
+        pytest.param(["a==1", "a>1"], ["a==1", "a>1"], id="pin excluded"),
+        pytest.param(["a<1", "b", "a>=2"], ["a<1", "a>=2"], id="bounds"),
+        pytest.param(["a>=1", "a<1"], ["a>=1", "a<1"], id="same bound"),
+        pytest.param(
+            ["a @ https://x/a.tar.gz", "a @ https://y/a.tar.gz"],
+            ["a @ https://x/a.tar.gz", "a @ https://y/a.tar.gz"],
+            id="urls",
+        ),
+        pytest.param(
+            ["a @ https://x/a.tar.gz", "a>1"],
+            ["a @ https://x/a.tar.gz", "a>1"],
+            id="url",
+        ),
+    ],
+)
+def test_merge_requirements_conflict(deps: list[str], conflicts: list[str]) -> None:
+    with pytest.raises(
+        RequirementConflictError, match="Conflicting requirements for a"
+    ) as e:
+        _ = merge_requirements(map(canonicalize_requirement, deps))
+    assert list(e.value.conflicts) == ["a"]
+    assert list(map(str, e.value.conflicts[NormalizedName("a")])) == conflicts
@@ -11,11 +11,12 @@ import ruamel.yaml
 
 from sync_pre_commit_hooks import sync_pre_commit_deps
 from sync_pre_commit_hooks._utils import (  # ruff:ignore[import-private-name]
+    HookIndex,
     pre_commit_config_load,
 )
 from sync_pre_commit_hooks.sync_pre_commit_deps import main
 
-from ._utils import create_config_file
+from ._utils import create_config_file, make_env
 
 if TYPE_CHECKING:
     from collections.abc import Sequence
@@ -51,7 +52,7 @@ def test__get_versions_from_ids(
 ) -> None:
     assert (
         sync_pre_commit_deps._get_versions_from_ids(
-            loaded_simple,
+            HookIndex(loaded_simple),
             hook_ids_from,
             {"ruff-check": "ruff", "ruff-format": "ruff-abc"},
         )
@@ -59,24 +60,6 @@ def test__get_versions_from_ids(
     )
 
 
-def test__lastversion() -> None:
-    with patch("lastversion.latest", autospec=True, return_value="abc"):
-        assert sync_pre_commit_deps._get_versions_from_lastversion(["ruff"]) == {
-            "ruff": "abc"
-        }
-
-
-def test__get_hook_ids(loaded_simple: PreCommitConfigType) -> None:
-    assert sync_pre_commit_deps._get_hook_ids(loaded_simple) == [
-        "black",
-        "blacken-docs",
-        "ruff-check",
-        "ruff-format",
-        "doccmd",
-        "test",
-    ]
-
-
 @pytest.mark.parametrize(
     ("include", "exclude", "expected"),
     [
@@ -399,3 +382,119 @@ def test_main_from_to(
 
         with cfg.open(encoding="utf-8") as f:
             assert f.read() == text_out
+
+
+@pytest.mark.parametrize("offline", [[], ["--offline"]])
+def test_main_index(tmp_path: Path, offline: Sequence[str]) -> None:
+    index = tmp_path / "wheels"
+    index.mkdir()
+    for filename in ("black-24.1.0-py3-none-any.whl", "ruff-0.15.0.tar.gz"):
+        (index / filename).touch()
+
+    cfg = create_config_file(
+        tmp_path,
+        dedent("""\
+repos:
+  - repo: https://github.com/adamchainz/blacken-docs
+    rev: 1.15.0
+    hooks:
+      - id: blacken-docs
+        additional_dependencies:
+          - black==23.2.0
+          - ruff==0.14.2
+            """),
+    )
+    with patch("lastversion.latest") as latest:
+        assert main([
+            f"--config={cfg}",
+            f"--index={index.as_uri()}",
+            *offline,
+            "-l",
+            "black",
+            "-l",
+            "ruff",
+        ])
+        latest.assert_not_called()
+
+    assert "black==24.1.0" in cfg.read_text()
+    assert "ruff==0.15.0" in cfg.read_text()
+
+
+def test_main_lock(tmp_path: Path) -> None:
+    lock = tmp_path / "uv.lock"
+    _ = lock.write_text(
+        dedent("""\
+        version = 1
+
+        [[package]]
+        name = "black"
+        version = "25.1.0"
+        source = { registry = "https://pypi.org/simple" }
+        """)
+    )
+    requirements = tmp_path / "requirements.txt"
+    _ = requirements.write_text("black==24.1.0\nruff==0.15.0\n")
+
+    cfg = create_config_file(
+        tmp_path,
+        dedent("""\
+repos:
+  - repo: https://github.com/adamchainz/blacken-docs
+    rev: 1.15.0
+    hooks:
+      - id: blacken-docs
+        additional_dependencies:
+          - black==23.2.0
+          - ruff==0.14.2
+            """),
+    )
+    assert main([f"--config={cfg}", f"--lock={lock}", f"--requirements={requirements}"])
+    assert "black==25.1.0" in cfg.read_text()
+    assert "ruff==0.15.0" in cfg.read_text()
+
+
+def test_main_multiple_requirements(tmp_path: Path) -> None:
+    first = tmp_path / "requirements.txt"
+    _ = first.write_text("black==24.1.0\nruff==0.15.0\n")
+    second = tmp_path / "requirements-dev.txt"
+    _ = second.write_text("black==24.2.0\n")
+
+    cfg = create_config_file(
+        tmp_path,
+        dedent("""\
+repos:
+  - repo: https://github.com/adamchainz/blacken-docs
+    rev: 1.15.0
+    hooks:
+      - id: blacken-docs
+        additional_dependencies:
+          - black==23.2.0
+          - ruff==0.14.2
+            """),
+    )
+    assert main([f"--config={cfg}", f"-r{first}", f"-r{second}"])
+    assert "black==24.2.0" in cfg.read_text()
+    assert "ruff==0.15.0" in cfg.read_text()
+
+
+def test_main_from_env(tmp_path: Path) -> None:
+    env = make_env(tmp_path / ".venv", {"black": "25.1.0", "ruff": "0.15.0"})
+    requirements = tmp_path / "requirements.txt"
+    _ = requirements.write_text("black==24.1.0\n")
+
+    cfg = create_config_file(
+        tmp_path,
+        dedent("""\
+repos:
+  - repo: https://github.com/adamchainz/blacken-docs
+    rev: 1.15.0
+    hooks:
+      - id: blacken-docs
+        additional_dependencies:
+          - black==23.2.0
+          - ruff==0.14.2
+            """),
+    )
+    assert main([f"--config={cfg}", f"--from-env={env}", f"-r{requirements}"])
+    assert "black==24.1.0" in cfg.read_text()
+    assert "ruff==0.15.0" in cfg.read_text()
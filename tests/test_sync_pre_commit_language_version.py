@@ -117,6 +117,30 @@ repos:
             1,
             id="update version",
         ),
+        pytest.param(
+            ["--hook=mypy", "--language-version=3.13"],
+            dedent("""\
+repos:
+- repo: https://github.com/pre-commit/mirrors-mypy
+  rev: v1.19.0
+  hooks:
+  - id: mypy
+    language_version: 3.12     # aligned comment
+    args: [ --strict ]
+            """),
+            None,
+            dedent("""\
+repos:
+- repo: https://github.com/pre-commit/mirrors-mypy
+  rev: v1.19.0
+  hooks:
+  - id: mypy
+    language_version: '3.13'     # aligned comment
+    args: [ --strict ]
+            """),
+            1,
+            id="preserve formatting",
+        ),
     ],
 )
 def test_main(
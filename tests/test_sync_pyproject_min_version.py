@@ -12,6 +12,8 @@ import pytest
 
 import sync_pre_commit_hooks.sync_pyproject_min_versions as mod
 
+from ._utils import make_env
+
 if TYPE_CHECKING:
     from types import EllipsisType
     from typing import Any
@@ -148,6 +150,20 @@ def test_options_from_params(
     )
 
 
+SCRIPT_LOCK_FILE = dedent("""\
+    version = 1
+    requires-python = ">=3.10"
+
+    [manifest]
+    requirements = [{ name = "locked" }]
+
+    [[package]]
+    name = "locked"
+    version = "3.4.5"
+    source = { registry = "https://pypi.org/simple" }
+    """)
+
+
 @pytest.mark.parametrize(
     ("requirements", "export_output"),
     [
@@ -160,7 +176,7 @@ def test_options_from_params(
         ("hello.py", False, "requirements", {"hello": "1.2.3"}),
         ("hello.py", True, "requirements", {"hello": "1.2.3"}),
         ("hello.py", False, "infer", {"hello": "1.2.3"}),
-        ("hello.py", True, "infer", {"there": "2.3.4"}),
+        ("hello.py", True, "infer", {"locked": "3.4.5"}),
         ("hello.py", False, "force", {"there": "2.3.4"}),
         ("hello.py", True, "force", {"there": "2.3.4"}),
     ],
@@ -178,38 +194,26 @@ def test_options_get_versions(
     requirements_path = tmp_path / "requirements.txt"
     requirements_path.write_text(requirements)
 
-    opts = mod.Options(requirements=requirements_path, script_lock=script_lock)
+    opts = mod.Options(requirements=(requirements_path,), script_lock=script_lock)
 
     script_path = tmp_path / script_name
     script_path.write_text("")
     if locked:
         lock_path = script_path.with_suffix(".py.lock")
-        lock_path.write_text("")
+        lock_path.write_text(SCRIPT_LOCK_FILE)
 
     with patch(
         "sync_pre_commit_hooks.sync_pyproject_min_versions.check_output",
         side_effect=lambda x: export_output.encode(),
     ) as mocked:
-        assert opts.get_versions_from_script(script_path) == expected
+        assert opts.get_versions_from_script(script_path, ["hello"]) == expected
 
-        if locked and script_lock in {"force", "infer"}:
-            expected_calls = [
-                call([
-                    "uv",
-                    "export",
-                    "--frozen",
-                    "--offline",
-                    "--quiet",
-                    "--no-color",
-                    "--script",
-                    str(script_path),
-                ])
-            ]
-        elif script_lock == "force" or (script_lock == "infer" and locked):
+        if script_lock == "force":
             expected_calls = [
                 call([
                     "uv",
                     "export",
+                    *(["--frozen", "--offline"] if locked else []),
                     "--quiet",
                     "--no-color",
                     "--script",
@@ -883,3 +887,62 @@ def test_main(
         out = toml_or_script_path.read_text(encoding="utf-8")
 
         assert out == expected
+
+
+NAMES = ["hello", "locked", "Other_Thing", "missing"]
+
+
+def test_options_lock(tmp_path: Path) -> None:
+    requirements_path = tmp_path / "requirements.txt"
+    requirements_path.write_text("hello==1.2.3\nlocked==1.0.0\n")
+    lock_path = tmp_path / "uv.lock"
+    lock_path.write_text(SCRIPT_LOCK_FILE)
+
+    assert mod.Options.from_argv([
+        f"--requirements={requirements_path}",
+        f"--lock={lock_path}",
+    ]).get_versions(NAMES) == {"hello": "1.2.3", "locked": "3.4.5"}
+    assert mod.Options.from_argv([f"--lock={lock_path}"]).get_versions(NAMES) == {
+        "locked": "3.4.5"
+    }
+
+    other_path = tmp_path / "requirements-other.txt"
+    other_path.write_text("hello==2.0.0\nlocked==2.0.0\n")
+    assert mod.Options.from_argv([
+        f"-r{requirements_path}",
+        f"-r{other_path}",
+    ]).get_versions(NAMES) == {"hello": "2.0.0", "locked": "2.0.0"}
+    assert mod.Options.from_argv([
+        f"-r{other_path}",
+        f"-r{requirements_path}",
+        f"--lock={lock_path}",
+    ]).get_versions(NAMES) == {"hello": "1.2.3", "locked": "3.4.5"}
+
+
+def test_options_from_env(tmp_path: Path) -> None:
+    env = make_env(tmp_path / ".venv", {"hello": "2.0.0", "Other_Thing": "1.0"})
+    requirements_path = tmp_path / "requirements.txt"
+    requirements_path.write_text("hello==1.2.3\n")
+
+    assert mod.Options.from_argv([f"--from-env={env}"]).get_versions(NAMES) == {
+        "hello": "2.0.0",
+        "other-thing": "1.0",
+    }
+    assert mod.Options.from_argv([
+        f"--from-env={env}",
+        f"-r{requirements_path}",
+    ]).get_versions(NAMES) == {"hello": "1.2.3", "other-thing": "1.0"}
+
+
+def test_options_versions_lazy(tmp_path: Path) -> None:
+    lock_path = tmp_path / "uv.lock"
+    lock_path.write_text(SCRIPT_LOCK_FILE)
+    opts = mod.Options.from_argv([
+        f"--requirements={tmp_path / 'missing.txt'}",
+        f"--lock={lock_path}",
+    ])
+
+    # requirements file is only read for names not in lock
+    assert opts.get_versions(["locked"]) == {"locked": "3.4.5"}
+    with pytest.raises(FileNotFoundError):
+        _ = opts.get_versions(["hello"])
@@ -35,7 +35,10 @@ if TYPE_CHECKING:
     ],
 )
 def test__get_options(argv: Sequence[str], expected: tuple[Path, Path, bool]) -> None:
-    assert mod._get_options(argv) == expected
+    options = mod._get_options(argv)
+    assert (options.pre_commit_config, options.pyproject, options.lastversion) == (
+        expected
+    )
 
 
 @pytest.mark.parametrize(
@@ -80,9 +83,9 @@ def test__get_uv_version(config: dict[str, Any], expected: Any) -> None:
 
     with (
         patch(
-            "sync_pre_commit_hooks.sync_uv_build_deps.pre_commit_config_load",
+            "sync_pre_commit_hooks.sync_uv_build_deps.pre_commit_config_load_safe",
             autospec=True,
-            return_value=(config, None),
+            return_value=config,
         ),
         expected as e,
     ):
@@ -281,7 +284,7 @@ def test_main_lastversion(
 
     path_pyproject = create_config_file(tmp_path, pyproject, "pyproject.toml")
     with patch(
-        "sync_pre_commit_hooks.sync_uv_build_deps.get_version_from_lastversion",
+        "sync_pre_commit_hooks._versions._lastversion_backend",
         autospec=True,
         return_value=version_str,
     ):
@@ -289,3 +292,30 @@ def test_main_lastversion(
 
         with path_pyproject.open(encoding="utf-8") as f:
             assert f.read() == expected
+
+
+def test_main_index(tmp_path: Path) -> None:
+    index = tmp_path / "simple"
+    (index / "uv").mkdir(parents=True)
+    for filename in ("uv-0.11.3-py3-none-any.whl", "uv-0.12.1.tar.gz"):
+        (index / "uv" / filename).touch()
+
+    path_pyproject = create_config_file(
+        tmp_path,
+        dedent("""\
+[build-system]
+requires = ["uv-build>=0.11.6,<0.12.0"]
+            """),
+        "pyproject.toml",
+    )
+    with pytest.raises(SystemExit, match="2"):
+        _ = mod.main((f"--index={index}", f"--pyproject={path_pyproject}"))
+    assert '"uv-build>=0.11.6,<0.12.0"' in path_pyproject.read_text()
+
+    args = ("--lastversion", f"--pyproject={path_pyproject}")
+    assert mod.main((*args, f"--index={index}")) == 1
+    assert '"uv-build>=0.12.1,<0.13.0"' in path_pyproject.read_text()
+
+    (index / "other").mkdir()
+    with pytest.raises(ValueError, match="No latest version of uv"):
+        _ = mod.main((*args, f"--index={index / 'other'}"))
@@ -0,0 +1,101 @@
+"""
+Benchmark no-op runs of the ``.pre-commit-config.yaml`` hooks.
+
+Generates a large config (``--repos`` repos with ``--hooks`` hooks each) where
+every ``additional_dependencies`` and ``language_version`` value is already in
+sync, then times the YAML hooks with and without the read-only fast check.
+
+Run with ``python tools/bench_pre_commit_config.py``.
+"""
+
+from __future__ import annotations
+
+import logging
+import tempfile
+import timeit
+from argparse import ArgumentParser
+from functools import partial
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from sync_pre_commit_hooks import (
+    fill_pre_commit_deps,
+    sync_pre_commit_deps,
+    sync_pre_commit_language_version,
+)
+from sync_pre_commit_hooks._utils import (  # ruff:ignore[import-private-name]
+    PreCommitConfigDocument,
+)
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Sequence
+
+
+def make_config(repos: int, hooks: int) -> str:
+    """Create text of config with ``repos * hooks`` hooks."""
+    lines = ["repos:"]
+    for r in range(repos):
+        lines.extend([
+            f"  - repo: https://github.com/example/repo-{r}",
+            f"    rev: v{r}.0.0",
+            "    hooks:",
+        ])
+        for h in range(hooks):
+            lines.extend([
+                f"      - id: hook-{r}-{h}  # comment",
+                '        language_version: "3.13"',
+                "        additional_dependencies:",
+                f"          - hook-{(r + 1) % repos}-0=={(r + 1) % repos}.0.0",
+                "          - 'other==1.2.3'",
+            ])
+    return "\n".join(lines) + "\n"
+
+
+def _run_all(path: Path, fast_check: bool) -> int:
+    document = PreCommitConfigDocument.from_path(path, fast_check=fast_check)
+    _ = document.apply(sync_pre_commit_deps.update_config)
+    _ = document.apply(
+        sync_pre_commit_language_version.update_config,
+        hook_ids={"hook-0-0"},
+        language_version="3.13",
+    )
+    _ = document.apply(
+        fill_pre_commit_deps.update_config,
+        hook_id="hook-0-0",
+        deps=["hook-1-0==1.0.0", "other==1.2.3"],
+    )
+    return document.dump()
+
+
+def _time(func: Callable[[], int], number: int) -> float:
+    if func() != 0:
+        msg = "Benchmark config should be a no-op"
+        raise RuntimeError(msg)
+    return min(timeit.repeat(func, number=1, repeat=number))
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    """Run benchmark."""
+    parser = ArgumentParser(description=__doc__)
+    _ = parser.add_argument("--repos", type=int, default=40)
+    _ = parser.add_argument("--hooks", type=int, default=10)
+    _ = parser.add_argument("-n", "--number", type=int, default=5)
+    options = parser.parse_args(argv)
+
+    logging.disable(logging.INFO)
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = Path(tmpdir) / ".pre-commit-config.yaml"
+        _ = path.write_text(make_config(options.repos, options.hooks), encoding="utf-8")
+
+        print(f"config: {options.repos * options.hooks} hooks")  # ruff:ignore[print]
+        for fast_check in (False, True):
+            elapsed = _time(partial(_run_all, path, fast_check), options.number)
+            label = "read-only check" if fast_check else "round-trip load"
+            print(f"{label:>16}: {elapsed * 1000:8.1f} ms")  # ruff:ignore[print]
+
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
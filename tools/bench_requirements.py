@@ -0,0 +1,102 @@
+"""
+Benchmark reading pinned versions from a large requirements file.
+
+Generates a ``uv export --generate-hashes`` style file (``--packages``
+packages with ``--hashes`` hash continuation lines each), then times the full
+``requirements-parser`` grammar against the streaming parser reading the file,
+a list of lines, and a memory map.
+
+Run with ``python tools/bench_requirements.py``.
+"""
+
+from __future__ import annotations
+
+import mmap
+import tempfile
+import timeit
+from argparse import ArgumentParser
+from functools import partial
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from sync_pre_commit_hooks._versions import (  # ruff:ignore[import-private-name]
+    iter_pinned_versions,
+)
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Sequence
+
+
+def make_requirements(packages: int, hashes: int) -> str:
+    """Create text of requirements file with ``packages`` pinned packages."""
+    lines = ["# This file was autogenerated by uv via the following command:"]
+    for p in range(packages):
+        marker = " ; python_full_version >= '3.11'" if p % 3 == 0 else ""
+        lines.append(f"package-{p}[extra]=={p}.0.{p % 7}{marker} \\")
+        lines.extend(
+            f"    --hash=sha256:{p:032x}{h:032x}" + (" \\" if h < hashes - 1 else "")
+            for h in range(hashes)
+        )
+        lines.append(f"    # via package-{(p + 1) % packages}")
+    return "\n".join(lines) + "\n"
+
+
+def _full_parse(path: Path) -> dict[str, str]:
+    from requirements import parse
+
+    return {
+        str(requirement.name): requirement.specs[0][-1]
+        for requirement in parse(path.read_text(encoding="utf-8"))
+    }
+
+
+def _stream_file(path: Path) -> dict[str, str]:
+    with path.open(encoding="utf-8") as f:
+        return dict(iter_pinned_versions(f))
+
+
+def _stream_lines(path: Path) -> dict[str, str]:
+    return dict(iter_pinned_versions(path.read_text(encoding="utf-8").splitlines()))
+
+
+def _stream_mmap(path: Path) -> dict[str, str]:
+    with path.open("rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+        return dict(iter_pinned_versions(iter(m.readline, b"")))
+
+
+def _time(func: Callable[[], dict[str, str]], number: int) -> float:
+    return min(timeit.repeat(func, number=1, repeat=number))
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    """Run benchmark."""
+    parser = ArgumentParser(description=__doc__)
+    _ = parser.add_argument("--packages", type=int, default=2000)
+    _ = parser.add_argument("--hashes", type=int, default=10)
+    _ = parser.add_argument("-n", "--number", type=int, default=5)
+    options = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = Path(tmpdir) / "requirements.txt"
+        text = make_requirements(options.packages, options.hashes)
+        _ = path.write_text(text, encoding="utf-8")
+
+        print(f"requirements: {text.count(chr(10))} lines")  # ruff:ignore[print]
+        expected = _full_parse(path)
+        for label, func in [
+            ("requirements-parser", _full_parse),
+            ("stream file", _stream_file),
+            ("stream lines", _stream_lines),
+            ("stream mmap", _stream_mmap),
+        ]:
+            if func(path) != expected:
+                msg = f"{label} differs from requirements-parser"
+                raise RuntimeError(msg)
+            elapsed = _time(partial(func, path), options.number)
+            print(f"{label:>20}: {elapsed * 1000:8.1f} ms")  # ruff:ignore[print]
+
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())